@@ -0,0 +1,126 @@
+"""
+Synthetic Update corpus for benchmarks: realistic update JSON dicts as returned by getUpdates.
+
+Usage: python -m benchmarks.corpus [updates] > corpus.json
+"""
+import json
+import random
+import sys
+
+#: Default share of every update kind in a corpus.
+DEFAULT_MIX = {
+    'text': 40,
+    'command': 20,
+    'callback_query': 20,
+    'media_group': 10,
+    'business_message': 10,
+}
+
+COMMANDS = ('start', 'help', 'settings', 'stats', 'cancel')
+WORDS = ('hello', 'bot', 'order', 'status', 'price', 'thanks', 'photo', 'when', 'where', 'please', 'ok', 'help')
+
+
+class CorpusGenerator:
+    """
+    Generates update dicts. The same seed always gives the same corpus.
+
+    :param seed: random seed
+    :param chats: number of distinct chats/users
+    :param mix: {kind: weight}, see DEFAULT_MIX
+    """
+
+    def __init__(self, seed=0, chats=1000, mix=None):
+        self.random = random.Random(seed)
+        self.chats = chats
+        self.mix = mix or DEFAULT_MIX
+        self.update_id = 100000
+        self.message_id = 0
+        self.date = 1700000000
+
+    def _user(self, user_id):
+        return {
+            'id': user_id, 'is_bot': False, 'first_name': 'User{}'.format(user_id),
+            'username': 'user{}'.format(user_id), 'language_code': self.random.choice(('en', 'de', 'es', 'ru')),
+        }
+
+    def _message(self, chat_type='private', **fields):
+        self.message_id += 1
+        self.date += self.random.randint(0, 3)
+        user_id = self.random.randint(1, self.chats)
+        if chat_type == 'private':
+            chat = {'id': user_id, 'type': 'private', 'first_name': 'User{}'.format(user_id)}
+        else:
+            chat = {'id': -1000000000000 - user_id % 50, 'type': chat_type, 'title': 'Group {}'.format(user_id % 50)}
+        message = {'message_id': self.message_id, 'date': self.date, 'chat': chat, 'from': self._user(user_id)}
+        message.update(fields)
+        return message
+
+    def _text(self, words=None):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words or self.random.randint(1, 12)))
+
+    def _update(self, **fields):
+        self.update_id += 1
+        update = {'update_id': self.update_id}
+        update.update(fields)
+        return update
+
+    def text(self):
+        chat_type = self.random.choice(('private', 'private', 'group', 'supergroup'))
+        text = self._text()
+        fields = {'text': text}
+        if self.random.random() < 0.2:
+            fields['entities'] = [{'type': 'bold', 'offset': 0, 'length': min(len(text), 5)}]
+        if self.random.random() < 0.1:
+            fields['reply_to_message'] = self._message(chat_type, text=self._text())
+        return [self._update(message=self._message(chat_type, **fields))]
+
+    def command(self):
+        command = '/' + self.random.choice(COMMANDS)
+        text = command + (' ' + self._text(2) if self.random.random() < 0.3 else '')
+        return [self._update(message=self._message(
+            text=text, entities=[{'type': 'bot_command', 'offset': 0, 'length': len(command)}]))]
+
+    def callback_query(self):
+        message = self._message(text=self._text(), reply_markup={'inline_keyboard': [
+            [{'text': 'Button {}'.format(i), 'callback_data': 'button:{}'.format(i)} for i in range(3)]]})
+        return [self._update(callback_query={
+            'id': str(self.random.getrandbits(60)), 'from': message['from'], 'message': message,
+            'chat_instance': str(self.random.getrandbits(60)), 'data': 'button:{}'.format(self.random.randint(0, 2))})]
+
+    def media_group(self):
+        media_group_id = str(self.random.getrandbits(60))
+        updates = []
+        for i in range(self.random.randint(2, 5)):
+            photo = [
+                {'file_id': 'AgAD{}{}'.format(self.message_id, size), 'file_unique_id': 'AQAD{}{}'.format(self.message_id, size),
+                 'width': width, 'height': width * 3 // 4, 'file_size': width * 200}
+                for size, width in enumerate((90, 320, 800, 1280))]
+            fields = {'media_group_id': media_group_id, 'photo': photo}
+            if i == 0:
+                fields['caption'] = self._text()
+            updates.append(self._update(message=self._message(**fields)))
+        return updates
+
+    def business_message(self):
+        message = self._message(text=self._text(), business_connection_id='connection{}'.format(self.random.randint(1, 5)))
+        return [self._update(business_message=message)]
+
+    def generate(self, count):
+        """
+        Returns a list of at least `count` update dicts (media groups are not split).
+        """
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        updates = []
+        while len(updates) < count:
+            kind = self.random.choices(kinds, weights)[0]
+            updates.extend(getattr(self, kind)())
+        return updates
+
+
+def generate(count, seed=0, chats=1000, mix=None):
+    return CorpusGenerator(seed=seed, chats=chats, mix=mix).generate(count)
+
+
+if __name__ == '__main__':
+    json.dump(generate(int(sys.argv[1]) if len(sys.argv) > 1 else 1000), sys.stdout)
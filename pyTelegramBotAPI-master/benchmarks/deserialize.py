@@ -0,0 +1,84 @@
+"""
+Deserialization benchmark: generated (telebot.schema) vs hand-written de_json of the types in the schema.
+
+Deserializes the updates of a synthetic corpus and the objects nested in them, per type, once with the
+generated methods and once with the hand-written ones restored:
+
+    python -m benchmarks.deserialize --updates 5000
+"""
+import argparse
+import copy
+import sys
+import time
+
+from telebot import schema, types
+
+from benchmarks.corpus import generate
+
+
+def samples(corpus):
+    """
+    Returns {type name: [dicts]} of the updates in `corpus` and the objects of schema types nested in them.
+    """
+    result = {name: [] for name in schema.SCHEMA}
+    result['Update'] = list(corpus)
+    for update in corpus:
+        callback_query = update.get('callback_query')
+        if callback_query:
+            result['CallbackQuery'].append(callback_query)
+        message = update.get('message') or update.get('business_message') or (callback_query or {}).get('message')
+        if not message:
+            continue
+        result['Message'].append(message)
+        result['User'].append(message['from'])
+        result['Chat'].append(message['chat'])
+        result['MessageEntity'].extend(message.get('entities', ()))
+        result['PhotoSize'].extend(message.get('photo', ()))
+    del result['ChatFullInfo'] # same fields as Chat
+    return {name: dicts for name, dicts in result.items() if dicts}
+
+
+def measure(cls, dicts, repeat=5):
+    """
+    Returns the best time per object in microseconds of `repeat` runs of cls.de_json over `dicts`.
+    """
+    # hand-written methods may change their input, so every run gets its own copy
+    runs = [copy.deepcopy(dicts) for _ in range(repeat)]
+    best = None
+    for run in runs:
+        started = time.perf_counter()
+        for obj in run:
+            cls.de_json(obj)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best / len(dicts) * 1e6, 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=5000, help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per type, the best one is reported')
+    args = parser.parse_args(argv)
+
+    by_type = samples(generate(args.updates, seed=args.seed))
+    results = {}
+    for name, dicts in by_type.items():
+        results[name] = {'objects': len(dicts), 'generated_us': measure(getattr(types, name), dicts, args.repeat)}
+    installed = bool(schema.handwritten)
+    schema.uninstall()
+    try:
+        for name, dicts in by_type.items():
+            results[name]['handwritten_us'] = measure(getattr(types, name), dicts, args.repeat)
+    finally:
+        if installed:
+            schema.install()
+
+    for name, result in results.items():
+        print('{:14} {objects:>7} objects  generated {generated_us:>8} us  hand-written {handwritten_us:>8} us  '
+              '({speedup:.2f}x)'.format(name, speedup=result['handwritten_us'] / result['generated_us'], **result))
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
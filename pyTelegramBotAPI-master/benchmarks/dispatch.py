@@ -0,0 +1,242 @@
+"""
+Dispatch benchmark: pushes a synthetic update corpus through TeleBot.process_new_updates and
+AsyncTeleBot.process_new_updates, fully offline.
+
+Reports updates/sec, p50/p99 per-update latency (de_json + dispatch) and traced memory allocated per update,
+and stores the results as JSON so runs can be compared:
+
+    python -m benchmarks.dispatch --updates 5000 --handlers 50 --middleware
+    python -m benchmarks.dispatch --lazy
+    python -m benchmarks.dispatch --compare benchmarks/results/<previous run>.json
+
+The Bot API is stubbed with apihelper.CUSTOM_REQUEST_SENDER, so with --api-calls synchronous handlers
+reply to every message without network access. Asynchronous handlers make no API calls.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import telebot
+from telebot import apihelper, types, util
+from telebot.async_telebot import AsyncTeleBot
+from telebot import handler_backends, asyncio_handler_backends
+
+from benchmarks.corpus import COMMANDS, DEFAULT_MIX, generate
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+STUB_MESSAGE = json.dumps({'ok': True, 'result': {
+    'message_id': 1, 'date': 1700000000, 'chat': {'id': 1, 'type': 'private'}, 'text': 'ok',
+    'from': {'id': 1, 'is_bot': True, 'first_name': 'Benchmark'}}})
+
+
+def stub_request_sender(method, url, params=None, files=None, timeout=None, proxies=None):
+    return util.CustomRequestResponse(STUB_MESSAGE)
+
+
+class SyncMiddleware(handler_backends.BaseMiddleware):
+    update_types = ['message', 'callback_query', 'business_message']
+
+    def pre_process(self, message, data):
+        data['language'] = message.from_user.language_code
+
+    def post_process(self, message, data, exception):
+        pass
+
+
+class AsyncMiddleware(asyncio_handler_backends.BaseMiddleware):
+    update_types = ['message', 'callback_query', 'business_message']
+
+    async def pre_process(self, message, data):
+        data['language'] = message.from_user.language_code
+
+    async def post_process(self, message, data, exception):
+        pass
+
+
+def handler_specs(count):
+    """
+    Yields (register method name, filters) for `count` handlers with a realistic mix of filters. Most of them
+    never match, like command handlers of other commands; a catch-all handler for every update type comes last.
+    """
+    kinds = ('command', 'regexp', 'content_type', 'callback', 'func')
+    for i in range(max(count - 3, 0)):
+        kind = kinds[i % len(kinds)]
+        if kind == 'command':
+            command = COMMANDS[i % len(COMMANDS)] if i < len(COMMANDS) * len(kinds) else 'unused{}'.format(i)
+            yield 'register_message_handler', {'commands': [command]}
+        elif kind == 'regexp':
+            yield 'register_message_handler', {'regexp': r'^never{}\b'.format(i)}
+        elif kind == 'content_type':
+            yield 'register_message_handler', {'content_types': ['photo' if i % 2 else 'document'], 'chat_types': ['group']}
+        elif kind == 'callback':
+            yield 'register_callback_query_handler', {'func': lambda call, prefix='other{}:'.format(i): call.data.startswith(prefix)}
+        else:
+            yield 'register_message_handler', {'func': lambda message, n=i: message.text == 'never{}'.format(n)}
+    yield 'register_message_handler', {'content_types': util.content_type_media}
+    yield 'register_callback_query_handler', {'func': lambda call: True}
+    yield 'register_business_message_handler', {'content_types': util.content_type_media}
+
+
+def make_sync_bot(handlers, middleware, api_calls):
+    bot = telebot.TeleBot('1234:benchmark', threaded=False, use_class_middlewares=middleware)
+    if middleware:
+        bot.setup_middleware(SyncMiddleware())
+
+    def handler(update):
+        if api_calls and isinstance(update, types.Message):
+            bot.send_message(update.chat.id, 'ok')
+
+    for register, filters in handler_specs(handlers):
+        getattr(bot, register)(handler, **filters)
+    return bot
+
+
+def make_async_bot(handlers, middleware):
+    bot = AsyncTeleBot('1234:benchmark')
+    if middleware:
+        bot.setup_middleware(AsyncMiddleware())
+
+    async def handler(update):
+        pass
+
+    for register, filters in handler_specs(handlers):
+        getattr(bot, register)(handler, **filters)
+    return bot
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(process, corpus):
+    """
+    Runs `process(update dict)` for every update: once timed, once under tracemalloc.
+    """
+    for update in corpus[:100]:
+        process(update) # warm up
+
+    gc.collect()
+    latencies = []
+    started = time.perf_counter()
+    for update in corpus:
+        update_started = time.perf_counter()
+        process(update)
+        latencies.append(time.perf_counter() - update_started)
+    total = time.perf_counter() - started
+
+    tracemalloc.start()
+    allocated = 0
+    for update in corpus:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        process(update)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return {
+        'updates': len(corpus),
+        'updates_per_sec': round(len(corpus) / total, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'peak_bytes_per_update': round(allocated / len(corpus)),
+    }
+
+
+def run_sync(corpus, handlers, middleware, api_calls):
+    bot = make_sync_bot(handlers, middleware, api_calls)
+    return measure(lambda update: bot.process_new_updates([types.Update.de_json(update)]), corpus)
+
+
+def run_async(corpus, handlers, middleware):
+    bot = make_async_bot(handlers, middleware)
+    loop = asyncio.new_event_loop()
+    try:
+        return measure(
+            lambda update: loop.run_until_complete(bot.process_new_updates([types.Update.de_json(update)])), corpus)
+    finally:
+        loop.close()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(current, previous):
+    for name, result in current['results'].items():
+        old = previous['results'].get(name)
+        if not old:
+            continue
+        print('{} vs {} ({}):'.format(name, previous.get('revision'), previous.get('date')))
+        for key, value in result.items():
+            if key in old and isinstance(value, (int, float)) and old[key]:
+                print('  {:24} {:>12} -> {:>12} ({:+.1f}%)'.format(key, old[key], value, (value - old[key]) / old[key] * 100))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=5000, help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--handlers', type=int, default=50, help='number of registered handlers')
+    parser.add_argument('--middleware', action='store_true', help='use a class-based middleware')
+    parser.add_argument('--api-calls', action='store_true', help='sync message handlers send a (stubbed) reply')
+    parser.add_argument('--lazy', action='store_true', help='deserialize updates lazily (types.LAZY_DESERIALIZATION)')
+    parser.add_argument('--mix', type=json.loads, default=DEFAULT_MIX, help='update kind weights as JSON')
+    parser.add_argument('--only', choices=('sync', 'async'), help='run only one of the bots')
+    parser.add_argument('--output', default=RESULTS_DIR, help='directory to store results in, "" to not store them')
+    parser.add_argument('--compare', help='results file of a previous run to compare with')
+    args = parser.parse_args(argv)
+
+    corpus = generate(args.updates, seed=args.seed, mix=args.mix)
+    apihelper.CUSTOM_REQUEST_SENDER = stub_request_sender
+    types.LAZY_DESERIALIZATION = args.lazy
+    results = {}
+    try:
+        if args.only != 'async':
+            results['sync'] = run_sync(corpus, args.handlers, args.middleware, args.api_calls)
+        if args.only != 'sync':
+            results['async'] = run_async(corpus, args.handlers, args.middleware)
+    finally:
+        apihelper.CUSTOM_REQUEST_SENDER = None
+        types.LAZY_DESERIALIZATION = False
+
+    run = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results,
+    }
+    for name, result in results.items():
+        print('{:5}  {updates} updates  {updates_per_sec} updates/s  p50 {p50_ms} ms  p99 {p99_ms} ms  '
+              '{peak_bytes_per_update} B/update'.format(name, **result))
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        path = os.path.join(args.output, '{}-{}.json'.format(
+            datetime.now().strftime('%Y%m%d-%H%M%S'), run['revision'] or 'unknown'))
+        with open(path, 'w') as f:
+            json.dump(run, f, indent=2)
+        print('Results stored in', path)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(run, json.load(f))
+    return run
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of handler calls with class-based middlewares enabled.
+
+Every message is passed through 50 handlers (each of them returns ContinueHandling), once with the
+call adapters compiled when handlers are registered and once with the previous per-message
+``inspect.signature`` reflection.
+
+Usage: python -m benchmarks.handler_call [messages]
+"""
+import inspect
+import sys
+import time
+
+import telebot
+from telebot import types
+from telebot.handler_backends import BaseMiddleware, ContinueHandling
+
+HANDLERS = 50
+
+
+class DataMiddleware(BaseMiddleware):
+    def __init__(self):
+        super().__init__()
+        self.update_types = ['message']
+
+    def pre_process(self, message, data):
+        data['language'] = 'en'
+
+    def post_process(self, message, data, exception):
+        pass
+
+
+def reflection_call(handler, message, data, bot):
+    # Handler call as it was done before call adapters: signature is inspected for every message
+    params = []
+    for i in inspect.signature(handler['function']).parameters:
+        params.append(i)
+    if len(params) == 1:
+        return handler['function'](message)
+    elif "data" in params:
+        if len(params) == 2:
+            return handler['function'](message, data)
+        return handler['function'](message, data=data, bot=bot)
+    data_copy = data.copy()
+    for key in list(data_copy):
+        if key not in params:
+            del data_copy[key]
+    if handler.get('pass_bot'):
+        data_copy["bot"] = bot
+    return handler["function"](message, **data_copy)
+
+
+def make_bot():
+    bot = telebot.TeleBot('1234:benchmark', threaded=False, use_class_middlewares=True)
+    bot.setup_middleware(DataMiddleware())
+    for i in range(HANDLERS):
+        if i % 3 == 0:
+            def handler(message):
+                return ContinueHandling()
+        elif i % 3 == 1:
+            def handler(message, data):
+                return ContinueHandling()
+        else:
+            def handler(message, language):
+                return ContinueHandling()
+        bot.register_message_handler(handler, content_types=['text'])
+    return bot
+
+
+def make_message(message_id):
+    chat = types.Chat(id=11, type='private')
+    user = types.User(id=10, is_bot=False, first_name='Benchmark')
+    return types.Message(
+        message_id=message_id, from_user=user, date=None, chat=chat, content_type='text',
+        options={'text': 'hello'}, json_string="")
+
+
+def run(bot, messages):
+    started = time.perf_counter()
+    bot.process_new_messages(messages)
+    return time.perf_counter() - started
+
+
+def main(count=2000):
+    messages = [make_message(i) for i in range(count)]
+    bot = make_bot()
+    compiled = run(bot, messages)
+
+    handlers = bot.message_handlers
+    for handler in handlers:
+        handler['caller'] = (lambda h: lambda message, data, bot: reflection_call(h, message, data, bot))(handler)
+    reflection = run(bot, messages)
+
+    per_message = lambda seconds: seconds / count * 1e6
+    print('{} messages, {} handlers each'.format(count, HANDLERS))
+    print('inspect.signature per message: {:8.1f} us/message'.format(per_message(reflection)))
+    print('compiled call adapters:        {:8.1f} us/message'.format(per_message(compiled)))
+    print('saving:                        {:8.1f} us/message ({:.1f}x)'.format(
+        per_message(reflection - compiled), reflection / compiled))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,87 @@
+"""
+Memory benchmark: bytes retained per deserialized Message.
+
+Parses and deserializes the messages of a synthetic corpus like getUpdates responses, keeps all of them alive
+and reports traced memory per message for eager and lazy deserialization, with and without keeping Message.json,
+and with User and Chat objects interned (all messages are one batch, --chats sets how many distinct ones it has):
+
+    python -m benchmarks.memory --messages 10000 --chats 50
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+from telebot import types
+
+from benchmarks.corpus import generate
+
+# name -> types module settings
+VARIANTS = {
+    'eager': {'LAZY_DESERIALIZATION': False, 'RETAIN_MESSAGE_JSON': True, 'INTERN_USERS_AND_CHATS': False},
+    'eager_without_json': {'LAZY_DESERIALIZATION': False, 'RETAIN_MESSAGE_JSON': False, 'INTERN_USERS_AND_CHATS': False},
+    'eager_without_json_interned': {
+        'LAZY_DESERIALIZATION': False, 'RETAIN_MESSAGE_JSON': False, 'INTERN_USERS_AND_CHATS': True},
+    'lazy': {'LAZY_DESERIALIZATION': True, 'RETAIN_MESSAGE_JSON': True, 'INTERN_USERS_AND_CHATS': False},
+    'lazy_without_json': {'LAZY_DESERIALIZATION': True, 'RETAIN_MESSAGE_JSON': False, 'INTERN_USERS_AND_CHATS': False},
+}
+
+
+def message_strings(count, seed=0, chats=1000):
+    strings = []
+    for update in generate(count, seed=seed, chats=chats):
+        message = update.get('message') or update.get('business_message') or update['callback_query']['message']
+        strings.append(json.dumps(message))
+    return strings[:count]
+
+
+def measure(strings, touch=False):
+    """
+    Returns traced bytes retained per Message deserialized from `strings`, including the parsed dicts they keep.
+
+    :param touch: read chat.id, from_user.id and text of every message, like most handlers do
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with types.interning():
+        messages = [types.Message.de_json(json.loads(string)) for string in strings]
+    if touch:
+        for message in messages:
+            message.chat.id, message.from_user.id, message.text
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del messages
+    return round(retained / len(strings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=10000, help='number of messages')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--chats', type=int, default=1000, help='number of distinct chats/users')
+    args = parser.parse_args(argv)
+
+    strings = message_strings(args.messages, seed=args.seed, chats=args.chats)
+    defaults = {name: getattr(types, name, None) for name in VARIANTS['eager']}
+    results = {}
+    try:
+        for variant, settings in VARIANTS.items():
+            for name, value in settings.items():
+                setattr(types, name, value)
+            results[variant] = measure(strings)
+            if settings['LAZY_DESERIALIZATION']:
+                results[variant + '_touched'] = measure(strings, touch=True)
+    finally:
+        for name, value in defaults.items():
+            setattr(types, name, value)
+
+    for variant, size in results.items():
+        print('{:28} {:>8} B/message'.format(variant, size))
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,81 @@
+"""
+Latency of threaded polling: time from an update batch arriving (the getUpdates response being returned)
+to its handler starting, measured offline with a stub request sender.
+
+Usage: python -m benchmarks.polling_latency [batches] [updates per batch]
+"""
+import json
+import sys
+import threading
+import time
+
+import telebot
+from telebot import apihelper, util
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Benchmark', 'username': 'benchmark_bot'}
+
+
+class StubSender:
+    def __init__(self, batches, batch_size, network_delay=0.001):
+        self.batches = batches
+        self.batch_size = batch_size
+        self.network_delay = network_delay
+        self.update_id = 0
+        self.arrivals = {}
+
+    def __call__(self, method, url, params=None, files=None, timeout=None, proxies=None):
+        if url.endswith('getMe'):
+            return util.CustomRequestResponse(json.dumps({'ok': True, 'result': BOT_USER}))
+        time.sleep(self.network_delay)
+        updates = []
+        if self.batches:
+            self.batches -= 1
+            for _ in range(self.batch_size):
+                self.update_id += 1
+                updates.append({
+                    'update_id': self.update_id,
+                    'message': {
+                        'message_id': self.update_id, 'date': 0, 'text': 'hello',
+                        'chat': {'id': self.update_id % 50, 'type': 'private'},
+                        'from': {'id': self.update_id % 50, 'is_bot': False, 'first_name': 'User'}}})
+        response = util.CustomRequestResponse(json.dumps({'ok': True, 'result': updates}))
+        arrived = time.perf_counter()
+        for update in updates:
+            self.arrivals[update['update_id']] = arrived
+        return response
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(batches=200, batch_size=20):
+    sender = StubSender(batches, batch_size)
+    apihelper.CUSTOM_REQUEST_SENDER = sender
+    bot = telebot.TeleBot('1234:benchmark', num_threads=4)
+    expected = batches * batch_size
+    latencies = []
+    lock = threading.Lock()
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        started = time.perf_counter()
+        with lock:
+            latencies.append(started - sender.arrivals[message.message_id])
+            if len(latencies) == expected:
+                bot.stop_polling()
+
+    try:
+        bot.polling(non_stop=True, long_polling_timeout=0)
+    finally:
+        bot.stop_bot()
+        apihelper.CUSTOM_REQUEST_SENDER = None
+
+    latencies.sort()
+    print('{} updates in batches of {}'.format(len(latencies), batch_size))
+    print('arrival to handler start: p50 {:.3f} ms, p99 {:.3f} ms, max {:.3f} ms'.format(
+        percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, latencies[-1] * 1000))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,99 @@
+"""
+Upload memory benchmark: peak RSS of sending a large document with and without streaming multipart uploads.
+
+Every variant uploads the same file with apihelper.send_data in a fresh process, to a local server which
+discards the body, and reports the peak RSS of that process and its increase over the peak before the upload:
+
+    python -m benchmarks.upload --size 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# name -> apihelper.STREAMING_UPLOADS
+VARIANTS = {'buffered': False, 'streaming': True}
+
+
+class DiscardingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        left = int(self.headers['Content-Length'])
+        while left:
+            left -= len(self.rfile.read(min(left, 1024 * 1024)))
+        response = b'{"ok": true, "result": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def upload(api_url, path, streaming):
+    """
+    Uploads the file at `path` in this process and returns peak RSS in MB before and after.
+    """
+    from telebot import apihelper
+    apihelper.API_URL = api_url
+    apihelper.STREAMING_UPLOADS = streaming
+    before = peak_rss_mb()
+    with open(path, 'rb') as f:
+        apihelper.send_data('1:token', 1, f, 'document', timeout=600)
+    return {'before_mb': before, 'peak_mb': peak_rss_mb()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=500, help='file size in MB')
+    parser.add_argument('--child', help=argparse.SUPPRESS) # variant, API URL and path, JSON
+    args = parser.parse_args(argv)
+
+    if args.child:
+        variant, api_url, path = json.loads(args.child)
+        print(json.dumps(upload(api_url, path, VARIANTS[variant])))
+        return None
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DiscardingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = 'http://127.0.0.1:{}/bot{{0}}/{{1}}'.format(server.server_port)
+    fd, path = tempfile.mkstemp(suffix='.bin')
+    results = {}
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # sparse file, its contents don't matter
+            f.truncate(args.size * 1024 * 1024)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for variant in VARIANTS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.upload', '--child', json.dumps([variant, api_url, path])],
+                cwd=root, check=True, stdout=subprocess.PIPE).stdout
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            result['increase_mb'] = round(result['peak_mb'] - result['before_mb'], 1)
+            results[variant] = result
+    finally:
+        os.remove(path)
+        server.shutdown()
+        server.server_close()
+
+    for variant, result in results.items():
+        print('{:10} {} MB upload: peak RSS {peak_mb:>8} MB (+{increase_mb} MB)'.format(variant, args.size, **result))
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -29,7 +29,6 @@ formatter = logging.Formatter(
     '%(asctime)s (%(filename)s:%(lineno)d %(threadName)s) %(levelname)s - %(name)s: "%(message)s"'
 )
 
-import inspect
 
 console_output_handler = logging.StreamHandler(sys.stderr)
 console_output_handler.setFormatter(formatter)
@@ -119,6 +118,19 @@ class TeleBot:
     :param num_threads: Number of maximum parallel threads, defaults to 2
     :type num_threads: :obj:`int`, optional
 
+    :param max_threads: Let the worker pool grow up to this number of threads when handlers can't keep up,
+        idle threads are retired back down to num_threads. Not used with ordered_per_chat, defaults to None (fixed size)
+    :type max_threads: :obj:`int`, optional
+
+    :param ordered_per_chat: Process updates of the same chat (or user, if the update has no chat) strictly in order,
+        one at a time, while updates of different chats are processed in parallel. Only for threaded mode, defaults to False
+    :type ordered_per_chat: :obj:`bool`, optional
+
+    :param max_queue_size: Maximum number of tasks waiting for a worker thread. When it is reached, polling stops
+        requesting updates until the workers catch up, so pending updates stay on Telegram side. 0 means unlimited.
+        Only for threaded mode, defaults to 0
+    :type max_queue_size: :obj:`int`, optional
+
     :param next_step_backend: Next step backend class, defaults to None
     :type next_step_backend: :class:`telebot.handler_backends.HandlerBackend`, optional
 
@@ -174,7 +186,10 @@ class TeleBot:
             protect_content: Optional[bool]=None,
             allow_sending_without_reply: Optional[bool]=None,
             colorful_logs: Optional[bool]=False,
-            validate_token: Optional[bool]=True
+            validate_token: Optional[bool]=True,
+            ordered_per_chat: Optional[bool]=False,
+            max_queue_size: Optional[int]=0,
+            max_threads: Optional[int]=None
     ):
 
         # update-related
@@ -210,6 +225,9 @@ class TeleBot:
 
         # threading-related
         self.__stop_polling = threading.Event()
+        self.__prefetched_updates = None
+        self.__polling_worker = None
+        self.__polling_lock = threading.Lock()
         self.exc_info = None
 
         # states & register_next_step_handler
@@ -252,6 +270,10 @@ class TeleBot:
 
         self.custom_filters = {}
         self.state_handlers = []
+        self._handler_indexes = {}
+        self.metrics = None
+        self.profiler = None
+        self.api_cache = None
 
         # middlewares
         self.use_class_middlewares = use_class_middlewares
@@ -291,7 +313,11 @@ class TeleBot:
         # threads
         self.threaded = threaded
         if self.threaded:
-            self.worker_pool = util.ThreadPool(self, num_threads=num_threads)
+            if ordered_per_chat:
+                self.worker_pool = util.OrderedThreadPool(self, num_threads=num_threads, max_queue_size=max_queue_size)
+            else:
+                self.worker_pool = util.ThreadPool(
+                    self, num_threads=num_threads, max_queue_size=max_queue_size, max_threads=max_threads)
 
     @property
     def user(self) -> types.User:
@@ -660,7 +686,8 @@ class TeleBot:
         json_updates = apihelper.get_updates(
             self.token, offset=offset, limit=limit, timeout=timeout, allowed_updates=allowed_updates,
             long_polling_timeout=long_polling_timeout)
-        return [types.Update.de_json(ju) for ju in json_updates]
+        with types.fresh_json(), types.interning():
+            return [types.Update.de_json(ju) for ju in json_updates]
 
     def __skip_updates(self):
         """
@@ -672,24 +699,86 @@ class TeleBot:
         """
         self.get_updates(offset=-1)
 
-    def __retrieve_updates(self, timeout=20, long_polling_timeout=20, allowed_updates=None):
+    def __retrieve_updates(self, timeout=20, long_polling_timeout=20, allowed_updates=None, pipeline_updates=False,
+                           wait_for_updates=None):
         """
         Retrieves any updates from the Telegram API.
         Registered listeners and applicable message handlers will be notified when a new message arrives.
 
+        With pipeline_updates, the request for the next batch is sent before the current one is processed,
+        so it is already in flight (and acknowledges the current batch) while handlers run.
+
+        With wait_for_updates, every request is sent by the polling thread, and the calling thread waits for it
+        with wait_for_updates(pending_result), which may raise to stop waiting. Updates of an abandoned request
+        are not confirmed, Telegram sends them again.
+
         :meta private:
 
         :raises ApiException when a call has failed.
         """
         if self.skip_pending:
+            self.__prefetched_updates = None
             self.__skip_updates()
             logger.debug('Skipped all pending messages')
             self.skip_pending = False
-        updates = self.get_updates(offset=(self.last_update_id + 1),
-                                   allowed_updates=allowed_updates,
-                                   timeout=timeout, long_polling_timeout=long_polling_timeout)
+        pending, self.__prefetched_updates = self.__prefetched_updates, None
+        if pending is None and wait_for_updates is not None:
+            pending = self.__request_updates(self.last_update_id + 1, allowed_updates, timeout, long_polling_timeout)
+            if pending is None:
+                # polling was stopped
+                return
+        if pending is not None:
+            if wait_for_updates is not None:
+                wait_for_updates(pending)
+            # errors of the request are raised here, to be handled by the polling loop
+            updates = pending.wait()
+        else:
+            updates = self.get_updates(offset=(self.last_update_id + 1),
+                                       allowed_updates=allowed_updates,
+                                       timeout=timeout, long_polling_timeout=long_polling_timeout)
+        if self.metrics is not None:
+            self.metrics.observe_batch_size(len(updates))
+        if pipeline_updates and updates:
+            self.__request_updates(max(update.update_id for update in updates) + 1, allowed_updates, timeout,
+                                   long_polling_timeout, prefetch=True)
         self.process_new_updates(updates)
 
+    def __request_updates(self, offset, allowed_updates, timeout, long_polling_timeout, prefetch=False):
+        """
+        Requests updates on the polling thread, started on first use. Returns the pending result,
+        or None if polling was stopped.
+
+        :param prefetch: keep the pending result to be processed by the next __retrieve_updates
+
+        :meta private:
+        """
+        pending = util.PendingResult(callback=self.worker_pool.wake_up if self.threaded else None)
+        # stop_polling and stop_bot may be called from other threads meanwhile
+        with self.__polling_lock:
+            if self.__stop_polling.is_set():
+                return None
+            worker = self.__polling_worker
+            if worker is None:
+                worker = self.__polling_worker = util.WorkerThread(name='PollingThread')
+            worker.put(pending.run, self.get_updates, offset=offset, allowed_updates=allowed_updates,
+                       timeout=timeout, long_polling_timeout=long_polling_timeout)
+            if prefetch:
+                self.__prefetched_updates = pending
+        return pending
+
+    def __stop_polling_worker(self):
+        """
+        Drops the pending prefetch and stops the polling thread once its request is sent, so the last
+        batch is still confirmed. Updates of the prefetch are not confirmed yet, Telegram sends them again.
+
+        :meta private:
+        """
+        with self.__polling_lock:
+            self.__prefetched_updates = None
+            worker, self.__polling_worker = self.__polling_worker, None
+        if worker is not None:
+            worker.put(worker.stop)
+
     def process_new_updates(self, updates: List[types.Update]):
         """
         Processes new updates. Just pass list of subclasses of Update to this method.
@@ -939,16 +1028,32 @@ class TeleBot:
         """
         self._notify_command_handlers(self.poll_answer_handlers, new_poll_answers, 'poll_answer')
 
+    def _observe_chat_members(self, chat_members, my_chat_member=False):
+        """
+        Updates the API cache and custom filters (like IsAdminFilter) from chat_member and my_chat_member updates.
+
+        :meta private:
+        """
+        observers = [custom_filter.process_chat_member for custom_filter in self.custom_filters.values()
+                     if hasattr(custom_filter, 'process_chat_member')]
+        for chat_member_updated in chat_members:
+            if self.api_cache is not None:
+                self.api_cache.invalidate_chat_member(chat_member_updated, my_chat_member=my_chat_member)
+            for observer in observers:
+                observer(chat_member_updated)
+
     def process_new_my_chat_member(self, new_my_chat_members):
         """
         :meta private:
         """
+        self._observe_chat_members(new_my_chat_members, my_chat_member=True)
         self._notify_command_handlers(self.my_chat_member_handlers, new_my_chat_members, 'my_chat_member')
 
     def process_new_chat_member(self, new_chat_members):
         """
         :meta private:
         """
+        self._observe_chat_members(new_chat_members)
         self._notify_command_handlers(self.chat_member_handlers, new_chat_members, 'chat_member')
 
     def process_new_chat_join_request(self, new_chat_join_request):
@@ -1126,7 +1231,8 @@ class TeleBot:
     def polling(self, non_stop: Optional[bool]=False, skip_pending: Optional[bool]=False, interval: Optional[int]=0,
                 timeout: Optional[int]=20, long_polling_timeout: Optional[int]=20,
                 logger_level: Optional[int]=logging.ERROR, allowed_updates: Optional[List[str]]=None,
-                none_stop: Optional[bool]=None, restart_on_change: Optional[bool]=False, path_to_watch: Optional[str]=None):
+                none_stop: Optional[bool]=None, restart_on_change: Optional[bool]=False, path_to_watch: Optional[str]=None,
+                pipeline_updates: Optional[bool]=False):
         """
         This function creates a new Thread that calls an internal __retrieve_updates function.
         This allows the bot to retrieve Updates automatically and notify listeners and message handlers accordingly.
@@ -1180,6 +1286,11 @@ class TeleBot:
         :param path_to_watch: Path to watch for changes. Defaults to None
         :type path_to_watch: :obj:`str`
 
+        :param pipeline_updates: Request the next batch of updates while the current one is being processed,
+            instead of after it. Note that the request confirms the current batch on Telegram side, so it won't be
+            received again if processing fails, same as in threaded mode. Defaults to False
+        :type pipeline_updates: :obj:`bool`
+
         :return:
         """
         if none_stop is not None:
@@ -1196,10 +1307,10 @@ class TeleBot:
 
         if self.threaded:
             self.__threaded_polling(non_stop=non_stop, interval=interval, timeout=timeout, long_polling_timeout=long_polling_timeout,
-                                    logger_level=logger_level, allowed_updates=allowed_updates)
+                                    logger_level=logger_level, allowed_updates=allowed_updates, pipeline_updates=pipeline_updates)
         else:
             self.__non_threaded_polling(non_stop=non_stop, interval=interval, timeout=timeout, long_polling_timeout=long_polling_timeout,
-                                        logger_level=logger_level, allowed_updates=allowed_updates)
+                                        logger_level=logger_level, allowed_updates=allowed_updates, pipeline_updates=pipeline_updates)
 
     def _handle_exception(self, exception: Exception) -> bool:
         if self.exception_handler is None:
@@ -1209,7 +1320,7 @@ class TeleBot:
         return handled
 
     def __threaded_polling(self, non_stop = False, interval = 0, timeout = None, long_polling_timeout = None,
-                           logger_level=logging.ERROR, allowed_updates=None):
+                           logger_level=logging.ERROR, allowed_updates=None, pipeline_updates=False):
         if (not logger_level) or (logger_level < logging.INFO):
             warning = "\n  Warning: this message appearance will be changed. Set logger_level=logging.INFO to continue seeing it."
         else:
@@ -1217,21 +1328,22 @@ class TeleBot:
         #if logger_level and logger_level >= logging.INFO:   # enable in future releases. Change output to logger.error
         logger.info('Started polling.' + warning)
         self.__stop_polling.clear()
+        # a prefetch left by previous polling is dropped
+        self.__stop_polling_worker()
         error_interval = 0.25
 
-        polling_thread = util.WorkerThread(name="PollingThread")
-        or_event = util.OrEvent(
-            polling_thread.done_event,
-            polling_thread.exception_event,
-            self.worker_pool.exception_event
-        )
-
+        # Updates are requested by the polling thread and handed to the worker pool by this one. The loop only
+        # waits on the pool's condition, which is notified when the queue has room again, a request is done,
+        # a worker raises an exception or polling is stopped.
         while not self.__stop_polling.wait(interval):
-            or_event.clear()
             try:
-                polling_thread.put(self.__retrieve_updates, timeout, long_polling_timeout, allowed_updates=allowed_updates)
-                or_event.wait()  # wait for polling thread finish, polling thread error or thread pool error
-                polling_thread.raise_exceptions()
+                self.worker_pool.wait_for_capacity(interrupt=self.__stop_polling)
+                self.worker_pool.raise_exceptions()
+                if self.__stop_polling.is_set():
+                    break
+                # handler exceptions are raised while the request is in flight
+                self.__retrieve_updates(timeout, long_polling_timeout, allowed_updates=allowed_updates,
+                                        pipeline_updates=pipeline_updates, wait_for_updates=self.__wait_for_updates)
                 self.worker_pool.raise_exceptions()
                 error_interval = 0.25
             except apihelper.ApiException as e:
@@ -1254,10 +1366,7 @@ class TeleBot:
                         else:
                             error_interval = 60
                 else:
-                    # polling_thread.clear_exceptions()
-                    # self.worker_pool.clear_exceptions()
                     time.sleep(error_interval)
-                polling_thread.clear_exceptions()   #*
                 self.worker_pool.clear_exceptions() #*
             except KeyboardInterrupt:
                 # if logger_level and logger_level >= logging.INFO:   # enable in future releases. Change output to logger.error
@@ -1266,25 +1375,29 @@ class TeleBot:
                 break
             except Exception as e:
                 handled = self._handle_exception(e)
+                self.worker_pool.clear_exceptions() #*
                 if not handled:
-                    polling_thread.stop()
-                    polling_thread.clear_exceptions()   #*
-                    self.worker_pool.clear_exceptions() #*
                     raise e
                 else:
-                    polling_thread.clear_exceptions()
-                    self.worker_pool.clear_exceptions()
                     time.sleep(error_interval)
 
-        polling_thread.stop()
-        polling_thread.clear_exceptions()
         self.worker_pool.clear_exceptions()
+        self.__stop_polling_worker()
         #if logger_level and logger_level >= logging.INFO:   # enable in future releases. Change output to logger.error
         logger.info('Stopped polling.' + warning)
 
 
+    def __wait_for_updates(self, pending):
+        """
+        Waits for updates requested by the polling thread, raises an unhandled exception of a worker meanwhile.
+
+        :meta private:
+        """
+        self.worker_pool.wait_for_result(pending)
+        self.worker_pool.raise_exceptions()
+
     def __non_threaded_polling(self, non_stop=False, interval=0, timeout=None, long_polling_timeout=None,
-                               logger_level=logging.ERROR, allowed_updates=None):
+                               logger_level=logging.ERROR, allowed_updates=None, pipeline_updates=False):
         if (not logger_level) or (logger_level < logging.INFO):
             warning = "\n  Warning: this message appearance will be changed. Set logger_level=logging.INFO to continue seeing it."
         else:
@@ -1292,11 +1405,14 @@ class TeleBot:
         #if logger_level and logger_level >= logging.INFO:   # enable in future releases. Change output to logger.error
         logger.info('Started polling.' + warning)
         self.__stop_polling.clear()
+        # a prefetch left by previous polling is dropped
+        self.__stop_polling_worker()
         error_interval = 0.25
 
         while not self.__stop_polling.wait(interval):
             try:
-                self.__retrieve_updates(timeout, long_polling_timeout, allowed_updates=allowed_updates)
+                self.__retrieve_updates(timeout, long_polling_timeout, allowed_updates=allowed_updates,
+                                        pipeline_updates=pipeline_updates)
                 error_interval = 0.25
             except apihelper.ApiException as e:
                 handled = self._handle_exception(e)
@@ -1327,6 +1443,7 @@ class TeleBot:
                     raise e
                 else:
                     time.sleep(error_interval)
+        self.__stop_polling_worker()
         #if logger_level and logger_level >= logging.INFO:   # enable in future releases. Change output to logger.error
         logger.info('Stopped polling.' + warning)
 
@@ -1350,6 +1467,9 @@ class TeleBot:
         Does not accept any arguments.
         """
         self.__stop_polling.set()
+        if self.threaded:
+            # wake up threaded polling if it waits for the worker pool
+            self.worker_pool.wake_up()
 
 
     def stop_bot(self):
@@ -1357,6 +1477,7 @@ class TeleBot:
         Stops bot by stopping polling and closing the worker pool.
         """
         self.stop_polling()
+        self.__stop_polling_worker()
         if self.threaded and self.worker_pool:
             self.worker_pool.close()
 
@@ -1371,6 +1492,130 @@ class TeleBot:
         self.update_listener.append(listener)
 
 
+    def enable_metrics(self, metrics=None):
+        """
+        Enables collection of runtime metrics: update and handler latencies, worker pool queue wait time and depth,
+        getUpdates batch sizes and Bot API request latencies and status codes.
+        See :mod:`telebot.metrics` for exporting them.
+
+        :param metrics: Metrics registry to use, e.g. shared by several bots. Defaults to a new one.
+        :type metrics: :class:`telebot.metrics.Metrics`
+
+        :return: Metrics registry
+        :rtype: :class:`telebot.metrics.Metrics`
+        """
+        from telebot.metrics import Metrics
+        self.metrics = metrics or Metrics()
+        self.metrics.enable_request_tracing()
+        if self.threaded:
+            self.metrics.worker_pool = self.worker_pool
+            self.worker_pool.metrics = self.metrics
+        return self.metrics
+
+
+    def enable_profiler(self, directory: str, threshold: Optional[float]=1.0, sample_rate: Optional[float]=0.01,
+                        max_reports: Optional[int]=50):
+        """
+        Enables profiling of slow handlers: a sampled fraction of handler calls runs under cProfile, and if such
+        a call takes longer than threshold, its profile, update type and handler name are written to directory.
+        See :mod:`telebot.profiler`.
+
+        :param directory: Directory for profile reports
+        :type directory: :obj:`str`
+
+        :param threshold: Minimum handler duration in seconds to write a report, defaults to 1
+        :type threshold: :obj:`float`
+
+        :param sample_rate: Fraction of handler calls to profile, from 0 to 1, defaults to 0.01
+        :type sample_rate: :obj:`float`
+
+        :param max_reports: Number of newest reports to keep, defaults to 50
+        :type max_reports: :obj:`int`
+
+        :return: Profiler
+        :rtype: :class:`telebot.profiler.HandlerProfiler`
+        """
+        from telebot.profiler import HandlerProfiler
+        self.profiler = HandlerProfiler(directory, threshold=threshold, sample_rate=sample_rate, max_reports=max_reports)
+        return self.profiler
+
+
+    def enable_api_cache(self, ttls: Optional[Dict[str, float]]=None, maxsize: Optional[int]=1024):
+        """
+        Enables caching of get_me, get_chat, get_chat_member, get_chat_administrators and get_file results.
+        Concurrent identical calls share one request, and chat_member and my_chat_member updates drop the results
+        they make stale. Cached objects are shared by all callers and must not be modified.
+        See :mod:`telebot.api_cache`.
+
+        :param ttls: Seconds results of a method are kept by method name, like {'get_chat_member': 10},
+            0 to not cache a method. Defaults to :data:`telebot.api_cache.DEFAULT_TTLS`.
+        :type ttls: :obj:`dict`
+
+        :param maxsize: Maximum number of cached results, defaults to 1024
+        :type maxsize: :obj:`int`
+
+        :return: Cache
+        :rtype: :class:`telebot.api_cache.ApiCache`
+        """
+        from telebot.api_cache import ApiCache
+        self.api_cache = ApiCache(ttls=ttls, maxsize=maxsize)
+        return self.api_cache
+
+
+    def broadcast(self, chat_ids: List[Union[int, str]], method: Optional[str]='send_message',
+                  checkpoint: Optional[str]=None, workers: Optional[int]=8, max_retries: Optional[int]=3,
+                  retry_delay: Optional[float]=1, rate_limiter: Optional[Any]=None,
+                  progress: Optional[Callable]=None, progress_interval: Optional[float]=10, **kwargs):
+        """
+        Sends a message to many chats: calls a sending method with every chat id and kwargs from worker threads,
+        keeping Telegram's rate limits. 429 errors, 5xx responses and network errors are retried. The result for
+        every chat is appended to the checkpoint file, and chats which have results in it are skipped, so an
+        interrupted broadcast may be run again. See :mod:`telebot.broadcast`.
+
+        .. code-block:: python3
+
+            report = bot.broadcast(chat_ids, text='Hello', checkpoint='hello.jsonl')
+
+        :param chat_ids: Chat ids, any iterable
+        :type chat_ids: :obj:`list` of :obj:`int` or :obj:`str`
+
+        :param method: Name of the sending method, like send_message, copy_message or send_photo
+        :type method: :obj:`str`
+
+        :param checkpoint: Path of the checkpoint file (JSON lines), None to not use one
+        :type checkpoint: :obj:`str`
+
+        :param workers: Number of worker threads, defaults to 8
+        :type workers: :obj:`int`
+
+        :param max_retries: Retries of a chat after transient errors, defaults to 3
+        :type max_retries: :obj:`int`
+
+        :param retry_delay: Seconds before the first retry after 5xx and network errors, doubled on every retry
+        :type retry_delay: :obj:`float`
+
+        :param rate_limiter: Rate limiter, defaults to apihelper.RATE_LIMITER or a new one
+        :type rate_limiter: :class:`telebot.rate_limiter.RateLimiter`
+
+        :param progress: Function called with the report every progress_interval seconds and at the end,
+            defaults to logging it
+        :type progress: :obj:`Callable`
+
+        :param progress_interval: Seconds between progress reports, defaults to 10
+        :type progress_interval: :obj:`float`
+
+        :param kwargs: Arguments of the sending method besides chat_id
+
+        :return: Broadcast report
+        :rtype: :class:`telebot.broadcast.BroadcastReport`
+        """
+        from telebot.broadcast import broadcast
+        return broadcast(
+            self, chat_ids, method=method, checkpoint=checkpoint, workers=workers, max_retries=max_retries,
+            retry_delay=retry_delay, rate_limiter=rate_limiter, progress=progress,
+            progress_interval=progress_interval, **kwargs)
+
+
     def get_me(self) -> types.User:
         """
         A simple method for testing your bot's authentication token. Requires no parameters.
@@ -1378,6 +1623,8 @@ class TeleBot:
 
         Telegram documentation: https://core.telegram.org/bots/api#getme
         """
+        if self.api_cache is not None:
+            return self.api_cache.get('get_me', (), lambda: types.User.de_json(apihelper.get_me(self.token)))
         return types.User.de_json(
             apihelper.get_me(self.token)
         )
@@ -1398,6 +1645,9 @@ class TeleBot:
 
         :return: :class:`telebot.types.File`
         """
+        if self.api_cache is not None:
+            return self.api_cache.get(
+                'get_file', (file_id,), lambda: types.File.de_json(apihelper.get_file(self.token, file_id)))
         return types.File.de_json(
             apihelper.get_file(self.token, file_id)
         )
@@ -1429,6 +1679,41 @@ class TeleBot:
         return apihelper.download_file(self.token, file_path)
 
 
+    def download_file_to(self, file_path: str, destination: Union[str, Any], resume: Optional[bool]=False,
+                         chunk_size: Optional[int]=None, progress: Optional[Callable[[int, Optional[int]], Any]]=None) -> int:
+        """
+        Downloads file to a path or a writable binary file object. Unlike download_file, the file is streamed in
+        chunks, so memory use doesn't depend on the file size.
+
+        .. code-block:: python3
+
+            file_info = bot.get_file(message.document.file_id)
+            bot.download_file_to(file_info.file_path, 'document.pdf', resume=True)
+
+        :param file_path: File path on the server, from get_file
+        :type file_path: :obj:`str`
+
+        :param destination: Path or file object to write the file to
+        :type destination: :obj:`str` or file object
+
+        :param resume: If a file exists at the path destination, download only the bytes after its end and append
+            them, e.g. to continue an interrupted download. Defaults to False.
+        :type resume: :obj:`bool`
+
+        :param chunk_size: Size of the chunks read and written in bytes, defaults to apihelper.DOWNLOAD_CHUNK_SIZE
+        :type chunk_size: :obj:`int`
+
+        :param progress: Function called with the number of bytes downloaded and the file size (None if unknown)
+            after every chunk
+        :type progress: :obj:`Callable`
+
+        :return: File size
+        :rtype: :obj:`int`
+        """
+        return apihelper.download_file_to(
+            self.token, file_path, destination, resume=resume, chunk_size=chunk_size, progress=progress)
+
+
     def log_out(self) -> bool:
         """
         Use this method to log out from the cloud Bot API server before launching the bot locally.
@@ -1546,6 +1831,9 @@ class TeleBot:
         :return: Chat information
         :rtype: :class:`telebot.types.ChatFullInfo`
         """
+        if self.api_cache is not None:
+            return self.api_cache.get(
+                'get_chat', (chat_id,), lambda: types.ChatFullInfo.de_json(apihelper.get_chat(self.token, chat_id)))
         return types.ChatFullInfo.de_json(
             apihelper.get_chat(self.token, chat_id)
         )
@@ -1578,6 +1866,10 @@ class TeleBot:
         :return: List made of ChatMember objects.
         :rtype: :obj:`list` of :class:`telebot.types.ChatMember`
         """
+        if self.api_cache is not None:
+            # a copy, the cached list is shared
+            return list(self.api_cache.get('get_chat_administrators', (chat_id,), lambda: [
+                types.ChatMember.de_json(r) for r in apihelper.get_chat_administrators(self.token, chat_id)]))
         result = apihelper.get_chat_administrators(self.token, chat_id)
         return [types.ChatMember.de_json(r) for r in result]
 
@@ -1670,6 +1962,9 @@ class TeleBot:
         :return: Returns ChatMember object on success.
         :rtype: :class:`telebot.types.ChatMember`
         """
+        if self.api_cache is not None:
+            return self.api_cache.get('get_chat_member', (chat_id, user_id), lambda: types.ChatMember.de_json(
+                apihelper.get_chat_member(self.token, chat_id, user_id)))
         return types.ChatMember.de_json(
             apihelper.get_chat_member(self.token, chat_id, user_id)
         )
@@ -8229,6 +8524,8 @@ class TeleBot:
         return {
             'function': handler,
             'pass_bot': pass_bot,
+            # Signature is inspected once here, not on every message
+            'caller': util.compile_handler_call(handler, pass_bot),
             'filters': {ftype: fvalue for ftype, fvalue in filters.items() if fvalue is not None}
             # Remove None values, they are skipped in _test_filter anyway
             #'filters': filters
@@ -10087,6 +10384,34 @@ class TeleBot:
             return False
 
 
+    def _test_handler_filters(self, filters, message):
+        """
+        Test (filter, value) pairs left after the dispatch index lookup
+
+        :param filters: Pairs of filter type and filter value
+        :param message: Message to test
+        :return: True if all filters conform
+        """
+        for message_filter, filter_value in filters:
+            if not self._test_filter(message_filter, filter_value, message):
+                return False
+        return True
+
+
+    def _get_handler_index(self, handlers):
+        """
+        Returns the dispatch index for a handlers list, rebuilding it if handlers were added since.
+
+        :param handlers: handlers list
+        :return: :class:`telebot.util.HandlerIndex`
+        """
+        index = self._handler_indexes.get(id(handlers))
+        if index is None or not index.is_valid_for(handlers):
+            index = util.HandlerIndex(handlers)
+            self._handler_indexes[id(handlers)] = index
+        return index
+
+
     def _check_filter(self, message_filter, filter_value, message):
         filter_check = self.custom_filters.get(message_filter)
         if not filter_check:
@@ -10126,12 +10451,19 @@ class TeleBot:
         """
         if not self.use_class_middlewares:
             if handlers:
-                for handler in handlers:
-                    if self._test_message_handler(handler, message):
-                        if handler.get('pass_bot', False):
-                            result = handler['function'](message, bot=self)
-                        else:
-                            result = handler['function'](message)
+                for handler, filters in self._get_handler_index(handlers).candidates(message):
+                    if self._test_handler_filters(filters, message):
+                        started = time.perf_counter()
+                        kwargs = {'bot': self} if handler.get('pass_bot', False) else {}
+                        try:
+                            if self.profiler is None:
+                                result = handler['function'](message, **kwargs)
+                            else:
+                                result = self.profiler.run(update_type, handler, handler['function'], message, **kwargs)
+                        finally:
+                            # failing handlers are measured too
+                            if self.metrics is not None:
+                                self.metrics.observe_handler(update_type, handler, time.perf_counter() - started)
                         if not isinstance(result, ContinueHandling):
                             break
             return
@@ -10159,34 +10491,22 @@ class TeleBot:
 
         if handlers and not skip_handlers:
             try:
-                for handler in handlers:
-                    params = []
-                    process_handler = self._test_message_handler(handler, message)
+                for handler, filters in self._get_handler_index(handlers).candidates(message):
+                    process_handler = self._test_handler_filters(filters, message)
                     if not process_handler: continue
-                    for i in inspect.signature(handler['function']).parameters:
-                        params.append(i)
-                    if len(params) == 1:
-                        result = handler['function'](message)
-                    elif "data" in params:
-                        if len(params) == 2:
-                            result = handler['function'](message, data)
-                        elif len(params) == 3:
-                            result = handler['function'](message, data=data, bot=self)
+                    started = time.perf_counter()
+                    result = None
+                    try:
+                        if self.profiler is None:
+                            result = handler['caller'](message, data, self)
                         else:
-                            logger.error("It is not allowed to pass data and values inside data to the handler. Check your handler: {}".format(handler['function']))
-                            return
-                    else:
-                        data_copy = data.copy()
-                        for key in list(data_copy):
-                            # remove data from data_copy if handler does not accept it
-                            if key not in params:
-                                del data_copy[key]
-                        if handler.get('pass_bot'):
-                            data_copy["bot"] = self
-                        if len(data_copy) > len(params) - 1: # remove the message parameter
-                            logger.error("You are passing more parameters than the handler needs. Check your handler: {}".format(handler['function']))
-                            return
-                        result = handler["function"](message, **data_copy)
+                            result = self.profiler.run(update_type, handler, handler['caller'], message, data, self)
+                    finally:
+                        # failing handlers are measured too
+                        if self.metrics is not None and result is not util.HANDLER_CALL_REJECTED:
+                            self.metrics.observe_handler(update_type, handler, time.perf_counter() - started)
+                    if result is util.HANDLER_CALL_REJECTED:
+                        return
                     if not isinstance(result, ContinueHandling):
                         break
             except Exception as e:
@@ -10223,10 +10543,22 @@ class TeleBot:
             middlewares = self._get_middlewares(update_type)
         else:
             middlewares = None
+        run_task = self._run_middlewares_and_handler if self.metrics is None else self._run_measured
         for message in new_messages:
             self._exec_task(
-                self._run_middlewares_and_handler,
+                run_task,
                 message,
                 handlers=handlers,
                 middlewares=middlewares,
                 update_type=update_type)
+
+
+    def _run_measured(self, message, handlers, middlewares, update_type):
+        """
+        Runs _run_middlewares_and_handler, recording the update processing time.
+        """
+        started = time.perf_counter()
+        try:
+            self._run_middlewares_and_handler(message, handlers, middlewares, update_type)
+        finally:
+            self.metrics.observe_update(update_type, time.perf_counter() - started)
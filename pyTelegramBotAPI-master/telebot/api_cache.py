@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of read-only Bot API calls for :meth:`telebot.TeleBot.enable_api_cache` and
+:meth:`telebot.async_telebot.AsyncTeleBot.enable_api_cache`.
+
+Results of get_me, get_chat, get_chat_member, get_chat_administrators and get_file are kept for a TTL per method,
+up to maxsize results (least recently used ones are dropped first). Concurrent identical calls share one request:
+while a result is being requested, other threads (or tasks) calling the method with the same arguments wait for it
+instead of sending their own request. Errors are not cached.
+
+chat_member and my_chat_member updates drop the cached results they make stale: the member and the administrators
+of the chat, and for my_chat_member also the chat. Results requested while such an update is processed aren't
+stored. Chats are keyed by the chat_id argument as passed, so updates don't invalidate results requested by
+@username.
+
+Cached objects are shared by all callers and must not be modified.
+
+.. code-block:: python3
+
+    bot.enable_api_cache(ttls={'get_chat_member': 10})
+    member = bot.get_chat_member(chat_id, user_id)
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+#: Method name -> seconds its results are kept. File download links are valid for at least an hour.
+DEFAULT_TTLS = {
+    'get_me': 3600,
+    'get_chat': 60,
+    'get_chat_member': 60,
+    'get_chat_administrators': 60,
+    'get_file': 1800,
+}
+
+_MISSING = object()
+# result of a request whose task was cancelled, waiting tasks request it again
+_CANCELLED = object()
+
+
+class _Flight(object):
+    """
+    Request shared by concurrent identical calls.
+    """
+    __slots__ = ('event', 'value', 'exception')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.exception = None
+
+
+class ApiCache(object):
+    """
+    TTL and LRU bounded cache of Bot API results with request coalescing, safe to use from any number of threads.
+
+    :param ttls: method name -> seconds its results are kept, updating :data:`DEFAULT_TTLS`; 0 or None disables
+        caching of a method
+    :param maxsize: maximum number of cached results
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, Optional[float]]]=None, maxsize: int=1024):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.maxsize = maxsize
+        #: Calls answered from the cache.
+        self.hits = 0
+        #: Calls which sent a request.
+        self.misses = 0
+        #: Calls which waited for a request of another call.
+        self.coalesced = 0
+        # (method name, *args) -> (expiry time.monotonic(), result)
+        self._results: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._async_flights: Dict[Tuple, asyncio.Future] = {}
+        # keys being requested which were invalidated meanwhile, their results aren't stored
+        self._stale: Set[Tuple] = set()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        # must be called with the lock held
+        entry = self._results.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] <= time.monotonic():
+            del self._results[key]
+            return _MISSING
+        self._results.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def _store(self, key, value, ttl):
+        # must be called with the lock held
+        if key in self._stale:
+            return
+        self._results[key] = (time.monotonic() + ttl, value)
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def get(self, method_name: str, args: Tuple, load: Callable[[], Any]) -> Any:
+        """
+        Returns the cached result of a call, or calls `load` and caches its result.
+
+        :param method_name: bot method name, like get_chat
+        :param args: arguments of the call
+        :param load: function requesting the result
+        """
+        ttl = self.ttls.get(method_name)
+        if not ttl:
+            return load()
+        key = (method_name,) + args
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.event.wait()
+            if flight.exception is not None:
+                raise flight.exception
+            return flight.value
+        try:
+            flight.value = load()
+        except BaseException as e:
+            flight.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.exception is None:
+                    self._store(key, flight.value, ttl)
+                self._stale.discard(key)
+            flight.event.set()
+        return flight.value
+
+    async def get_async(self, method_name: str, args: Tuple, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached result of a call, or awaits `load()` and caches its result.
+
+        :param method_name: bot method name, like get_chat
+        :param args: arguments of the call
+        :param load: coroutine function requesting the result
+        """
+        ttl = self.ttls.get(method_name)
+        if not ttl:
+            return await load()
+        key = (method_name,) + args
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    return value
+                future = self._async_flights.get(key)
+                leader = future is None
+                if leader:
+                    future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+            if leader:
+                break
+            # a waiting task being cancelled doesn't cancel the request
+            value = await asyncio.shield(future)
+            if value is not _CANCELLED:
+                return value
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            # only this task is cancelled, one of the waiting ones sends the request again
+            future.set_result(_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # waiting tasks get the exception, the future needn't log it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:
+                self._store(key, value, ttl)
+        finally:
+            with self._lock:
+                del self._async_flights[key]
+                self._stale.discard(key)
+        return value
+
+    def _mark_stale(self, prefix):
+        # must be called with the lock held
+        for flights in (self._flights, self._async_flights):
+            self._stale.update(key for key in flights if key[:len(prefix)] == prefix)
+
+    def update(self, method_name: str, args: Tuple, function: Callable[[Any], Any]):
+        """
+        Replaces a cached result with function(result), keeping its expiry. Results being requested meanwhile
+        aren't stored, they may predate the change.
+
+        :param method_name: method name
+        :param args: arguments of the call
+        :param function: function returning the new result, which must not modify the old one
+        """
+        key = (method_name,) + args
+        with self._lock:
+            self._mark_stale(key)
+            entry = self._results.get(key)
+            if entry is not None:
+                self._results[key] = (entry[0], function(entry[1]))
+
+    def invalidate(self, method_name: Optional[str]=None, *args):
+        """
+        Drops cached results of a method whose arguments start with `args`, or all results if method_name is None.
+        """
+        with self._lock:
+            if method_name is None:
+                self._mark_stale(())
+                self._results.clear()
+                return
+            prefix = (method_name,) + args
+            self._mark_stale(prefix)
+            for key in [key for key in self._results if key[:len(prefix)] == prefix]:
+                del self._results[key]
+
+    def invalidate_chat_member(self, chat_member_updated, my_chat_member: bool=False):
+        """
+        Drops the results made stale by a chat_member or my_chat_member update.
+
+        :param chat_member_updated: update
+        :type chat_member_updated: :class:`telebot.types.ChatMemberUpdated`
+
+        :param my_chat_member: the update is a my_chat_member update
+        """
+        chat_id = chat_member_updated.chat.id
+        self.invalidate('get_chat_member', chat_id, chat_member_updated.new_chat_member.user.id)
+        self.invalidate('get_chat_administrators', chat_id)
+        if my_chat_member:
+            self.invalidate('get_chat', chat_id)
+
+    def __len__(self):
+        return len(self._results)
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
+import logging
+import threading
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 
 try:
@@ -21,6 +25,10 @@ except ImportError:
 import telebot
 from telebot import types
 from telebot import util
+from telebot import tracing
+from telebot import service_utils
+from telebot import http_pool
+from telebot import multipart
 
 logger = telebot.logger
 
@@ -33,10 +41,22 @@ FILE_URL = None
 CONNECT_TIMEOUT = 15
 READ_TIMEOUT = 30
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # In bytes. Streaming downloads read and write files in chunks of this size
+STREAMING_UPLOADS = True  # Send files read in chunks (telebot.multipart) instead of building the request body in memory
+
 LONG_POLLING_TIMEOUT = 10 # Should be positive, short polling should be used for testing purposes only (https://core.telegram.org/bots/api#getupdates)
 
 SESSION_TIME_TO_LIVE = 600  # In seconds. None - live forever, 0 - one-time
 
+# Session shared by all threads instead of one per thread: None - session per thread, 'requests' - shared requests
+# session, 'httpx' - shared HTTP/2 httpx client (requires httpx). See telebot.http_pool.
+SESSION_POOL = None
+POOL_CONNECTIONS = 10  # Number of hosts to keep connections to
+POOL_MAXSIZE = 32  # Connections kept per host
+POOL_BLOCK = False  # Wait for a free connection instead of opening more than POOL_MAXSIZE
+CONNECTION_TIME_TO_LIVE = 600  # In seconds. Pooled connections are reopened one by one at this age, None - never
+KEEPALIVE_EXPIRY = 60  # In seconds. Pooled connections idle longer are reopened, None - never
+
 RETRY_ON_ERROR = False
 RETRY_TIMEOUT = 2
 MAX_RETRIES = 15
@@ -44,11 +64,64 @@ RETRY_ENGINE = 1
 
 CUSTOM_SERIALIZER = None
 CUSTOM_REQUEST_SENDER = None
+JSON_DECODER = None  # Function parsing response bodies (bytes). None - service_utils.decode_json (orjson, msgspec, json)
+RATE_LIMITER = None  # telebot.rate_limiter.RateLimiter throttling sending methods before requests are made
 
 ENABLE_MIDDLEWARE = False
 
+_shared_session = None
+_shared_session_settings = None
+_shared_session_lock = threading.Lock()
+
+_upload_progress = ContextVar('upload_progress', default=None)
+
+
+@contextmanager
+def upload_progress(callback):
+    """
+    Calls `callback` with the number of bytes sent and the request body length (None if unknown) while files are
+    uploaded by requests made in the with block (requires STREAMING_UPLOADS).
+
+    .. code-block:: python3
+
+        with apihelper.upload_progress(lambda sent, total: print(sent, total)):
+            bot.send_video(chat_id, video)
+
+    :param callback: function called after every chunk sent
+    """
+    token = _upload_progress.set(callback)
+    try:
+        yield
+    finally:
+        _upload_progress.reset(token)
+
+
+def _get_shared_session(reset=False):
+    global _shared_session, _shared_session_settings
+    settings = (SESSION_POOL, POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK, CONNECTION_TIME_TO_LIVE, KEEPALIVE_EXPIRY,
+                session, str(proxy))
+    if reset or settings != _shared_session_settings:
+        with _shared_session_lock:
+            if reset or settings != _shared_session_settings:
+                if session:
+                    _shared_session = session
+                elif SESSION_POOL == 'httpx':
+                    _shared_session = http_pool.HttpxSession(
+                        pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK, keepalive=KEEPALIVE_EXPIRY,
+                        proxy=(proxy.get('https') or proxy.get('http')) if isinstance(proxy, dict) else proxy)
+                else:
+                    _shared_session = http_pool.requests_session(
+                        pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK,
+                        connection_ttl=CONNECTION_TIME_TO_LIVE, keepalive=KEEPALIVE_EXPIRY)
+                _shared_session_settings = settings
+    return _shared_session
+
 
 def _get_req_session(reset=False):
+    if SESSION_POOL:
+        # connections are recycled by the pool, SESSION_TIME_TO_LIVE doesn't apply
+        return _get_shared_session(reset)
+
     if SESSION_TIME_TO_LIVE:
         # If session TTL is set - check time passed
         creation_date = util.per_thread('req_session_time', lambda: datetime.now(), reset)
@@ -85,7 +158,8 @@ def _make_request(token, method_name, method='get', params=None, files=None):
     else:
         request_url = "https://api.telegram.org/bot{0}/{1}".format(token, method_name)
 
-    logger.debug("Request: method={0} url={1} params={2} files={3}".format(method, request_url, params, files).replace(token, token.split(':')[0] + ":{TOKEN}"))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Request: method={0} url={1} params={2} files={3}".format(method, request_url, params, files).replace(token, token.split(':')[0] + ":{TOKEN}"))
     read_timeout = READ_TIMEOUT
     connect_timeout = CONNECT_TIMEOUT
 
@@ -113,59 +187,90 @@ def _make_request(token, method_name, method='get', params=None, files=None):
             read_timeout = max(long_polling_timeout + 5, read_timeout)
 
     params = params or None # Set params to None if empty
+    body = {'files': files}
+    if files and STREAMING_UPLOADS and not CUSTOM_REQUEST_SENDER:
+        encoder = multipart.MultipartEncoder(files, progress=_upload_progress.get())
+        body = {'data': encoder, 'headers': {'Content-Type': encoder.content_type}}
+    chat_id = params.get('chat_id') if params else None
+    if RATE_LIMITER is not None:
+        RATE_LIMITER.acquire(method_name, chat_id)
     result = None
+    current_try = 0
+    trace = tracing.start_request(method_name, method, params, files)
 
-    if CUSTOM_REQUEST_SENDER:
-        # noinspection PyCallingNonCallable
-        result = CUSTOM_REQUEST_SENDER(
-            method, request_url, params=params, files=files,
-            timeout=(connect_timeout, read_timeout), proxies=proxy)
-    elif RETRY_ON_ERROR and RETRY_ENGINE == 1:
-        got_result = False
-        current_try = 0
-        while not got_result and current_try<MAX_RETRIES-1:
-            current_try+=1
-            try:
+    try:
+        if CUSTOM_REQUEST_SENDER:
+            # noinspection PyCallingNonCallable
+            result = CUSTOM_REQUEST_SENDER(
+                method, request_url, params=params, files=files,
+                timeout=(connect_timeout, read_timeout), proxies=proxy)
+        elif RETRY_ON_ERROR and RETRY_ENGINE == 1:
+            got_result = False
+            while not got_result and current_try<MAX_RETRIES-1:
+                current_try+=1
+                if 'data' in body:
+                    # a failed attempt may have sent a part of the body
+                    body['data'].seek(0)
+                try:
+                    result = _get_req_session().request(
+                        method, request_url, params=params, **body,
+                        timeout=(connect_timeout, read_timeout), proxies=proxy)
+                    got_result = True
+                except HTTPError:
+                    logger.debug("HTTP Error on %s method (Try #%s)", method_name, current_try)
+                    time.sleep(RETRY_TIMEOUT)
+                except ConnectionError:
+                    logger.debug("Connection Error on %s method (Try #%s)", method_name, current_try)
+                    time.sleep(RETRY_TIMEOUT)
+                except Timeout:
+                    logger.debug("Timeout Error on %s method (Try #%s)", method_name, current_try)
+                    time.sleep(RETRY_TIMEOUT)
+            if not got_result:
+                current_try += 1
+                if 'data' in body:
+                    body['data'].seek(0)
                 result = _get_req_session().request(
-                    method, request_url, params=params, files=files,
-                    timeout=(connect_timeout, read_timeout), proxies=proxy)
-                got_result = True
-            except HTTPError:
-                logger.debug("HTTP Error on {0} method (Try #{1})".format(method_name, current_try))
-                time.sleep(RETRY_TIMEOUT)
-            except ConnectionError:
-                logger.debug("Connection Error on {0} method (Try #{1})".format(method_name, current_try))
-                time.sleep(RETRY_TIMEOUT)
-            except Timeout:
-                logger.debug("Timeout Error on {0} method (Try #{1})".format(method_name, current_try))
-                time.sleep(RETRY_TIMEOUT)
-        if not got_result:
+                        method, request_url, params=params, **body,
+                        timeout=(connect_timeout, read_timeout), proxies=proxy)
+        elif RETRY_ON_ERROR and RETRY_ENGINE == 2:
+            http = _get_req_session()
+            # noinspection PyUnresolvedReferences
+            retry_strategy = requests.packages.urllib3.util.retry.Retry(
+                total=MAX_RETRIES,
+                allowed_methods=None,
+                backoff_factor=RETRY_TIMEOUT,
+                backoff_max=RETRY_TIMEOUT
+            )
+            if SESSION_POOL:
+                # keep the shared connection pool
+                for adapter in http.adapters.values():
+                    adapter.max_retries = retry_strategy
+            else:
+                adapter = HTTPAdapter(max_retries=retry_strategy)
+                for prefix in ('http://', 'https://'):
+                    http.mount(prefix, adapter)
+            result = http.request(
+                method, request_url, params=params, **body,
+                timeout=(connect_timeout, read_timeout), proxies=proxy)
+        else:
             result = _get_req_session().request(
-                    method, request_url, params=params, files=files,
-                    timeout=(connect_timeout, read_timeout), proxies=proxy)
-    elif RETRY_ON_ERROR and RETRY_ENGINE == 2:
-        http = _get_req_session()
-        # noinspection PyUnresolvedReferences
-        retry_strategy = requests.packages.urllib3.util.retry.Retry(
-            total=MAX_RETRIES,
-            allowed_methods=None,
-            backoff_factor=RETRY_TIMEOUT,
-            backoff_max=RETRY_TIMEOUT
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        for prefix in ('http://', 'https://'):
-            http.mount(prefix, adapter)
-        result = http.request(
-            method, request_url, params=params, files=files,
-            timeout=(connect_timeout, read_timeout), proxies=proxy)
-    else:
-        result = _get_req_session().request(
-            method, request_url, params=params, files=files,
-            timeout=(connect_timeout, read_timeout), proxies=proxy)
-    
-    logger.debug("The server returned: '{0}'".format(result.text.encode('utf8')))
-    
-    json_result = _check_result(method_name, result)
+                method, request_url, params=params, **body,
+                timeout=(connect_timeout, read_timeout), proxies=proxy)
+    except Exception as e:
+        tracing.finish_request(trace, retries=max(current_try - 1, 0), exception=e)
+        raise
+
+    if trace is not None:
+        tracing.finish_request(trace, status=result.status_code, retries=max(current_try - 1, 0))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("The server returned: '{0}'".format(result.text.encode('utf8')))
+
+    try:
+        json_result = _check_result(method_name, result)
+    except ApiTelegramException as e:
+        if RATE_LIMITER is not None:
+            RATE_LIMITER.handle_error(e, chat_id)
+        raise
     if json_result:
         return json_result['result']
     else:
@@ -186,7 +291,12 @@ def _check_result(method_name, result):
     :return: The result parsed to a JSON dictionary.
     """
     try:
-        result_json = result.json()
+        content = getattr(result, 'content', None)
+        if isinstance(content, bytes):
+            # parse the raw body without decoding it to str first
+            result_json = (JSON_DECODER or service_utils.decode_json)(content)
+        else:
+            result_json = result.json()
     except:
         if result.status_code != 200:
             raise ApiHTTPException(method_name, result)
@@ -241,6 +351,69 @@ def download_file(token, file_path):
     return result.content
 
 
+def _file_url(token, file_path):
+    if FILE_URL is None:
+        return "https://api.telegram.org/file/bot{0}/{1}".format(token, file_path)
+    # noinspection PyUnresolvedReferences
+    return FILE_URL.format(token, file_path)
+
+
+def download_file_chunks(token, file_path, offset=0, chunk_size=None, progress=None):
+    """
+    Streams a file: yields its bytes from `offset` in chunks of up to chunk_size bytes (DOWNLOAD_CHUNK_SIZE by
+    default), requested with a Range header if offset > 0.
+
+    :param progress: function called with the number of bytes downloaded (including offset) and the file size
+        (None if unknown) after every chunk
+    """
+    headers = {'Range': 'bytes={0}-'.format(offset)} if offset else None
+    result = _get_req_session().get(
+        _file_url(token, file_path), proxies=proxy, headers=headers, stream=True,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    try:
+        if result.status_code not in (200, 206, 416):
+            raise ApiHTTPException('Download file', result)
+        try:
+            skip, size = service_utils.download_range(result.status_code, result.headers, offset)
+        except ValueError:
+            raise ApiHTTPException('Download file', result)
+        if result.status_code == 416:
+            return
+        downloaded = offset
+        for chunk in result.iter_content(chunk_size or DOWNLOAD_CHUNK_SIZE):
+            if skip:
+                # the server sent the whole file
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            yield chunk
+            downloaded += len(chunk)
+            if progress:
+                progress(downloaded, size)
+    finally:
+        result.close()
+
+
+def download_file_to(token, file_path, destination, resume=False, chunk_size=None, progress=None):
+    """
+    Streams a file to a path or a writable binary file object, with constant memory use.
+
+    :param resume: if a file exists at the path destination, download only the bytes after its end and append them
+    :return: file size
+    """
+    destination, offset, opened = service_utils.open_download_destination(destination, resume)
+    try:
+        for chunk in download_file_chunks(token, file_path, offset=offset, chunk_size=chunk_size, progress=progress):
+            destination.write(chunk)
+            offset += len(chunk)
+    finally:
+        if opened:
+            destination.close()
+    return offset
+
+
 def send_message(
         token, chat_id, text,
          reply_markup=None,
@@ -2593,13 +2766,7 @@ def copy_messages(token, chat_id, from_chat_id, message_ids, disable_notificatio
 
 
 def _convert_list_json_serializable(results):
-    ret = ''
-    for r in results:
-        if isinstance(r, types.JsonSerializable):
-            ret = ret + r.to_json() + ','
-    if len(ret) > 0:
-        ret = ret[:-1]
-    return '[' + ret + ']'
+    return service_utils.encode_json_list(results)
 
 
 def _convert_markup(markup):
@@ -2631,7 +2798,7 @@ def convert_input_media_array(array):
                     files[thumbnail_key] = thumbnail    
                     media_dict['thumbnail'] = 'attach://' + thumbnail_key   
             media.append(media_dict)
-    return json.dumps(media), files
+    return service_utils.encode_json(media), files
 
 
 def _no_encode(func):
@@ -3,8 +3,9 @@ from datetime import datetime
 
 import logging
 import re
+import time
 import traceback
-from typing import Any, Awaitable, Callable, List, Optional, Union, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Union, Dict
 import sys
 
 # this imports are used to avoid circular import error
@@ -17,7 +18,7 @@ import telebot.types
 from telebot.asyncio_storage import StateMemoryStorage, StatePickleStorage, StateStorageBase
 from telebot.asyncio_handler_backends import BaseMiddleware, CancelUpdate, SkipHandler, State, ContinueHandling
 
-from inspect import signature, iscoroutinefunction
+from inspect import iscoroutinefunction
 
 from telebot import util, types, asyncio_helper
 import asyncio
@@ -189,6 +190,10 @@ class AsyncTeleBot:
         self.custom_filters = {}
         self.state_handlers = []
         self.middlewares = []
+        self._handler_indexes = {}
+        self.metrics = None
+        self.profiler = None
+        self.api_cache = None
 
         self._user = None # set during polling
 
@@ -239,7 +244,8 @@ class AsyncTeleBot:
         :rtype: :obj:`list` of :class:`telebot.types.Update`
         """
         json_updates = await asyncio_helper.get_updates(self.token, offset, limit, timeout, allowed_updates, request_timeout)
-        return [types.Update.de_json(ju) for ju in json_updates]
+        with types.fresh_json(), types.interning():
+            return [types.Update.de_json(ju) for ju in json_updates]
 
     def _setup_change_detector(self, path_to_watch: str) -> None:
         try:
@@ -450,6 +456,8 @@ class AsyncTeleBot:
             while self._polling:
                 try:
                     updates = await self.get_updates(offset=self.offset, allowed_updates=allowed_updates, timeout=timeout, request_timeout=request_timeout)
+                    if self.metrics is not None:
+                        self.metrics.observe_batch_size(len(updates))
                     if updates:
                         self.offset = updates[-1].update_id + 1
                         # noinspection PyAsyncCall
@@ -519,10 +527,21 @@ class AsyncTeleBot:
         """
         tasks = []
         middlewares = await self._get_middlewares(update_type)
+        run_task = self._run_middlewares_and_handlers if self.metrics is None else self._run_measured
         for message in messages:
-            tasks.append(self._run_middlewares_and_handlers(message, handlers, middlewares, update_type))
+            tasks.append(run_task(message, handlers, middlewares, update_type))
         await asyncio.gather(*tasks)
 
+    async def _run_measured(self, message, handlers, middlewares, update_type):
+        """
+        Runs _run_middlewares_and_handlers, recording the update processing time.
+        """
+        started = time.perf_counter()
+        try:
+            await self._run_middlewares_and_handlers(message, handlers, middlewares, update_type)
+        finally:
+            self.metrics.observe_update(update_type, time.perf_counter() - started)
+
     async def _run_middlewares_and_handlers(self, message, handlers, middlewares, update_type):
         """
         This method is made to run handlers and middlewares in queue.
@@ -555,34 +574,22 @@ class AsyncTeleBot:
 
         if handlers and not(skip_handlers):
             try:
-                for handler in handlers:
-                    params = []
-                    process_update = await self._test_message_handler(handler, message)
+                for handler, filters in self._get_handler_index(handlers).candidates(message):
+                    process_update = await self._test_handler_filters(filters, message)
                     if not process_update: continue
-                    for i in signature(handler['function']).parameters:
-                        params.append(i)
-                    if len(params) == 1:
-                        result = await handler['function'](message)
-                    elif "data" in params:
-                        if len(params) == 2:
-                            result = await handler['function'](message, data)
-                        elif len(params) == 3:
-                            result = await handler['function'](message, data=data, bot=self)
+                    started = time.perf_counter()
+                    result = handler['caller'](message, data, self)
+                    if result is util.HANDLER_CALL_REJECTED:
+                        return
+                    try:
+                        if self.profiler is None:
+                            result = await result
                         else:
-                            logger.error("It is not allowed to pass data and values inside data to the handler. Check your handler: {}".format(handler['function']))
-                            return
-                    else:
-                        data_copy = data.copy()
-                        for key in list(data_copy):
-                            # remove data from data_copy if handler does not accept it
-                            if key not in params:
-                                del data_copy[key]
-                        if handler.get('pass_bot'):
-                            data_copy["bot"] = self
-                        if len(data_copy) > len(params) - 1: # remove the message parameter
-                            logger.error("You are passing more data than the handler needs. Check your handler: {}".format(handler['function']))
-                            return
-                        result = await handler["function"](message, **data_copy)
+                            result = await self.profiler.run_async(update_type, handler, result)
+                    finally:
+                        # failing handlers are measured too
+                        if self.metrics is not None:
+                            self.metrics.observe_handler(update_type, handler, time.perf_counter() - started)
                     if not isinstance(result, ContinueHandling):
                         break
             except Exception as e:
@@ -838,16 +845,32 @@ class AsyncTeleBot:
         """
         await self._process_updates(self.poll_answer_handlers, poll_answers, 'poll_answer')
 
+    def _observe_chat_members(self, chat_members, my_chat_member=False):
+        """
+        Updates the API cache and custom filters (like IsAdminFilter) from chat_member and my_chat_member updates.
+
+        :meta private:
+        """
+        observers = [custom_filter.process_chat_member for custom_filter in self.custom_filters.values()
+                     if hasattr(custom_filter, 'process_chat_member')]
+        for chat_member_updated in chat_members:
+            if self.api_cache is not None:
+                self.api_cache.invalidate_chat_member(chat_member_updated, my_chat_member=my_chat_member)
+            for observer in observers:
+                observer(chat_member_updated)
+
     async def process_new_my_chat_member(self, my_chat_members):
         """
         :meta private:
         """
+        self._observe_chat_members(my_chat_members, my_chat_member=True)
         await self._process_updates(self.my_chat_member_handlers, my_chat_members, 'my_chat_member')
 
     async def process_new_chat_member(self, chat_members):
         """
         :meta private:
         """
+        self._observe_chat_members(chat_members)
         await self._process_updates(self.chat_member_handlers, chat_members, 'chat_member')
 
     async def process_chat_join_request(self, chat_join_request):
@@ -930,6 +953,32 @@ class AsyncTeleBot:
 
         return True
 
+    async def _test_handler_filters(self, filters, message):
+        """
+        Test (filter, value) pairs left after the dispatch index lookup.
+
+        :param filters: Pairs of filter type and filter value
+        :param message: Message to test
+        :return: True if all filters conform
+        """
+        for message_filter, filter_value in filters:
+            if not await self._test_filter(message_filter, filter_value, message):
+                return False
+        return True
+
+    def _get_handler_index(self, handlers):
+        """
+        Returns the dispatch index for a handlers list, rebuilding it if handlers were added since.
+
+        :param handlers: handlers list
+        :return: :class:`telebot.util.HandlerIndex`
+        """
+        index = self._handler_indexes.get(id(handlers))
+        if index is None or not index.is_valid_for(handlers):
+            index = util.HandlerIndex(handlers)
+            self._handler_indexes[id(handlers)] = index
+        return index
+
     def set_update_listener(self, func: Awaitable):
         """
         Update listener is a function that gets any update.
@@ -950,6 +999,135 @@ class AsyncTeleBot:
         """
         self.update_listener.append(func)
 
+    def enable_metrics(self, metrics=None):
+        """
+        Enables collection of runtime metrics: update and handler latencies, getUpdates batch sizes
+        and Bot API request latencies and status codes.
+        See :mod:`telebot.metrics` for exporting them.
+
+        :param metrics: Metrics registry to use, e.g. shared by several bots. Defaults to a new one.
+        :type metrics: :class:`telebot.metrics.Metrics`
+
+        :return: Metrics registry
+        :rtype: :class:`telebot.metrics.Metrics`
+        """
+        from telebot.metrics import Metrics
+        self.metrics = metrics or Metrics()
+        self.metrics.enable_request_tracing()
+        return self.metrics
+
+    def enable_profiler(self, directory: str, threshold: Optional[float]=1.0, sample_rate: Optional[float]=0.01,
+                        max_reports: Optional[int]=50):
+        """
+        Enables profiling of slow handlers: for a sampled fraction of handler calls the event loop thread stack
+        is sampled, and if such a call takes longer than threshold, the samples, update type and handler name
+        are written to directory. See :mod:`telebot.profiler`.
+
+        :param directory: Directory for profile reports
+        :type directory: :obj:`str`
+
+        :param threshold: Minimum handler duration in seconds to write a report, defaults to 1
+        :type threshold: :obj:`float`
+
+        :param sample_rate: Fraction of handler calls to profile, from 0 to 1, defaults to 0.01
+        :type sample_rate: :obj:`float`
+
+        :param max_reports: Number of newest reports to keep, defaults to 50
+        :type max_reports: :obj:`int`
+
+        :return: Profiler
+        :rtype: :class:`telebot.profiler.HandlerProfiler`
+        """
+        from telebot.profiler import HandlerProfiler
+        self.profiler = HandlerProfiler(directory, threshold=threshold, sample_rate=sample_rate, max_reports=max_reports)
+        return self.profiler
+
+    def enable_api_cache(self, ttls: Optional[Dict[str, float]]=None, maxsize: Optional[int]=1024):
+        """
+        Enables caching of get_me, get_chat, get_chat_member, get_chat_administrators and get_file results.
+        Concurrent identical calls share one request, and chat_member and my_chat_member updates drop the results
+        they make stale. Cached objects are shared by all callers and must not be modified.
+        See :mod:`telebot.api_cache`.
+
+        :param ttls: Seconds results of a method are kept by method name, like {'get_chat_member': 10},
+            0 to not cache a method. Defaults to :data:`telebot.api_cache.DEFAULT_TTLS`.
+        :type ttls: :obj:`dict`
+
+        :param maxsize: Maximum number of cached results, defaults to 1024
+        :type maxsize: :obj:`int`
+
+        :return: Cache
+        :rtype: :class:`telebot.api_cache.ApiCache`
+        """
+        from telebot.api_cache import ApiCache
+        self.api_cache = ApiCache(ttls=ttls, maxsize=maxsize)
+        return self.api_cache
+
+    @staticmethod
+    async def _load(cls, request, many=False):
+        """
+        Awaits a request for :attr:`api_cache` and deserializes its result.
+
+        :meta private:
+        """
+        result = await request
+        if many:
+            return [cls.de_json(r) for r in result]
+        return cls.de_json(result)
+
+    async def broadcast(self, chat_ids: List[Union[int, str]], method: Optional[str]='send_message',
+                        checkpoint: Optional[str]=None, workers: Optional[int]=8, max_retries: Optional[int]=3,
+                        retry_delay: Optional[float]=1, rate_limiter: Optional[Any]=None,
+                        progress: Optional[Callable]=None, progress_interval: Optional[float]=10, **kwargs):
+        """
+        Sends a message to many chats: calls a sending method with every chat id and kwargs from concurrent tasks,
+        keeping Telegram's rate limits. 429 errors, 5xx responses and network errors are retried. The result for
+        every chat is appended to the checkpoint file, and chats which have results in it are skipped, so an
+        interrupted broadcast may be run again. See :mod:`telebot.broadcast`.
+
+        .. code-block:: python3
+
+            report = await bot.broadcast(chat_ids, text='Hello', checkpoint='hello.jsonl')
+
+        :param chat_ids: Chat ids, any iterable
+        :type chat_ids: :obj:`list` of :obj:`int` or :obj:`str`
+
+        :param method: Name of the sending method, like send_message, copy_message or send_photo
+        :type method: :obj:`str`
+
+        :param checkpoint: Path of the checkpoint file (JSON lines), None to not use one
+        :type checkpoint: :obj:`str`
+
+        :param workers: Number of concurrent tasks, defaults to 8
+        :type workers: :obj:`int`
+
+        :param max_retries: Retries of a chat after transient errors, defaults to 3
+        :type max_retries: :obj:`int`
+
+        :param retry_delay: Seconds before the first retry after 5xx and network errors, doubled on every retry
+        :type retry_delay: :obj:`float`
+
+        :param rate_limiter: Rate limiter, defaults to asyncio_helper.RATE_LIMITER or a new one
+        :type rate_limiter: :class:`telebot.rate_limiter.RateLimiter`
+
+        :param progress: Function called with the report every progress_interval seconds and at the end,
+            defaults to logging it
+        :type progress: :obj:`Callable`
+
+        :param progress_interval: Seconds between progress reports, defaults to 10
+        :type progress_interval: :obj:`float`
+
+        :param kwargs: Arguments of the sending method besides chat_id
+
+        :return: Broadcast report
+        :rtype: :class:`telebot.broadcast.BroadcastReport`
+        """
+        from telebot.broadcast import broadcast_async
+        return await broadcast_async(
+            self, chat_ids, method=method, checkpoint=checkpoint, workers=workers, max_retries=max_retries,
+            retry_delay=retry_delay, rate_limiter=rate_limiter, progress=progress,
+            progress_interval=progress_interval, **kwargs)
+
     def add_custom_filter(self, custom_filter: Union[asyncio_filters.SimpleCustomFilter, asyncio_filters.AdvancedCustomFilter]):
         """
         Create custom filter.
@@ -2656,6 +2834,8 @@ class AsyncTeleBot:
         return {
             'function': handler,
             'pass_bot': pass_bot,
+            # Signature is inspected once here, not on every message
+            'caller': util.compile_handler_call(handler, pass_bot),
             'filters': {ftype: fvalue for ftype, fvalue in filters.items() if fvalue is not None}
             # Remove None values, they are skipped in _test_filter anyway
             #'filters': filters
@@ -2677,6 +2857,9 @@ class AsyncTeleBot:
 
         Telegram documentation: https://core.telegram.org/bots/api#getme
         """
+        if self.api_cache is not None:
+            return await self.api_cache.get_async(
+                'get_me', (), lambda: self._load(types.User, asyncio_helper.get_me(self.token)))
         result = await asyncio_helper.get_me(self.token)
         return types.User.de_json(result)
 
@@ -2695,6 +2878,9 @@ class AsyncTeleBot:
 
         :return: :class:`telebot.types.File`
         """
+        if self.api_cache is not None:
+            return await self.api_cache.get_async(
+                'get_file', (file_id,), lambda: self._load(types.File, asyncio_helper.get_file(self.token, file_id)))
         return types.File.de_json(await asyncio_helper.get_file(self.token, file_id))
 
     async def get_file_url(self, file_id: Optional[str]) -> str:
@@ -2721,6 +2907,71 @@ class AsyncTeleBot:
         """
         return await asyncio_helper.download_file(self.token, file_path)
 
+    async def download_file_to(self, file_path: str, destination: Union[str, Any], resume: Optional[bool]=False,
+                               chunk_size: Optional[int]=None,
+                               progress: Optional[Callable[[int, Optional[int]], Any]]=None) -> int:
+        """
+        Downloads file to a path or a writable binary file object. Unlike download_file, the file is streamed in
+        chunks, so memory use doesn't depend on the file size. The file is written in threads of the default
+        executor, so disk I/O doesn't block the event loop.
+
+        .. code-block:: python3
+
+            file_info = await bot.get_file(message.document.file_id)
+            await bot.download_file_to(file_info.file_path, 'document.pdf', resume=True)
+
+        :param file_path: File path on the server, from get_file
+        :type file_path: :obj:`str`
+
+        :param destination: Path or file object to write the file to
+        :type destination: :obj:`str` or file object
+
+        :param resume: If a file exists at the path destination, download only the bytes after its end and append
+            them, e.g. to continue an interrupted download. Defaults to False.
+        :type resume: :obj:`bool`
+
+        :param chunk_size: Size of the chunks read and written in bytes, defaults to asyncio_helper.DOWNLOAD_CHUNK_SIZE
+        :type chunk_size: :obj:`int`
+
+        :param progress: Function called with the number of bytes downloaded and the file size (None if unknown)
+            after every chunk
+        :type progress: :obj:`Callable`
+
+        :return: File size
+        :rtype: :obj:`int`
+        """
+        return await asyncio_helper.download_file_to(
+            self.token, file_path, destination, resume=resume, chunk_size=chunk_size, progress=progress)
+
+    def download_file_chunks(self, file_path: str, offset: Optional[int]=0, chunk_size: Optional[int]=None,
+                             progress: Optional[Callable[[int, Optional[int]], Any]]=None) -> AsyncIterator[bytes]:
+        """
+        Streams file: returns an async iterator of its bytes from offset, in chunks of up to chunk_size bytes.
+
+        .. code-block:: python3
+
+            async for chunk in bot.download_file_chunks(file_info.file_path):
+                await upload(chunk)
+
+        :param file_path: File path on the server, from get_file
+        :type file_path: :obj:`str`
+
+        :param offset: First byte to download, requested with a Range header. Defaults to 0.
+        :type offset: :obj:`int`
+
+        :param chunk_size: Maximum size of the chunks in bytes, defaults to asyncio_helper.DOWNLOAD_CHUNK_SIZE
+        :type chunk_size: :obj:`int`
+
+        :param progress: Function called with the number of bytes downloaded (including offset) and the file size
+            (None if unknown) after every chunk
+        :type progress: :obj:`Callable`
+
+        :return: Async iterator of chunks
+        :rtype: :obj:`AsyncIterator` of :obj:`bytes`
+        """
+        return asyncio_helper.download_file_chunks(
+            self.token, file_path, offset=offset, chunk_size=chunk_size, progress=progress)
+
     async def log_out(self) -> bool:
         """
         Use this method to log out from the cloud Bot API server before launching the bot locally.
@@ -3022,6 +3273,9 @@ class AsyncTeleBot:
         :return: Chat information
         :rtype: :class:`telebot.types.ChatFullInfo`
         """
+        if self.api_cache is not None:
+            return await self.api_cache.get_async('get_chat', (chat_id,), lambda: self._load(
+                types.ChatFullInfo, asyncio_helper.get_chat(self.token, chat_id)))
         result = await asyncio_helper.get_chat(self.token, chat_id)
         return types.ChatFullInfo.de_json(result)
 
@@ -3052,6 +3306,10 @@ class AsyncTeleBot:
         :return: List made of ChatMember objects.
         :rtype: :obj:`list` of :class:`telebot.types.ChatMember`
         """
+        if self.api_cache is not None:
+            # a copy, the cached list is shared
+            return list(await self.api_cache.get_async('get_chat_administrators', (chat_id,), lambda: self._load(
+                types.ChatMember, asyncio_helper.get_chat_administrators(self.token, chat_id), many=True)))
         result = await asyncio_helper.get_chat_administrators(self.token, chat_id)
         return [types.ChatMember.de_json(r) for r in result]
 
@@ -3194,6 +3452,9 @@ class AsyncTeleBot:
         :return: Returns ChatMember object on success.
         :rtype: :class:`telebot.types.ChatMember`
         """
+        if self.api_cache is not None:
+            return await self.api_cache.get_async('get_chat_member', (chat_id, user_id), lambda: self._load(
+                types.ChatMember, asyncio_helper.get_chat_member(self.token, chat_id, user_id)))
         result = await asyncio_helper.get_chat_member(self.token, chat_id, user_id)
         return types.ChatMember.de_json(result)
 
@@ -1,4 +1,4 @@
-import asyncio # for future uses
+import asyncio
 import ssl
 import aiohttp
 import certifi
@@ -14,6 +14,8 @@ API_URL = 'https://api.telegram.org/bot{0}/{1}'
 from datetime import datetime
 
 from telebot import util
+from telebot import tracing
+from telebot import service_utils
 import logging
 
 logger = logging.getLogger('TeleBot')
@@ -26,8 +28,13 @@ FILE_URL = None
 REQUEST_TIMEOUT = 300
 MAX_RETRIES = 3
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # In bytes. Streaming downloads read and write files in chunks of this size
+
 REQUEST_LIMIT = 50
 
+JSON_DECODER = None  # Function parsing response bodies (bytes). None - service_utils.decode_json (orjson, msgspec, json)
+RATE_LIMITER = None  # telebot.rate_limiter.RateLimiter throttling sending methods before requests are made
+
 class SessionManager:
     def __init__(self) -> None:
         self.session = None
@@ -76,7 +83,10 @@ async def _process_request(token, url, method='get', params=None, files=None, **
         # otherwise, we will use timeout parameter applied for payload.
     
     request_timeout = REQUEST_TIMEOUT if request_timeout is None else request_timeout
-    
+    chat_id = params.get('chat_id') if params else None
+    if RATE_LIMITER is not None:
+        await RATE_LIMITER.acquire_async(url, chat_id)
+    trace = tracing.start_request(url, method, params, files, is_async=True)
 
     # Preparing data by adding all parameters and files to FormData
     params = _prepare_data(params, files)
@@ -90,19 +100,26 @@ async def _process_request(token, url, method='get', params=None, files=None, **
         try:
             async with session.request(method=method, url=API_URL.format(token, url), data=params, timeout=timeout, proxy=proxy) as resp:
                 got_result = True
-                logger.debug("Request: method={0} url={1} params={2} files={3} request_timeout={4} current_try={5}".format(method, url, params, files, request_timeout, current_try).replace(token, token.split(':')[0] + ":{TOKEN}"))
+                if trace is not None:
+                    tracing.finish_request(trace, status=resp.status, retries=current_try - 1)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Request: method={0} url={1} params={2} files={3} request_timeout={4} current_try={5}".format(method, url, params, files, request_timeout, current_try).replace(token, token.split(':')[0] + ":{TOKEN}"))
                 
                 json_result = await _check_result(url, resp)
                 if json_result:
                     return json_result['result']
         except (ApiTelegramException,ApiInvalidJSONException, ApiHTTPException) as e:
+            if RATE_LIMITER is not None:
+                RATE_LIMITER.handle_error(e, chat_id)
             raise e
         except aiohttp.ClientError as e:
             logger.error('Aiohttp ClientError: {0}'.format(e.__class__.__name__))
         except Exception as e:
             logger.error(f'Unknown error: {e.__class__.__name__}')
         if not got_result:
-            raise RequestTimeout("Request timeout. Request: method={0} url={1} params={2} files={3} request_timeout={4}".format(method, url, params, files, request_timeout, current_try))
+            timeout_error = RequestTimeout("Request timeout. Request: method={0} url={1} params={2} files={3} request_timeout={4}".format(method, url, params, files, request_timeout, current_try))
+            tracing.finish_request(trace, retries=current_try - 1, exception=timeout_error)
+            raise timeout_error
         
 def _prepare_file(obj):
     """
@@ -194,6 +211,71 @@ async def download_file(token, file_path):
     return result
 
 
+def _file_url(token, file_path):
+    if FILE_URL is None:
+        return "https://api.telegram.org/file/bot{0}/{1}".format(token, file_path)
+    # noinspection PyUnresolvedReferences
+    return FILE_URL.format(token, file_path)
+
+
+async def download_file_chunks(token, file_path, offset=0, chunk_size=None, progress=None):
+    """
+    Streams a file: yields its bytes from `offset` in chunks of up to chunk_size bytes (DOWNLOAD_CHUNK_SIZE by
+    default), requested with a Range header if offset > 0.
+
+    :param progress: function called with the number of bytes downloaded (including offset) and the file size
+        (None if unknown) after every chunk
+    """
+    headers = {'Range': 'bytes={0}-'.format(offset)} if offset else None
+    # no limit for the whole download, only for reading each chunk
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=REQUEST_TIMEOUT)
+    session = await session_manager.get_session()
+    async with session.get(_file_url(token, file_path), proxy=proxy, headers=headers, timeout=timeout) as response:
+        if response.status not in (200, 206, 416):
+            raise ApiHTTPException('Download file', response)
+        try:
+            skip, size = service_utils.download_range(response.status, response.headers, offset)
+        except ValueError:
+            raise ApiHTTPException('Download file', response)
+        if response.status == 416:
+            return
+        downloaded = offset
+        async for chunk in response.content.iter_chunked(chunk_size or DOWNLOAD_CHUNK_SIZE):
+            if skip:
+                # the server sent the whole file
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            yield chunk
+            downloaded += len(chunk)
+            if progress:
+                progress(downloaded, size)
+
+
+async def download_file_to(token, file_path, destination, resume=False, chunk_size=None, progress=None):
+    """
+    Streams a file to a path or a writable binary file object, with constant memory use.
+
+    The file is opened, written and closed in a thread of the default executor, so disk I/O doesn't block the
+    event loop.
+
+    :param resume: if a file exists at the path destination, download only the bytes after its end and append them
+    :return: file size
+    """
+    destination, offset, opened = await asyncio.to_thread(service_utils.open_download_destination, destination, resume)
+    try:
+        async for chunk in download_file_chunks(
+                token, file_path, offset=offset, chunk_size=chunk_size, progress=progress):
+            await asyncio.to_thread(destination.write, chunk)
+            offset += len(chunk)
+    finally:
+        if opened:
+            await asyncio.to_thread(destination.close)
+    return offset
+
+
 async def set_webhook(token, url=None, certificate=None, max_connections=None, allowed_updates=None, ip_address=None,
                 drop_pending_updates = None, timeout=None, secret_token=None):
     method_url = r'setWebhook'
@@ -265,7 +347,8 @@ async def _check_result(method_name, result: aiohttp.ClientResponse):
     :return: The result parsed to a JSON dictionary.
     """
     try:
-        result_json = await result.json(encoding="utf-8")
+        # parse the raw body without decoding it to str first
+        result_json = (JSON_DECODER or service_utils.decode_json)(await result.read())
     except:
         if result.status != 200:
             raise ApiHTTPException(method_name, result)
@@ -2562,13 +2645,7 @@ async def copy_messages(token, chat_id, from_chat_id, message_ids, disable_notif
 
 
 async def _convert_list_json_serializable(results):
-    ret = ''
-    for r in results:
-        if isinstance(r, types.JsonSerializable):
-            ret = ret + r.to_json() + ','
-    if len(ret) > 0:
-        ret = ret[:-1]
-    return '[' + ret + ']'
+    return service_utils.encode_json_list(results)
 
 
 async def convert_input_media(media):
@@ -2593,7 +2670,7 @@ async def convert_input_media_array(array):
                     files[thumbnail_key] = thumbnail    
                     media_dict['thumbnail'] = 'attach://' + thumbnail_key     
             media.append(media_dict)
-    return json.dumps(media), files
+    return service_utils.encode_json(media), files
 
 
 async def _no_encode(func):
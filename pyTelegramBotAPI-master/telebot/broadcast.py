@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+Broadcasting a message to many chats with :meth:`telebot.TeleBot.broadcast` and
+:meth:`telebot.async_telebot.AsyncTeleBot.broadcast`.
+
+A broadcast calls a sending method of the bot (send_message, copy_message, send_photo, ...) for every chat id with
+bounded concurrency, keeping Telegram's rate limits with :class:`telebot.rate_limiter.RateLimiter`. Failures are
+classified: 429 errors, 5xx responses and network errors are retried, chats which blocked the bot or don't exist
+are not.
+
+The result for every chat is appended to a checkpoint file (JSON lines) as soon as it is known. A broadcast with the
+same checkpoint file skips the chats recorded in it, except those which failed with a transient error, so an
+interrupted broadcast continues where it stopped.
+
+.. code-block:: python3
+
+    report = bot.broadcast(chat_ids, 'copy_message', checkpoint='announcement.jsonl',
+                           from_chat_id=channel_id, message_id=announcement_id)
+    print(report)
+
+Media should be sent by file_id or URL: a file object is consumed by the first upload.
+"""
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+import requests
+
+from telebot import apihelper
+from telebot.rate_limiter import RateLimiter
+
+logger = logging.getLogger('TeleBot')
+
+#: Results of a chat.
+OK = 'ok'
+BLOCKED = 'blocked'
+CHAT_NOT_FOUND = 'chat_not_found'
+BAD_REQUEST = 'bad_request'
+FLOOD = 'flood'
+SERVER_ERROR = 'server_error'
+NETWORK_ERROR = 'network_error'
+ERROR = 'error'
+
+#: Failures worth retrying. Chats which failed with them aren't skipped when a broadcast is resumed.
+TRANSIENT = frozenset((FLOOD, SERVER_ERROR, NETWORK_ERROR))
+
+#: Exceptions of failed connections, classified as :data:`NETWORK_ERROR`. requests exceptions are OSErrors, but
+#: only these are transient.
+NETWORK_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                      requests.exceptions.ChunkedEncodingError, asyncio.TimeoutError)
+
+
+def classify(exception: Exception) -> str:
+    """
+    Returns the result of a chat for an exception raised by a sending method.
+    """
+    error_code = getattr(exception, 'error_code', None)
+    if error_code is not None:
+        description = str(getattr(exception, 'description', '')).lower()
+        if error_code == 429:
+            return FLOOD
+        if error_code >= 500:
+            return SERVER_ERROR
+        if error_code == 403:
+            return BLOCKED
+        if 'chat not found' in description or 'user not found' in description or 'peer_id_invalid' in description:
+            return CHAT_NOT_FOUND
+        return BAD_REQUEST
+    asyncio_helper = sys.modules.get('telebot.asyncio_helper')
+    if isinstance(exception, apihelper.ApiException) or \
+            asyncio_helper is not None and isinstance(exception, asyncio_helper.ApiException):
+        # HTTP errors and invalid JSON, like proxy error pages
+        return SERVER_ERROR
+    if isinstance(exception, NETWORK_EXCEPTIONS):
+        return NETWORK_ERROR
+    aiohttp = sys.modules.get('aiohttp')
+    if asyncio_helper is not None and isinstance(exception, asyncio_helper.RequestTimeout) or \
+            aiohttp is not None and isinstance(exception, aiohttp.ClientConnectionError):
+        return NETWORK_ERROR
+    # other errors, like invalid URLs or local I/O errors, won't go away when retried
+    return ERROR
+
+
+def _api_method_name(method: str) -> str:
+    # send_message -> sendMessage, for the rate limiter
+    first, *rest = method.split('_')
+    return first + ''.join(word.capitalize() for word in rest)
+
+
+class BroadcastReport(object):
+    """
+    Progress and results of a broadcast.
+
+    :param skipped: number of chats skipped because the checkpoint file has their results
+    """
+
+    def __init__(self, skipped: int=0):
+        #: Chats per result (see :data:`OK` and the other results).
+        self.results = Counter()
+        self.skipped = skipped
+        #: Retried sends.
+        self.retries = 0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def done(self) -> int:
+        """
+        Number of chats processed by this run.
+        """
+        return sum(self.results.values())
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """
+        Chats per second.
+        """
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return 'Broadcast {}: {} chats in {:.1f}s ({:.1f}/s), {} skipped, {} retries, results: {}'.format(
+            'finished' if self.finished else 'running', self.done, self.elapsed, self.throughput, self.skipped,
+            self.retries, ', '.join('{} {}'.format(result, count) for result, count in self.results.most_common()))
+
+
+class Checkpoint(object):
+    """
+    Append-only JSON lines file with the results of a broadcast, one line per chat:
+    ``{"chat_id": 1, "result": "ok", "message_id": 7}``, ``"error"`` for failures.
+
+    :param path: file path, created if it doesn't exist
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self) -> Set[str]:
+        """
+        Returns the chat ids (as str) with final results in the file.
+        """
+        done = set()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue # line cut off by a crash
+                    if record.get('result') in TRANSIENT:
+                        done.discard(str(record.get('chat_id')))
+                    else:
+                        done.add(str(record.get('chat_id')))
+        except FileNotFoundError:
+            pass
+        return done
+
+    def write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class _Broadcast(object):
+    """
+    State shared by the workers of a broadcast.
+    """
+
+    def __init__(self, chat_ids, method, kwargs, checkpoint, max_retries, retry_delay, rate_limiter, progress,
+                 progress_interval):
+        self.checkpoint = Checkpoint(checkpoint) if checkpoint else None
+        done = self.checkpoint.load() if self.checkpoint else set()
+        self.report = BroadcastReport()
+        self.chat_ids = self._pending(chat_ids, done)
+        self.method = method
+        self.api_method = _api_method_name(method)
+        self.kwargs = kwargs
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = rate_limiter
+        self.progress = progress or (lambda report: logger.info(str(report)))
+        self.progress_interval = progress_interval
+        self.reported = time.monotonic()
+        self.lock = threading.Lock()
+        #: First exception which stopped a worker, like a failed checkpoint write. Raised when the workers are done.
+        self.error: Optional[BaseException] = None
+
+    def _pending(self, chat_ids, done):
+        for chat_id in chat_ids:
+            if str(chat_id) in done:
+                self.report.skipped += 1
+            else:
+                yield chat_id
+
+    def next_chat_id(self):
+        with self.lock:
+            if self.error is not None:
+                return None
+            return next(self.chat_ids, None)
+
+    def fail(self, exception: BaseException):
+        """
+        Stops the broadcast: no more chat ids are handed out, and `exception` is raised when the workers are done.
+        """
+        with self.lock:
+            if self.error is None:
+                self.error = exception
+
+    def retry(self, chat_id, attempt, exception, result) -> Optional[float]:
+        """
+        Returns seconds to wait before retrying, None if the chat failed.
+        """
+        if result not in TRANSIENT or attempt >= self.max_retries:
+            return None
+        with self.lock:
+            self.report.retries += 1
+        if result == FLOOD:
+            self.rate_limiter.handle_error(exception, chat_id)
+            return 0 # the rate limiter waits for the chat
+        return self.retry_delay * 2 ** attempt
+
+    def record(self, chat_id, result, response=None, exception=None):
+        record = {'chat_id': chat_id, 'result': result}
+        if result == OK:
+            message_id = getattr(response, 'message_id', None)
+            if message_id is not None:
+                record['message_id'] = message_id
+        else:
+            record['error'] = str(exception)
+        if self.checkpoint:
+            self.checkpoint.write(record)
+        with self.lock:
+            self.report.results[result] += 1
+            now = time.monotonic()
+            report = now - self.reported >= self.progress_interval
+            if report:
+                self.reported = now
+        if report:
+            self._progress()
+
+    def _progress(self):
+        # a failing callback mustn't stop the workers
+        try:
+            self.progress(self.report)
+        except Exception:
+            logger.exception('Broadcast progress callback failed')
+
+    def finish(self):
+        if self.checkpoint:
+            self.checkpoint.close()
+        self.report.finished = time.monotonic()
+        self._progress()
+        if self.error is not None:
+            raise self.error
+        return self.report
+
+
+def _limiter(rate_limiter, helper_limiter):
+    # requests are throttled by the helper already if it has a rate limiter
+    return rate_limiter or helper_limiter or RateLimiter()
+
+
+def broadcast(bot, chat_ids: Iterable, method: str='send_message', checkpoint: Optional[str]=None,
+              workers: int=8, max_retries: int=3, retry_delay: float=1, rate_limiter: Optional[RateLimiter]=None,
+              progress: Optional[Callable[[BroadcastReport], Any]]=None, progress_interval: float=10,
+              **kwargs) -> BroadcastReport:
+    """
+    Sends a message to every chat with worker threads, see :meth:`telebot.TeleBot.broadcast`. An exception which
+    stops a worker, like a failed checkpoint write, stops the broadcast and is raised when all workers are done.
+    """
+    state = _Broadcast(chat_ids, method, kwargs, checkpoint, max_retries, retry_delay,
+                       _limiter(rate_limiter, apihelper.RATE_LIMITER), progress, progress_interval)
+    own_limiter = state.rate_limiter is not apihelper.RATE_LIMITER
+    send = getattr(bot, method)
+
+    def send_all():
+        while True:
+            chat_id = state.next_chat_id()
+            if chat_id is None:
+                return
+            attempt = 0
+            while True:
+                if own_limiter:
+                    state.rate_limiter.acquire(state.api_method, chat_id)
+                try:
+                    response = send(chat_id, **kwargs)
+                except Exception as e:
+                    result = classify(e)
+                    delay = state.retry(chat_id, attempt, e, result)
+                    if delay is None:
+                        state.record(chat_id, result, exception=e)
+                        break
+                    attempt += 1
+                    time.sleep(delay)
+                else:
+                    state.record(chat_id, OK, response)
+                    break
+
+    def worker():
+        try:
+            send_all()
+        except BaseException as e:
+            state.fail(e)
+
+    threads = [threading.Thread(target=worker, name='Broadcast{}'.format(i), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return state.finish()
+
+
+async def broadcast_async(bot, chat_ids: Iterable, method: str='send_message', checkpoint: Optional[str]=None,
+                          workers: int=8, max_retries: int=3, retry_delay: float=1,
+                          rate_limiter: Optional[RateLimiter]=None,
+                          progress: Optional[Callable[[BroadcastReport], Any]]=None, progress_interval: float=10,
+                          **kwargs) -> BroadcastReport:
+    """
+    Sends a message to every chat with concurrent tasks, see :meth:`telebot.async_telebot.AsyncTeleBot.broadcast`.
+    An exception which stops a task, like a failed checkpoint write, stops the broadcast and is raised when all
+    tasks are done.
+    """
+    from telebot import asyncio_helper
+    state = _Broadcast(chat_ids, method, kwargs, checkpoint, max_retries, retry_delay,
+                       _limiter(rate_limiter, asyncio_helper.RATE_LIMITER), progress, progress_interval)
+    own_limiter = state.rate_limiter is not asyncio_helper.RATE_LIMITER
+    send = getattr(bot, method)
+
+    async def send_all():
+        while True:
+            chat_id = state.next_chat_id()
+            if chat_id is None:
+                return
+            attempt = 0
+            while True:
+                if own_limiter:
+                    await state.rate_limiter.acquire_async(state.api_method, chat_id)
+                try:
+                    response = await send(chat_id, **kwargs)
+                except Exception as e:
+                    result = classify(e)
+                    delay = state.retry(chat_id, attempt, e, result)
+                    if delay is None:
+                        state.record(chat_id, result, exception=e)
+                        break
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                else:
+                    state.record(chat_id, OK, response)
+                    break
+
+    async def worker():
+        try:
+            await send_all()
+        except BaseException as e:
+            state.fail(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return state.finish()
@@ -1,8 +1,9 @@
 from abc import ABC
-from typing import Optional, Union
+from typing import FrozenSet, Optional, Union
 from telebot.handler_backends import State
 
 from telebot import types
+from telebot.api_cache import ApiCache
 
 from telebot.states import resolve_context
 
@@ -362,25 +363,70 @@ class IsAdminFilter(SimpleCustomFilter):
     """
     Check whether the user is administrator / owner of the chat.
 
+    The administrators of a chat are requested with get_chat_administrators when the chat is checked first and
+    then every ttl seconds, so checks don't send requests. chat_member updates (which have to be enabled in
+    allowed_updates) keep them up to date in between. The administrators of at most maxsize chats are kept, the
+    least recently checked ones are dropped first. Private chats are checked with get_chat_member.
+
+    get_chat_administrators doesn't list bots, so messages of bots which are administrators don't pass the filter.
+
     .. code-block:: python3
         :caption: Example on using this filter:
 
         @bot.message_handler(chat_types=['supergroup'], is_chat_admin=True)
         # your function
+
+    :param bot: Bot
+    :param ttl: Seconds after which the administrators of a chat are requested again
+    :param maxsize: Maximum number of chats to keep the administrators of
     """
 
     key = 'is_chat_admin'
 
-    def __init__(self, bot):
+    def __init__(self, bot, ttl: float=600, maxsize: int=1024):
         self._bot = bot
+        self._cache = ApiCache(ttls={'administrators': ttl}, maxsize=maxsize)
 
     def check(self, message):
         """
         :meta private:
         """
-        if isinstance(message, types.CallbackQuery):
-            return self._bot.get_chat_member(message.message.chat.id, message.from_user.id).status in ['creator', 'administrator']
-        return self._bot.get_chat_member(message.chat.id, message.from_user.id).status in ['creator', 'administrator']
+        chat = message.message.chat if isinstance(message, types.CallbackQuery) else message.chat
+        if chat.type == 'private':
+            return self._bot.get_chat_member(chat.id, message.from_user.id).status in ['creator', 'administrator']
+        return message.from_user.id in self.administrators(chat.id)
+
+    def administrators(self, chat_id: int) -> FrozenSet[int]:
+        """
+        Returns the user ids of the administrators of a chat, requesting them if they are unknown or expired.
+        """
+        def load():
+            return frozenset(member.user.id for member in self._bot.get_chat_administrators(chat_id)
+                             if member.status in ('creator', 'administrator'))
+
+        # threads checking the same chat wait for one request
+        return self._cache.get('administrators', (chat_id,), load)
+
+    def process_chat_member(self, chat_member_updated: types.ChatMemberUpdated):
+        """
+        Updates the administrators of a chat from a chat_member or my_chat_member update.
+        Called by the bot for every such update.
+        """
+        member = chat_member_updated.new_chat_member
+        if member.status in ('creator', 'administrator'):
+            update = lambda admins: admins | {member.user.id}
+        else:
+            update = lambda admins: admins - {member.user.id}
+        self._cache.update('administrators', (chat_member_updated.chat.id,), update)
+
+    def invalidate(self, chat_id: Optional[int]=None):
+        """
+        Drops the administrators of a chat, or of all chats if chat_id is None, so they are requested again.
+        """
+        if chat_id is None:
+            self._cache.invalidate()
+        else:
+            self._cache.invalidate('administrators', chat_id)
 
 
 class StateFilter(AdvancedCustomFilter):
@@ -17,7 +17,7 @@ except ImportError:
 import asyncio
 
 
-from telebot.types import Update
+from telebot.types import Update, fresh_json, interning
 
 
 from typing import Optional
@@ -98,7 +98,9 @@ class AsyncWebhookListener:
             return JSONResponse(status_code=403, content={"error": "Forbidden"})
         if request.headers.get('content-type') == 'application/json':
             json_string = update
-            asyncio.create_task(self._bot.process_new_updates([Update.de_json(json_string)]))
+            with fresh_json(), interning():
+                update = Update.de_json(json_string)
+            asyncio.create_task(self._bot.process_new_updates([update]))
             return JSONResponse('', status_code=200)
 
         return JSONResponse(status_code=403, content={"error": "Forbidden"})
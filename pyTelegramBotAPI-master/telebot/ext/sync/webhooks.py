@@ -14,7 +14,7 @@ try:
 except ImportError:
     fastapi_installed = False
 
-from telebot.types import Update
+from telebot.types import Update, fresh_json, interning
 
 from typing import Optional
 
@@ -94,7 +94,9 @@ class SyncWebhookListener:
             # secret token didn't match
             return JSONResponse(status_code=403, content={"error": "Forbidden"})
         if request.headers.get('content-type') == 'application/json':
-            self._bot.process_new_updates([Update.de_json(update)])
+            with fresh_json(), interning():
+                update = Update.de_json(update)
+            self._bot.process_new_updates([update])
             return JSONResponse('', status_code=200)
 
         return JSONResponse(status_code=403, content={"error": "Forbidden"})
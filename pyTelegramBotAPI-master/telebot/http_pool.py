@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Connection pools shared by all threads for :mod:`telebot.apihelper`.
+
+By default apihelper keeps a requests session, and so a connection pool, per thread and replaces it every
+SESSION_TIME_TO_LIVE seconds. With ``apihelper.SESSION_POOL = 'requests'`` all threads share one session with
+POOL_MAXSIZE connections per host. Its connections are closed one at a time when they reach
+CONNECTION_TIME_TO_LIVE (with some jitter) or were idle longer than KEEPALIVE_EXPIRY, so there is no moment at
+which all of them reconnect.
+
+``apihelper.SESSION_POOL = 'httpx'`` uses an :class:`httpx.Client` speaking HTTP/2 instead, which multiplexes
+concurrent requests over one connection (``pip install pyTelegramBotAPI[httpx]``). httpx doesn't limit
+connection age, so CONNECTION_TIME_TO_LIVE doesn't apply to it, and RETRY_ENGINE 2 isn't supported.
+
+.. code-block:: python3
+
+    from telebot import apihelper
+
+    apihelper.SESSION_POOL = 'requests'
+    apihelper.POOL_MAXSIZE = 32
+"""
+import random
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    # noinspection PyPackageRequirements
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class _RecyclingPool(object):
+    """
+    Connection pool mixin closing connections which are too old or were idle too long before they are reused.
+    A closed connection reconnects on its next request.
+    """
+    connection_ttl: Optional[float] = None
+    keepalive: Optional[float] = None
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        now = time.monotonic()
+        expires = getattr(conn, '_telebot_expires', None)
+        last_used = getattr(conn, '_telebot_last_used', None)
+        if (expires is not None and now >= expires) or \
+                (self.keepalive is not None and last_used is not None and now - last_used > self.keepalive):
+            conn.close()
+            expires = None
+        if expires is None and self.connection_ttl:
+            # connections opened together, like at startup, expire at different times
+            conn._telebot_expires = now + self.connection_ttl * random.uniform(0.75, 1)
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._telebot_last_used = time.monotonic()
+        super()._put_conn(conn)
+
+
+class RecyclingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter recycling pooled connections by age and idle time.
+
+    :param connection_ttl: seconds after which a connection is closed and reopened, None - never
+    :param keepalive: seconds a connection may be idle before it is reopened, None - forever
+    :param kwargs: HTTPAdapter arguments: pool_connections, pool_maxsize, pool_block, max_retries
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ['connection_ttl', 'keepalive']
+
+    def __init__(self, connection_ttl: Optional[float]=None, keepalive: Optional[float]=None, **kwargs):
+        self.connection_ttl = connection_ttl
+        self.keepalive = keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self._recycle(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        created = proxy not in self.proxy_manager
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if created and not proxy.lower().startswith('socks'):
+            self._recycle(manager)
+        return manager
+
+    def _recycle(self, manager):
+        settings = {'connection_ttl': self.connection_ttl, 'keepalive': self.keepalive}
+        manager.pool_classes_by_scheme = {
+            'http': type('RecyclingHTTPConnectionPool', (_RecyclingPool, HTTPConnectionPool), settings),
+            'https': type('RecyclingHTTPSConnectionPool', (_RecyclingPool, HTTPSConnectionPool), settings),
+        }
+
+
+def requests_session(pool_connections: int=10, pool_maxsize: int=10, pool_block: bool=False,
+                     connection_ttl: Optional[float]=None, keepalive: Optional[float]=None) -> requests.Session:
+    """
+    Returns a requests session with a :class:`RecyclingHTTPAdapter`, which may be shared by threads.
+
+    :param pool_connections: number of hosts to keep connection pools for
+    :param pool_maxsize: connections kept per host
+    :param pool_block: wait for a free connection instead of opening more than pool_maxsize per host
+    :param connection_ttl: seconds after which a connection is closed and reopened, None - never
+    :param keepalive: seconds a connection may be idle before it is reopened, None - forever
+    """
+    session = requests.Session()
+    adapter = RecyclingHTTPAdapter(
+        connection_ttl=connection_ttl, keepalive=keepalive, pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize, pool_block=pool_block)
+    for prefix in ('http://', 'https://'):
+        session.mount(prefix, adapter)
+    return session
+
+
+class HttpxResponse(object):
+    """
+    requests.Response-like view of an httpx.Response, as far as apihelper uses it.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+
+    @property
+    def content(self):
+        return self.response.read()
+
+    @property
+    def text(self):
+        self.response.read()
+        return self.response.text
+
+    def json(self):
+        return self.response.json()
+
+    def iter_content(self, chunk_size=None):
+        with _requests_errors():
+            yield from self.response.iter_bytes(chunk_size)
+
+    def close(self):
+        self.response.close()
+
+
+@contextmanager
+def _requests_errors():
+    """
+    Raises httpx errors as the requests exceptions apihelper handles.
+    """
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e))
+    except httpx.TransportError as e:
+        raise requests.exceptions.ConnectionError(str(e))
+
+
+class HttpxSession(object):
+    """
+    requests.Session-like wrapper of an HTTP/2 httpx.Client, as far as apihelper uses it. Errors are raised as
+    the requests exceptions apihelper handles.
+
+    :param pool_maxsize: connections kept alive
+    :param pool_block: wait for a free connection instead of opening more than pool_maxsize
+    :param keepalive: seconds a connection may be idle before it is closed, None - forever
+    :param proxy: proxy URL
+    :param http2: use HTTP/2
+    """
+    # apihelper mounts retry strategies on adapters, httpx has none
+    adapters = {}
+
+    def __init__(self, pool_maxsize: int=10, pool_block: bool=False, keepalive: Optional[float]=None,
+                 proxy: Optional[str]=None, http2: bool=True):
+        if httpx is None:
+            raise ImportError('httpx is required for the httpx session pool: pip install pyTelegramBotAPI[httpx]')
+        limits = httpx.Limits(
+            max_connections=pool_maxsize if pool_block else None, max_keepalive_connections=pool_maxsize,
+            keepalive_expiry=keepalive)
+        self.client = httpx.Client(http2=http2, limits=limits, proxy=proxy)
+
+    def request(self, method, url, params=None, files=None, timeout=None, proxies=None, headers=None, stream=False,
+                data=None):
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        if params:
+            # encode values like requests does, e.g. True as "True"
+            params = {key: value if isinstance(value, (str, bytes)) else str(value)
+                      for key, value in params.items() if value is not None}
+        if getattr(data, 'len', None) is not None:
+            # a streaming multipart body, sent with Content-Length instead of in chunks
+            headers = dict(headers or {}, **{'Content-Length': str(data.len)})
+        with _requests_errors():
+            request = self.client.build_request(
+                method, url, params=params, files=files, content=data, headers=headers, timeout=timeout)
+            return HttpxResponse(self.client.send(request, stream=stream))
+
+    def get(self, url, **kwargs):
+        return self.request('get', url, **kwargs)
+
+    def close(self):
+        self.client.close()
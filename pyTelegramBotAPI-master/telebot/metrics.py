@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Optional runtime metrics for :class:`telebot.TeleBot` and :class:`telebot.async_telebot.AsyncTeleBot`,
+exported in Prometheus text format.
+
+Recorded metrics:
+
+* update processing latency per update type and handler latency per handler
+* time updates wait in the worker pool queue, queue depth and worker threads (threaded TeleBot only)
+* getUpdates batch sizes
+* Bot API request latency, responses by status code (including 429 Too Many Requests) and errors per method
+
+.. code-block:: python3
+
+    bot = TeleBot(token)
+    metrics = bot.enable_metrics()
+    metrics.start_http_server(9100)  # or metrics.render() / metrics.start_callback_export(callback)
+
+Bot API metrics are collected with :mod:`telebot.tracing` hooks, so they include requests of all bots
+in the process.
+"""
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, Sequence, Tuple
+
+from telebot import tracing
+
+logger = logging.getLogger('TeleBot')
+
+#: Default latency buckets, in seconds.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+#: Default getUpdates batch size buckets.
+BATCH_SIZE_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds.
+
+    :meta private:
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+class Metrics:
+    """
+    Metrics registry of a bot. Created by :meth:`telebot.TeleBot.enable_metrics` or
+    :meth:`telebot.async_telebot.AsyncTeleBot.enable_metrics`.
+
+    :param namespace: prefix of metric names
+    :param latency_buckets: histogram buckets for latencies, in seconds
+    """
+
+    def __init__(self, namespace: str='telebot', latency_buckets: Sequence[float]=LATENCY_BUCKETS):
+        self.namespace = namespace
+        self.latency_buckets = tuple(latency_buckets)
+        self.lock = threading.Lock()
+        # name -> (type, help, label names, {label values: Histogram or number})
+        self.families: Dict[str, Tuple[str, str, Tuple[str, ...], dict]] = {}
+        self.worker_pool = None
+        self._tracing_enabled = False
+        self._http_server = None
+
+        self._update_latency = self._family('update_duration_seconds', 'histogram',
+                                            'Time to process an update, by update type', ('update_type',))
+        self._handler_latency = self._family('handler_duration_seconds', 'histogram',
+                                             'Time spent in a handler', ('update_type', 'handler'))
+        self._queue_wait = self._family('queue_wait_seconds', 'histogram',
+                                        'Time tasks wait in the worker pool queue', ())
+        self._batch_size = self._family('get_updates_batch_size', 'histogram',
+                                        'Number of updates returned by getUpdates', ())
+        self._api_latency = self._family('api_request_duration_seconds', 'histogram',
+                                         'Bot API request latency, including retries', ('method',))
+        self._api_responses = self._family('api_responses_total', 'counter',
+                                           'Bot API responses by HTTP status', ('method', 'status'))
+        self._api_rate_limited = self._family('api_rate_limited_total', 'counter',
+                                              'Bot API responses with status 429 Too Many Requests', ('method',))
+        self._api_errors = self._family('api_request_errors_total', 'counter',
+                                        'Bot API requests failed without a response', ('method',))
+
+    def _family(self, name, metric_type, description, label_names):
+        samples = {}
+        self.families[self.namespace + '_' + name] = (metric_type, description, label_names, samples)
+        return samples
+
+    def _observe(self, family, labels, value, buckets=None):
+        with self.lock:
+            histogram = family.get(labels)
+            if histogram is None:
+                histogram = family[labels] = Histogram(buckets or self.latency_buckets)
+            histogram.observe(value)
+
+    def _increment(self, family, labels):
+        with self.lock:
+            family[labels] = family.get(labels, 0) + 1
+
+    def observe_update(self, update_type: str, seconds: float):
+        self._observe(self._update_latency, (update_type,), seconds)
+
+    def observe_handler(self, update_type: str, handler: dict, seconds: float):
+        function = handler['function']
+        name = getattr(function, '__qualname__', None) or repr(function)
+        self._observe(self._handler_latency, (update_type, name), seconds)
+
+    def observe_queue_wait(self, seconds: float):
+        self._observe(self._queue_wait, (), seconds)
+
+    def observe_batch_size(self, size: int):
+        self._observe(self._batch_size, (), size, BATCH_SIZE_BUCKETS)
+
+    def observe_request(self, trace: tracing.RequestTrace):
+        """
+        Post-response :mod:`telebot.tracing` hook recording Bot API metrics.
+        """
+        method = (trace.method_name,)
+        self._observe(self._api_latency, method, trace.latency)
+        if trace.status is None:
+            self._increment(self._api_errors, method)
+            return
+        self._increment(self._api_responses, (trace.method_name, trace.status))
+        if trace.status == 429:
+            self._increment(self._api_rate_limited, method)
+
+    def enable_request_tracing(self):
+        if not self._tracing_enabled:
+            tracing.add_post_response_hook(self.observe_request)
+            self._tracing_enabled = True
+
+    def disable_request_tracing(self):
+        if self._tracing_enabled:
+            tracing.remove_hook(self.observe_request)
+            self._tracing_enabled = False
+
+    def _pool_gauges(self):
+        pool = self.worker_pool
+        if pool is None:
+            return []
+        return [
+            ('queue_depth', 'gauge', 'Tasks waiting in the worker pool queue', pool.queue_depth),
+            ('queue_high_water_mark', 'gauge', 'Maximum worker pool queue depth', pool.high_water_mark),
+            ('worker_threads', 'gauge', 'Worker threads', len(pool.workers)),
+            ('busy_worker_threads', 'gauge', 'Worker threads running a task', pool.busy_workers),
+            ('polling_blocked_seconds_total', 'counter', 'Time polling waited for the worker pool queue',
+             pool.blocked_time),
+            ('worker_threads_started_total', 'counter', 'Worker threads added by scaling up', pool.scaled_up),
+            ('worker_threads_retired_total', 'counter', 'Idle worker threads retired', pool.scaled_down),
+        ]
+
+    def render(self) -> str:
+        """
+        Returns all metrics in Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            for name, (metric_type, description, label_names, samples) in self.families.items():
+                lines.append('# HELP {} {}'.format(name, description))
+                lines.append('# TYPE {} {}'.format(name, metric_type))
+                for labels, value in samples.items():
+                    if metric_type != 'histogram':
+                        lines.append('{}{} {}'.format(name, _format_labels(label_names, labels), _format_value(value)))
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + ('+Inf',), value.counts):
+                        cumulative += count
+                        bucket_labels = _format_labels(label_names + ('le',), labels + (_format_value(bound),))
+                        lines.append('{}_bucket{} {}'.format(name, bucket_labels, cumulative))
+                    lines.append('{}_sum{} {}'.format(name, _format_labels(label_names, labels), _format_value(value.sum)))
+                    lines.append('{}_count{} {}'.format(name, _format_labels(label_names, labels), value.count))
+        for name, metric_type, description, value in self._pool_gauges():
+            name = self.namespace + '_' + name
+            lines.append('# HELP {} {}'.format(name, description))
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            lines.append('{} {}'.format(name, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port: int, addr: str='127.0.0.1') -> HTTPServer:
+        """
+        Serves metrics over HTTP (any path) in a daemon thread. A server started before is stopped.
+
+        :param port: port to listen on
+        :param addr: address to listen on, defaults to localhost only
+        :return: the server, stopped by :meth:`stop_http_server`
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug('Metrics endpoint: ' + format, *args)
+
+        class MetricsServer(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        self.stop_http_server()
+        self._http_server = MetricsServer((addr, port), MetricsHandler)
+        threading.Thread(target=self._http_server.serve_forever, name='MetricsServer', daemon=True).start()
+        return self._http_server
+
+    def stop_http_server(self):
+        """
+        Stops the server started by :meth:`start_http_server` and closes its socket, if any.
+        """
+        server, self._http_server = self._http_server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    def start_callback_export(self, callback: Callable[[str], None], interval: float=15) -> threading.Event:
+        """
+        Calls `callback` with the rendered metrics every `interval` seconds in a daemon thread.
+
+        :param callback: function accepting the metrics text
+        :param interval: seconds between calls
+        :return: event, set it to stop exporting
+        """
+        stop = threading.Event()
+
+        def export():
+            while not stop.wait(interval):
+                try:
+                    callback(self.render())
+                except Exception as e:
+                    logger.error('Metrics export callback failed: {}'.format(e))
+
+        threading.Thread(target=export, name='MetricsExport', daemon=True).start()
+        return stop
+
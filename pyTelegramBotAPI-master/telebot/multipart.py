@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming multipart/form-data encoder for file uploads of :mod:`telebot.apihelper`.
+
+requests encodes the files of a request into one bytes object before sending it, so an upload needs as much memory
+as its files are large. :class:`MultipartEncoder` produces the same body (the same field headers and layout for a
+given boundary) piece by piece instead, reading files in chunks while the body is sent. The body length is known,
+and sent as Content-Length, unless a file is in text mode or can't tell its size.
+
+apihelper uses it for all requests with files unless ``apihelper.STREAMING_UPLOADS = False``. Upload progress can
+be followed with :func:`telebot.apihelper.upload_progress`.
+"""
+import io
+import os
+from typing import Callable, Iterator, List, Optional
+
+from requests.utils import guess_filename, to_key_val_list
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
+
+#: Size of the chunks files are read in, in bytes.
+CHUNK_SIZE = 64 * 1024
+
+
+def _file_size(fp) -> Optional[int]:
+    """
+    Returns the number of bytes left to read from a binary file object, None if unknown.
+    """
+    if isinstance(fp, io.TextIOBase):
+        return None
+    try:
+        position = fp.tell()
+        try:
+            return os.fstat(fp.fileno()).st_size - position
+        except (AttributeError, OSError):
+            end = fp.seek(0, io.SEEK_END)
+            fp.seek(position)
+            return end - position
+    except (AttributeError, OSError):
+        return None
+
+
+class _Part(object):
+    """
+    Field of a multipart body: rendered headers and data, which is bytes or a file object.
+    """
+    __slots__ = ('headers', 'data', 'size', 'start')
+
+    def __init__(self, headers: bytes, data):
+        self.headers = headers
+        self.data = data
+        self.start = None
+        if hasattr(data, 'read'):
+            self.size = _file_size(data)
+            try:
+                self.start = data.tell()
+            except (AttributeError, OSError):
+                pass
+        else:
+            self.size = len(data)
+
+    def rewind(self):
+        if hasattr(self.data, 'read'):
+            if self.start is None:
+                raise io.UnsupportedOperation('File of a multipart body can\'t be read again')
+            self.data.seek(self.start)
+
+    def chunks(self, chunk_size: int) -> Iterator[bytes]:
+        yield self.headers
+        if not hasattr(self.data, 'read'):
+            for start in range(0, len(self.data), chunk_size):
+                yield self.data[start:start + chunk_size]
+        elif self.size is None:
+            while True:
+                chunk = self.data.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+        else:
+            left = self.size
+            while left:
+                chunk = self.data.read(min(chunk_size, left))
+                if not chunk:
+                    raise IOError('File of a multipart body is shorter than its size when the body was created')
+                left -= len(chunk)
+                yield chunk
+        yield b'\r\n'
+
+
+class MultipartEncoder(object):
+    """
+    Streaming multipart/form-data body of files, a readable and iterable object which can be passed to requests
+    as data (with :attr:`content_type` as Content-Type header).
+
+    :param files: files in any form requests accepts: a dict or list of (field name, value) pairs, values being
+        file objects, bytes, str or tuples (file name, file object or data[, content type[, headers]])
+    :param boundary: multipart boundary, random by default
+    :param progress: function called with the number of bytes sent and the body length (None if unknown)
+        after every chunk
+    :param chunk_size: size of the chunks files are read in
+    """
+
+    def __init__(self, files, boundary: Optional[str]=None, progress: Optional[Callable[[int, Optional[int]], None]]=None,
+                 chunk_size: int=CHUNK_SIZE):
+        self.boundary = boundary or choose_boundary()
+        self.content_type = 'multipart/form-data; boundary={0}'.format(self.boundary)
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.parts: List[_Part] = []
+        for name, value in to_key_val_list(files):
+            part = self._part(name, value)
+            if part is not None:
+                self.parts.append(part)
+        self.end = '--{0}--\r\n'.format(self.boundary).encode('latin-1')
+        sizes = [part.size for part in self.parts]
+        #: Body length, None if unknown. requests sends it as Content-Length, or the body in chunks if it's None.
+        self.len = None if None in sizes else \
+            sum(len(part.headers) + size + 2 for part, size in zip(self.parts, sizes)) + len(self.end)
+        self._position = 0
+        self._pieces = self._iter_pieces()
+        self._buffer = b''
+
+    def _part(self, name, value) -> Optional[_Part]:
+        # the same fields as requests.models.RequestEncodingMixin._encode_files
+        content_type = headers = None
+        if isinstance(value, (tuple, list)):
+            if len(value) == 2:
+                file_name, data = value
+            elif len(value) == 3:
+                file_name, data, content_type = value
+            else:
+                file_name, data, content_type, headers = value
+        else:
+            file_name = guess_filename(value) or name
+            data = value
+        if data is None:
+            return None
+        if isinstance(data, int):
+            data = str(data)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        field = RequestField(name=name, data=b'', filename=file_name, headers=headers)
+        field.make_multipart(content_type=content_type)
+        headers = '--{0}\r\n'.format(self.boundary).encode('latin-1') + field.render_headers().encode('utf-8')
+        return _Part(headers, data if hasattr(data, 'read') else bytes(data))
+
+    def _iter_pieces(self) -> Iterator[bytes]:
+        for part in self.parts:
+            yield from part.chunks(self.chunk_size)
+        yield self.end
+
+    def _advance(self, piece: bytes) -> bytes:
+        self._position += len(piece)
+        if self.progress:
+            self.progress(self._position, self.len)
+        return piece
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._buffer:
+            yield self._advance(self._buffer)
+            self._buffer = b''
+        for piece in self._pieces:
+            if piece:
+                yield self._advance(piece)
+
+    def read(self, size: int=-1) -> bytes:
+        """
+        Returns the next `size` bytes of the body, or the rest of it if size is negative.
+        """
+        if size is None or size < 0:
+            return b''.join(self)
+        pieces = []
+        wanted = size
+        while wanted > 0:
+            if not self._buffer:
+                self._buffer = next(self._pieces, None)
+                if self._buffer is None:
+                    self._buffer = b''
+                    break
+            if len(self._buffer) <= wanted:
+                piece, self._buffer = self._buffer, b''
+            else:
+                piece, self._buffer = self._buffer[:wanted], self._buffer[wanted:]
+            wanted -= len(piece)
+            pieces.append(piece)
+        return self._advance(b''.join(pieces)) if pieces else b''
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int=io.SEEK_SET) -> int:
+        """
+        Rewinds the body to its start, for retries; files are rewound to their positions when the body was
+        created. Other seeks are only supported if they don't move.
+        """
+        if whence == io.SEEK_SET and offset == self._position:
+            return offset
+        if whence != io.SEEK_SET or offset != 0:
+            raise io.UnsupportedOperation('Multipart body can only be rewound to its start')
+        for part in self.parts:
+            part.rewind()
+        self._position = 0
+        self._pieces = self._iter_pieces()
+        self._buffer = b''
+        return 0
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Slow handler profiler for :class:`telebot.TeleBot` and :class:`telebot.async_telebot.AsyncTeleBot`.
+
+A sampled fraction of handler calls is profiled. If a profiled call takes longer than the threshold, a report
+with the update type, handler qualname, duration and profile is written to a directory which keeps only the
+newest reports.
+
+Synchronous handlers are profiled with :mod:`cProfile` (a ``.prof`` file for ``pstats``/snakeviz and a ``.txt``
+summary). Coroutines can't be followed by cProfile across awaits, so asynchronous handlers are profiled by
+sampling the event loop thread stack; the ``.txt`` report contains the samples in folded stack format,
+which flame graph tools accept. Stack samples include other tasks running on the loop at the same time.
+
+Only one call is profiled at a time, concurrent calls run unprofiled.
+
+.. code-block:: python3
+
+    bot = TeleBot(token)
+    bot.enable_profiler('profiles', threshold=2, sample_rate=0.05)
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger('TeleBot')
+
+
+class HandlerProfiler:
+    """
+    Profiles handler calls and keeps reports of slow ones.
+
+    :param directory: directory for reports, created if it doesn't exist
+    :param threshold: minimum handler duration in seconds to write a report
+    :param sample_rate: fraction of handler calls to profile, from 0 to 1
+    :param max_reports: number of newest reports to keep in the directory
+    :param stack_interval: seconds between stack samples for asynchronous handlers
+    """
+
+    def __init__(self, directory: str, threshold: float=1.0, sample_rate: float=0.01, max_reports: int=50,
+                 stack_interval: float=0.005):
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.max_reports = max_reports
+        self.stack_interval = stack_interval
+        self.reports_written = 0
+        self._active = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def run(self, update_type, handler, func, *args, **kwargs):
+        """
+        Calls a synchronous handler, profiling it if sampled.
+        """
+        if not self._sampled() or not self._active.acquire(blocking=False):
+            return func(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                duration = time.perf_counter() - started
+                if duration >= self.threshold:
+                    self._write_report(update_type, handler, duration, profile=profile)
+        finally:
+            self._active.release()
+
+    async def run_async(self, update_type, handler, coroutine):
+        """
+        Awaits an asynchronous handler coroutine, sampling the event loop thread stack if sampled.
+        """
+        if not self._sampled() or not self._active.acquire(blocking=False):
+            return await coroutine
+        try:
+            sampler = _StackSampler(threading.get_ident(), self.stack_interval)
+            started = time.perf_counter()
+            sampler.start()
+            try:
+                return await coroutine
+            finally:
+                sampler.stop()
+                duration = time.perf_counter() - started
+                if duration >= self.threshold:
+                    self._write_report(update_type, handler, duration, stacks=sampler.stacks)
+        finally:
+            self._active.release()
+
+    def _write_report(self, update_type, handler, duration, profile=None, stacks=None):
+        function = handler['function']
+        qualname = getattr(function, '__qualname__', None) or repr(function)
+        name = '{}_{}_{}'.format(
+            datetime.now().strftime('%Y%m%d-%H%M%S-%f'), update_type, re.sub(r'[^\w.-]+', '_', qualname))
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path + '.txt', 'w', encoding='utf-8') as report:
+                report.write('handler: {}.{}\n'.format(getattr(function, '__module__', None), qualname))
+                report.write('update_type: {}\n'.format(update_type))
+                report.write('duration: {:.3f}s\n\n'.format(duration))
+                if profile is not None:
+                    profile.dump_stats(path + '.prof')
+                    output = io.StringIO()
+                    pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(40)
+                    report.write(output.getvalue())
+                else:
+                    for stack, count in stacks.most_common():
+                        report.write('{} {}\n'.format(stack, count))
+            self.reports_written += 1
+            logger.warning('Handler %s took %.3fs for %s update, profile written to %s',
+                           qualname, duration, update_type, path + '.txt')
+            self._rotate()
+        except Exception as e:
+            logger.error('Failed to write handler profile {}: {}'.format(path, e))
+
+    def _rotate(self):
+        reports = sorted(
+            (entry for entry in os.listdir(self.directory) if entry.endswith('.txt')), reverse=True)
+        for report in reports[self.max_reports:]:
+            base = os.path.join(self.directory, report[:-len('.txt')])
+            for path in (base + '.txt', base + '.prof'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class _StackSampler(threading.Thread):
+    """
+    Collects stack samples of another thread in folded format ("outer;inner" -> count).
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='HandlerStackSampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append('{}:{}'.format(os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
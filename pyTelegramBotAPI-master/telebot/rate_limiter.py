@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Token bucket rate limiter for Bot API requests, used by :mod:`telebot.apihelper` and :mod:`telebot.asyncio_helper`.
+
+Requests of sending methods (send*, copy*, forward*, edit*, except sendChatAction) wait for a token of the bucket of their chat, then for
+one of the global bucket, before they are sent. So Telegram's limits are kept instead of hitting 429 errors: about
+30 messages per second overall, 1 per second in a private chat and 20 per minute in a group. Chat buckets are
+created on first use and dropped when idle. If Telegram answers 429 anyway, the bucket of the chat (or the global
+one for requests without a chat) is paused for retry_after seconds, and the error is raised as before.
+
+Waiting requests hold a reservation, so they are sent in order; if their bucket is paused while they wait, they
+wait for the pause and reserve again. One limiter may be shared by the synchronous and the asynchronous helpers:
+TeleBot worker threads sleep, AsyncTeleBot tasks await.
+
+.. code-block:: python3
+
+    from telebot import apihelper, asyncio_helper
+    from telebot.rate_limiter import RateLimiter
+
+    apihelper.RATE_LIMITER = asyncio_helper.RATE_LIMITER = RateLimiter()
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Union
+
+#: Prefixes of the names of methods sending messages.
+LIMITED_METHOD_PREFIXES = ('send', 'copy', 'forward', 'edit')
+#: Methods matching the prefixes which don't send messages. sendChatAction isn't limited, so a "typing..." action
+#: doesn't take the token of the message sent after it.
+UNLIMITED_METHODS = frozenset({'sendChatAction'})
+
+
+class TokenBucket(object):
+    """
+    Token bucket refilled with `rate` tokens per second up to `capacity`, which hands out tokens in advance:
+    tokens may go negative while requests wait for them.
+
+    :param rate: tokens per second
+    :param capacity: maximum number of tokens, the burst size
+    :param now: current time.monotonic()
+    """
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.paused_until = 0.0
+
+    def available_at(self, now: float) -> float:
+        """
+        Returns the time at which the next token is available.
+        """
+        at = max(now, self.updated, self.paused_until)
+        tokens = min(self.capacity, self.tokens + (at - self.updated) * self.rate)
+        if tokens >= 1:
+            return at
+        return at + (1 - tokens) / self.rate
+
+    def consume(self, at: float):
+        """
+        Takes a token at time `at`, which must not be earlier than :meth:`available_at`.
+        """
+        self.tokens = min(self.capacity, self.tokens + (at - self.updated) * self.rate) - 1
+        self.updated = at
+
+    def pause(self, until: float):
+        """
+        Hands out no tokens until `until`, then one right away. Tokens handed out in advance are forgiven:
+        their requests wait for the pause and reserve again.
+        """
+        self.paused_until = max(self.paused_until, until)
+        self.tokens = 1
+        self.updated = self.paused_until
+
+    def idle(self, now: float) -> bool:
+        """
+        True if the bucket is full and not paused, so dropping it changes nothing.
+        """
+        return self.paused_until <= now and self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class RateLimiter(object):
+    """
+    Global and per-chat token bucket rate limiter, safe to use from any number of threads and event loops.
+
+    :param global_rate: requests per second to all chats
+    :param global_burst: requests which may be sent at once to all chats
+    :param private_chat_rate: requests per second to a private chat (positive chat id)
+    :param private_chat_burst: requests which may be sent at once to a private chat
+    :param group_chat_rate: requests per second to a group or channel (negative chat id or @username)
+    :param group_chat_burst: requests which may be sent at once to a group or channel
+    :param idle_timeout: seconds after which unused chat buckets are dropped
+    :param limited: function returning True for the names of API methods to limit, by default the ones sending
+        messages
+    """
+
+    def __init__(self, global_rate: float=30, global_burst: float=30, private_chat_rate: float=1,
+                 private_chat_burst: float=1, group_chat_rate: float=20 / 60, group_chat_burst: float=3,
+                 idle_timeout: float=60, limited: Optional[Callable[[str], bool]]=None):
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.private_chat_rate = private_chat_rate
+        self.private_chat_burst = private_chat_burst
+        self.group_chat_rate = group_chat_rate
+        self.group_chat_burst = group_chat_burst
+        self.idle_timeout = idle_timeout
+        self.limited = limited or (lambda method_name: method_name.startswith(LIMITED_METHOD_PREFIXES)
+                                   and method_name not in UNLIMITED_METHODS)
+        #: Number of requests which had to wait.
+        self.throttled = 0
+        #: Seconds requests waited in total.
+        self.waited = 0.0
+        self._global = TokenBucket(global_rate, global_burst, time.monotonic())
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._swept = time.monotonic()
+
+    def _chat_bucket(self, chat_id, now) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if isinstance(chat_id, int) and chat_id > 0 or isinstance(chat_id, str) and chat_id.isdigit():
+                bucket = TokenBucket(self.private_chat_rate, self.private_chat_burst, now)
+            else:
+                bucket = TokenBucket(self.group_chat_rate, self.group_chat_burst, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _sweep(self, now):
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.idle(now)]:
+            del self._chats[chat_id]
+        self._swept = now
+
+    def reserve(self, chat_id=None) -> Tuple[float, TokenBucket]:
+        """
+        Reserves a token of the bucket of a chat, or of the global bucket if chat_id is None. Returns the
+        time.monotonic() at which it may be used and the bucket.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept > self.idle_timeout:
+                self._sweep(now)
+            bucket = self._global if chat_id is None else self._chat_bucket(chat_id, now)
+            at = bucket.available_at(now)
+            bucket.consume(at)
+        return at, bucket
+
+    def _stages(self, chat_id):
+        # the chat token is waited for first: a global token reserved for a time far ahead would hold up other chats
+        return (chat_id, None) if chat_id is not None else (None,)
+
+    def _count(self, started):
+        waited = time.monotonic() - started
+        with self._lock:
+            self.throttled += 1
+            self.waited += waited
+
+    def acquire(self, method_name: str, chat_id=None):
+        """
+        Blocks the thread until a request may be sent.
+
+        :param method_name: API method name, like sendMessage
+        :param chat_id: chat_id parameter of the request, if any
+        """
+        if not self.limited(method_name):
+            return
+        started = time.monotonic()
+        throttled = False
+        for stage in self._stages(chat_id):
+            while True:
+                at, bucket = self.reserve(stage)
+                delay = at - time.monotonic()
+                if delay > 0:
+                    throttled = True
+                    time.sleep(delay)
+                # a reservation is void if its bucket was paused meanwhile
+                if bucket.paused_until <= time.monotonic():
+                    break
+        if throttled:
+            self._count(started)
+
+    async def acquire_async(self, method_name: str, chat_id=None):
+        """
+        Waits until a request may be sent, without blocking the event loop.
+
+        :param method_name: API method name, like sendMessage
+        :param chat_id: chat_id parameter of the request, if any
+        """
+        if not self.limited(method_name):
+            return
+        started = time.monotonic()
+        throttled = False
+        for stage in self._stages(chat_id):
+            while True:
+                at, bucket = self.reserve(stage)
+                delay = at - time.monotonic()
+                if delay > 0:
+                    throttled = True
+                    await asyncio.sleep(delay)
+                # a reservation is void if its bucket was paused meanwhile
+                if bucket.paused_until <= time.monotonic():
+                    break
+        if throttled:
+            self._count(started)
+
+    def pause(self, chat_id, seconds: float):
+        """
+        Pauses requests to a chat, or all requests if chat_id is None.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._global if chat_id is None else self._chat_bucket(chat_id, now)
+            bucket.pause(now + seconds)
+
+    def handle_error(self, exception, chat_id=None):
+        """
+        Pauses the bucket of the chat for retry_after seconds if `exception` is a 429 error.
+
+        :param exception: exception raised by the request
+        :type exception: :class:`telebot.apihelper.ApiTelegramException`
+
+        :param chat_id: chat_id parameter of the request, if any
+        """
+        if getattr(exception, 'error_code', None) != 429:
+            return
+        retry_after = (exception.result_json.get('parameters') or {}).get('retry_after')
+        if retry_after:
+            self.pause(chat_id, retry_after)
+
+    @property
+    def chats(self) -> int:
+        """
+        Number of chat buckets.
+        """
+        return len(self._chats)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Declarative field schema of the most frequently deserialized types and de_json methods generated from it.
+
+For every type in :data:`SCHEMA` a specialised ``de_json`` is compiled when :mod:`telebot.types` is imported:
+straight-line code which reads every field once and doesn't copy the source dict. Types keeping optional fields
+in ``__dict__`` (Message) get a loop over the keys present instead, so absent fields cost nothing.
+
+Generated methods produce the same objects as the hand-written ones, which are kept in :data:`handwritten`
+and still used for subclasses. :func:`uninstall` restores them. Types in :data:`INTERNED` are also interned
+within :func:`telebot.types.interning`.
+
+To support a new field, add it to the schema and to the class ``__init__``.
+"""
+import linecache
+from typing import Callable, Dict, List, Optional, Union
+
+from telebot import types
+
+
+class Field:
+    """
+    Schema of a type field.
+
+    :param key: JSON key
+    :param type: name of the :mod:`telebot.types` class of the value
+    :param list_of: name of the :mod:`telebot.types` class of list items
+    :param name: attribute name if it differs from the key, like from_user for "from"
+    :param parser: function converting the JSON value, or the name of one in :mod:`telebot.types`
+    :param required: the key is always present
+    :param content_type: Message.content_type of messages with this field
+    """
+    __slots__ = ('key', 'type', 'list_of', 'name', 'parser', 'required', 'content_type')
+
+    def __init__(self, key: str, type: Optional[str]=None, list_of: Optional[str]=None, name: Optional[str]=None,
+                 parser: Optional[Union[Callable, str]]=None, required: bool=False, content_type: Optional[str]=None):
+        self.key = key
+        self.type = type
+        self.list_of = list_of
+        self.name = name or key
+        self.parser = parser
+        self.required = required
+        self.content_type = content_type
+
+
+#: Marker field storing the source JSON (subject to types.RETAIN_MESSAGE_JSON).
+JSON = Field('json')
+
+
+def _parse_reaction_types(reactions):
+    return [types.ReactionType(reaction) for reaction in reactions]
+
+
+_CHAT_FIELDS = [
+    Field('id', required=True), Field('type', required=True), Field('title'), Field('username'),
+    Field('first_name'), Field('last_name'), Field('photo', 'ChatPhoto'), Field('bio'), Field('has_private_forwards'),
+    Field('description'), Field('invite_link'), Field('pinned_message', 'Message'),
+    Field('permissions', 'ChatPermissions'), Field('slow_mode_delay'), Field('message_auto_delete_time'),
+    Field('has_protected_content'), Field('sticker_set_name'), Field('can_set_sticker_set'), Field('linked_chat_id'),
+    Field('location', 'ChatLocation'), Field('join_to_send_messages'), Field('join_by_request'),
+    Field('has_restricted_voice_and_video_messages'), Field('is_forum'), Field('max_reaction_count'),
+    Field('active_usernames'), Field('emoji_status_custom_emoji_id'), Field('has_hidden_members'),
+    Field('has_aggressive_anti_spam_enabled'), Field('emoji_status_expiration_date'),
+    Field('available_reactions', parser=_parse_reaction_types), Field('accent_color_id'),
+    Field('background_custom_emoji_id'), Field('profile_accent_color_id'), Field('profile_background_custom_emoji_id'),
+    Field('has_visible_history'), Field('unrestrict_boost_count'), Field('custom_emoji_sticker_set_name'),
+    Field('business_intro', 'BusinessIntro'), Field('business_location', 'BusinessLocation'),
+    Field('business_opening_hours', 'BusinessOpeningHours'), Field('personal_chat', 'Chat'),
+    Field('birthdate', 'Birthdate'), Field('can_send_paid_media'), Field('accepted_gift_types', 'AcceptedGiftTypes'),
+    Field('is_direct_messages'), Field('parent_chat', 'Chat'),
+]
+
+
+def _lazy_fields(table, names=None):
+    """
+    Converts a field table of :mod:`telebot.types` lazy deserialization to fields.
+    """
+    fields = []
+    for key, parser, *content_type in table:
+        fields.append(Field(
+            key, type=parser.__name__ if isinstance(parser, type) else None, name=(names or {}).get(key),
+            parser=None if isinstance(parser, type) else parser, content_type=content_type[0] if content_type else None))
+    return fields
+
+
+#: Type name -> fields.
+SCHEMA: Dict[str, List[Field]] = {
+    'User': [
+        Field('id', required=True), Field('is_bot', required=True), Field('first_name', required=True),
+        Field('username'), Field('last_name'), Field('language_code'), Field('can_join_groups'),
+        Field('can_read_all_group_messages'), Field('supports_inline_queries'), Field('is_premium'),
+        Field('added_to_attachment_menu'), Field('can_connect_to_business'), Field('has_main_web_app'),
+    ],
+    'ChatFullInfo': _CHAT_FIELDS,
+    'Chat': _CHAT_FIELDS,
+    'MessageEntity': [
+        Field('type', required=True), Field('offset', required=True), Field('length', required=True), Field('url'),
+        Field('user', 'User'), Field('language'), Field('custom_emoji_id'),
+    ],
+    'PhotoSize': [
+        Field('file_id', required=True), Field('file_unique_id', required=True), Field('width', required=True),
+        Field('height', required=True), Field('file_size'),
+    ],
+    'CallbackQuery': [
+        Field('id', required=True), Field('from', 'User', name='from_user', required=True),
+        Field('message', parser='_parse_maybe_inaccessible_message'), Field('inline_message_id'),
+        Field('chat_instance', required=True), Field('data'), Field('game_short_name'), JSON,
+    ],
+    'Update': [Field('update_id', required=True)] + _lazy_fields(types._UPDATE_FIELDS),
+    'Message': (
+        [Field('message_id', required=True), Field('message_id', name='id', required=True),
+         Field('date', required=True), JSON] + _lazy_fields(types._MESSAGE_FIELDS, {'from': 'from_user'})),
+}
+
+#: Type name -> name of its read-only variant, for types interned by :func:`telebot.types.interning`.
+INTERNED: Dict[str, str] = {'User': '_FrozenUser', 'Chat': '_FrozenChat'}
+
+#: Class -> hand-written de_json function, for classes with a generated de_json.
+handwritten: Dict[type, Callable] = {}
+# classes inheriting their hand-written de_json
+_inherited = set()
+
+
+def _value_code(field, value, namespace):
+    if field.type:
+        return '{}.de_json({})'.format(field.type, value)
+    if field.list_of:
+        return '[{}.de_json(item) for item in {}]'.format(field.list_of, value)
+    if field.parser:
+        parser = '_parser_' + field.name
+        namespace[parser] = getattr(types, field.parser) if isinstance(field.parser, str) else field.parser
+        return '{}({})'.format(parser, value)
+    return value
+
+
+def generate_source(cls: type, fields: List[Field], namespace: dict) -> str:
+    """
+    Returns the source of a de_json function for `cls`, adding the names it uses to `namespace`.
+    """
+    lines = [
+        'def de_json(cls, json_string):',
+        '    if json_string is None:',
+        '        return None',
+        '    if cls is not _cls:',
+        '        return _handwritten(cls, json_string)',
+        '    obj = json_string if type(json_string) is dict else cls.check_json(json_string, dict_copy=False)',
+    ]
+    sparse = '__dict__' in getattr(cls, '__slots__', ())
+    if sparse:
+        lines += [
+            '    if _types.LAZY_DESERIALIZATION:',
+            '        return cls._de_json_lazy(obj, json_string)',
+        ]
+    interned = INTERNED.get(cls.__name__)
+    if interned:
+        namespace['_frozen'] = getattr(types, interned)
+        lines += [
+            '    key = None',
+            '    cache = _types._interning.get()',
+            '    if cache is not None:',
+            '        key = (cls, *obj.items())',
+            '        try:',
+            '            self = cache.get(key)',
+            '        except TypeError:',
+            '            key = None # unhashable values, like nested objects',
+            '        else:',
+            '            if self is not None:',
+            '                return self',
+        ]
+    lines.append('    self = _new(cls)')
+    optional = {}
+    for field in fields:
+        if field is JSON:
+            lines.append('    self.json = json_string if _types.RETAIN_MESSAGE_JSON else None')
+        elif field.required:
+            lines.append('    self.{} = {}'.format(field.name, _value_code(field, 'obj[{!r}]'.format(field.key), namespace)))
+        elif sparse:
+            optional[field.key] = field
+        elif not (field.type or field.list_of or field.parser):
+            lines.append('    self.{} = obj.get({!r})'.format(field.name, field.key))
+        else:
+            lines.append('    value = obj.get({!r})'.format(field.key))
+            lines.append('    self.{} = None if value is None else {}'.format(
+                field.name, _value_code(field, 'value', namespace)))
+
+    if sparse:
+        # key -> (attribute name, parser, content type rank, content type); absent fields are class attributes
+        table = {}
+        for rank, (key, field) in enumerate(optional.items()):
+            if field.type or field.list_of or field.parser:
+                parser_namespace = {}
+                parser = eval('lambda value: ' + _value_code(field, 'value', parser_namespace),
+                              dict(vars(types), **parser_namespace))
+            else:
+                parser = None
+            table[key] = (field.name, parser, rank if field.content_type else -1, field.content_type)
+        namespace['_fields'] = table
+        lines += [
+            '    instance_fields = self.__dict__',
+            '    content_type = None',
+            '    rank = -1',
+            '    for key, value in obj.items():',
+            '        field = _fields.get(key)',
+            '        if field is not None:',
+            '            name, parser, field_rank, field_content_type = field',
+            '            instance_fields[name] = value if parser is None else parser(value)',
+            '            if field_rank > rank:',
+            '                rank = field_rank',
+            '                content_type = field_content_type',
+            '    self.content_type = content_type',
+        ]
+    if interned:
+        lines += [
+            '    if key is not None:',
+            '        self.__class__ = _frozen',
+            '        cache[key] = self',
+        ]
+    lines.append('    return self')
+    return '\n'.join(lines) + '\n'
+
+
+def compile_de_json(cls: type, fields: List[Field]) -> Callable:
+    """
+    Compiles a de_json function for `cls` from its fields.
+    """
+    namespace = dict(vars(types))
+    namespace.update(_cls=cls, _types=types, _new=object.__new__, _handwritten=_original(cls))
+    source = generate_source(cls, fields, namespace)
+    filename = '<generated {}.de_json>'.format(cls.__name__)
+    exec(compile(source, filename, 'exec'), namespace)
+    # make the source visible in tracebacks
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    function = namespace['de_json']
+    function.__qualname__ = cls.__qualname__ + '.de_json'
+    return function
+
+
+def _original(cls):
+    for klass in cls.__mro__:
+        if klass in handwritten:
+            return handwritten[klass]
+        if 'de_json' in vars(klass):
+            return vars(klass)['de_json'].__func__
+
+
+def install():
+    """
+    Replaces de_json of the types in :data:`SCHEMA` with generated ones.
+    """
+    for name, fields in SCHEMA.items():
+        cls = getattr(types, name)
+        if cls not in handwritten:
+            function = compile_de_json(cls, fields)
+            handwritten[cls] = _original(cls)
+            if 'de_json' not in vars(cls):
+                _inherited.add(cls)
+            cls.de_json = classmethod(function)
+
+
+def uninstall():
+    """
+    Restores the hand-written de_json methods.
+    """
+    for cls, function in handwritten.items():
+        if cls in _inherited:
+            del cls.de_json
+        else:
+            cls.de_json = classmethod(function)
+    handwritten.clear()
+    _inherited.clear()
@@ -1,6 +1,15 @@
+import os
 import random
+import re
 import string
 from io import BytesIO
+from typing import Optional, Tuple
+
+try:
+    # noinspection PyPackageRequirements
+    import ujson as json
+except ImportError:
+    import json
 
 try:
     # noinspection PyPackageRequirements
@@ -9,6 +18,29 @@ try:
 except ImportError:
     pil_imported = False
 
+try:
+    # noinspection PyPackageRequirements
+    import orjson
+    json_backend = 'orjson'
+    _loads = orjson.loads
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    try:
+        # noinspection PyPackageRequirements
+        import msgspec
+        json_backend = 'msgspec'
+        _loads = msgspec.json.Decoder().decode
+        _encode = msgspec.json.Encoder().encode
+
+        def _dumps(obj):
+            return _encode(obj).decode('utf-8')
+    except ImportError:
+        json_backend = json.__name__
+        _loads = json.loads
+        _dumps = json.dumps
+
 
 def is_string(var) -> bool:
     """
@@ -43,6 +75,106 @@ def is_bytes(var) -> bool:
     return isinstance(var, bytes)
 
 
+def decode_json(data):
+    """
+    Parses JSON from bytes or str with the fastest available backend: orjson, msgspec, ujson or json.
+
+    :param data: JSON document
+    :type data: :obj:`bytes` or :obj:`str`
+
+    :return: parsed object
+    """
+    try:
+        return _loads(data)
+    except Exception:
+        if _loads is json.loads:
+            raise
+        # e.g. lone surrogates in text, which orjson and msgspec reject
+        return json.loads(data)
+
+
+def encode_json(obj) -> str:
+    """
+    Serializes an object of dicts, lists and scalars to JSON with the fastest available backend: orjson,
+    msgspec, ujson or json.
+
+    :param obj: object to serialize
+
+    :return: JSON document
+    :rtype: :obj:`str`
+    """
+    try:
+        return _dumps(obj)
+    except Exception:
+        if _dumps is json.dumps:
+            raise
+        # e.g. integers over 64 bits or lone surrogates, which orjson and msgspec reject
+        return json.dumps(obj)
+
+
+def encode_json_list(items) -> str:
+    """
+    Serializes a list of :class:`telebot.types.JsonSerializable` objects to a JSON array in a single pass:
+    the to_dict() trees of the items are encoded at once, items without to_dict() are embedded as their to_json().
+    Items without to_json() are skipped.
+
+    :param items: objects to serialize, like inline query results or bot commands
+    :type items: :obj:`list`
+
+    :return: JSON array
+    :rtype: :obj:`str`
+    """
+    items = [item for item in items if hasattr(item, 'to_json')]
+    if all(hasattr(item, 'to_dict') for item in items):
+        return encode_json([item.to_dict() for item in items])
+    return '[' + ','.join(
+        encode_json(item.to_dict()) if hasattr(item, 'to_dict') else item.to_json() for item in items) + ']'
+
+
+def download_range(status: int, headers, offset: int) -> Tuple[int, Optional[int]]:
+    """
+    Checks the response to a file download requesting the bytes from `offset` (with a Range header if offset > 0).
+    Servers ignoring the Range header answer 200 with the whole file, whose first `offset` bytes must be skipped.
+    A 416 response means the file has exactly `offset` bytes, so it is downloaded already.
+
+    :param status: HTTP status: 200, 206 or 416
+    :param headers: response headers
+    :param offset: first byte requested
+
+    :raises ValueError: if the response doesn't match the request
+
+    :return: number of leading body bytes to skip, file size or None if unknown
+    """
+    content_range = headers.get('Content-Range') or ''
+    if status == 206:
+        match = re.match(r'bytes (\d+)-\d+/(\d+|\*)$', content_range)
+        if not match or int(match.group(1)) != offset:
+            raise ValueError('Unexpected Content-Range: {}'.format(content_range))
+        return 0, None if match.group(2) == '*' else int(match.group(2))
+    if status == 416:
+        if content_range != 'bytes */{}'.format(offset):
+            raise ValueError('Requested range not satisfiable: {}'.format(content_range))
+        return 0, offset
+    length = headers.get('Content-Length')
+    return offset, None if length is None else int(length)
+
+
+def open_download_destination(destination, resume: bool):
+    """
+    Opens the destination of a file download.
+
+    :param destination: path or writable binary file object
+    :param resume: continue writing to an existing file at the path
+
+    :return: file object, offset to download from, True if the file object was opened here and must be closed
+    """
+    if hasattr(destination, 'write'):
+        return destination, 0, False
+    if resume and os.path.exists(destination):
+        return open(destination, 'ab'), os.path.getsize(destination), True
+    return open(destination, 'wb'), 0, True
+
+
 def is_pil_image(var) -> bool:
     """
     Returns True if the given object is a PIL.Image.Image object.
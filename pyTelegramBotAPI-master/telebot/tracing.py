@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Request tracing hooks for Bot API calls made by :mod:`telebot.apihelper` and :mod:`telebot.asyncio_helper`.
+
+Hooks are plain callables receiving a :class:`RequestTrace`. Pre-request hooks are called before a request is
+sent, post-response hooks after it completed (successfully or not). Nothing is measured while no hook is added.
+
+.. code-block:: python3
+
+    from telebot import tracing
+
+    def log_slow_requests(trace):
+        if trace.latency > 1:
+            print(trace.method_name, trace.status, trace.latency, trace.retries)
+
+    tracing.add_post_response_hook(log_slow_requests)
+"""
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger('TeleBot')
+
+#: Hooks called before a request is sent.
+pre_request_hooks: List[Callable[['RequestTrace'], None]] = []
+
+#: Hooks called after a request completed or failed.
+post_response_hooks: List[Callable[['RequestTrace'], None]] = []
+
+
+class RequestTrace:
+    """
+    Information about a single Bot API call.
+
+    :param method_name: Bot API method name, e.g. sendMessage
+    :param http_method: HTTP method
+    :param payload_size: approximate size of the parameters and files, in bytes
+    :param is_async: True for requests made by :mod:`telebot.asyncio_helper`
+    """
+    __slots__ = ('method_name', 'http_method', 'payload_size', 'is_async', 'started',
+                 'status', 'latency', 'retries', 'exception')
+
+    def __init__(self, method_name: str, http_method: str, payload_size: int, is_async: bool=False):
+        self.method_name: str = method_name
+        self.http_method: str = http_method
+        self.payload_size: int = payload_size
+        self.is_async: bool = is_async
+        #: :func:`time.monotonic` value when the request was started
+        self.started: float = time.monotonic()
+        #: HTTP status code, None if no response was received
+        self.status: Optional[int] = None
+        #: seconds from start to response, including retries
+        self.latency: Optional[float] = None
+        #: number of retries made before the final attempt
+        self.retries: int = 0
+        #: exception raised while sending the request, if any
+        self.exception: Optional[BaseException] = None
+
+    def __repr__(self):
+        return '<RequestTrace {} status={} latency={} retries={}>'.format(
+            self.method_name, self.status, self.latency, self.retries)
+
+
+def add_pre_request_hook(hook: Callable[[RequestTrace], None]):
+    """
+    Adds a hook called before every Bot API request.
+
+    :param hook: function accepting a :class:`RequestTrace`
+    """
+    pre_request_hooks.append(hook)
+
+
+def add_post_response_hook(hook: Callable[[RequestTrace], None]):
+    """
+    Adds a hook called after every Bot API request, with status, latency and retries filled in.
+
+    :param hook: function accepting a :class:`RequestTrace`
+    """
+    post_response_hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[RequestTrace], None]):
+    """
+    Removes a hook added by :func:`add_pre_request_hook` or :func:`add_post_response_hook`.
+    """
+    for hooks in (pre_request_hooks, post_response_hooks):
+        while hook in hooks:
+            hooks.remove(hook)
+
+
+def _file_size(file) -> int:
+    if isinstance(file, tuple):
+        # (file_name, file) or (file_name, file, content_type)
+        return _file_size(file[1]) if len(file) > 1 else 0
+    if isinstance(file, (bytes, bytearray)):
+        return len(file)
+    if isinstance(file, str):
+        return len(file.encode('utf-8'))
+    file = getattr(file, 'file', file) # InputFile
+    try:
+        return os.fstat(file.fileno()).st_size
+    except Exception:
+        pass
+    try:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return size - position
+    except Exception:
+        return 0
+
+
+def payload_size(params=None, files=None) -> int:
+    """
+    Approximate size of request parameters and files in bytes.
+
+    :meta private:
+    """
+    size = 0
+    if params:
+        for key, value in params.items():
+            size += len(key) + len(str(value))
+    if files:
+        for value in files.values():
+            size += _file_size(value)
+    return size
+
+
+def _call_hooks(hooks, trace):
+    for hook in hooks:
+        try:
+            hook(trace)
+        except Exception as e:
+            logger.error('Request tracing hook {} failed: {}'.format(hook, e))
+
+
+def start_request(method_name, http_method, params=None, files=None, is_async=False) -> Optional[RequestTrace]:
+    """
+    Creates a trace and calls pre-request hooks, returns None if there are no hooks.
+
+    :meta private:
+    """
+    if not (pre_request_hooks or post_response_hooks):
+        return None
+    trace = RequestTrace(method_name, http_method, payload_size(params, files), is_async=is_async)
+    if pre_request_hooks:
+        _call_hooks(pre_request_hooks, trace)
+    return trace
+
+
+def finish_request(trace: Optional[RequestTrace], status=None, retries=0, exception=None):
+    """
+    Completes a trace started by :func:`start_request` and calls post-response hooks.
+
+    :meta private:
+    """
+    if trace is None:
+        return
+    trace.latency = time.monotonic() - trace.started
+    trace.status = status
+    trace.retries = retries
+    trace.exception = exception
+    if post_response_hooks:
+        _call_hooks(post_response_hooks, trace)
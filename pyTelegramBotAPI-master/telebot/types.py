@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from io import IOBase
 import logging
 import os
@@ -21,9 +23,63 @@ from telebot.formatting import apply_html_entities
 
 DISABLE_KEYLEN_ERROR = False
 DEPRECATION_STACK_SHOW_DEPTH = 0
+# Deserialize Message fields on first attribute access instead of in de_json.
+# Lazy messages keep a reference to the source dict, so it must not be changed afterwards.
+LAZY_DESERIALIZATION = False
+# Keep the source JSON in Message.json and CallbackQuery.json.
+RETAIN_MESSAGE_JSON = True
+# Reuse read-only User and Chat objects deserialized from identical JSON within a batch of updates, see interning().
+INTERN_USERS_AND_CHATS = False
 
 logger = logging.getLogger('TeleBot')
 
+_fresh_json = ContextVar('fresh_json', default=False)
+# cache of interning(): (class, *JSON items) -> read-only instance
+_interning = ContextVar('interning', default=None)
+
+
+@contextmanager
+def fresh_json():
+    """
+    Context in which de_json doesn't copy the dicts it changes: the caller guarantees that they were just
+    decoded and aren't used afterwards. While source JSON is kept by objects (RETAIN_MESSAGE_JSON or
+    LAZY_DESERIALIZATION) dicts are copied anyway, because nested dicts are shared with it.
+
+    .. code-block:: python3
+
+        with types.fresh_json():
+            update = types.Update.de_json(json.loads(request_body))
+    """
+    token = _fresh_json.set(not (RETAIN_MESSAGE_JSON or LAZY_DESERIALIZATION))
+    try:
+        yield
+    finally:
+        _fresh_json.reset(token)
+
+
+@contextmanager
+def interning():
+    """
+    Context in which User and Chat objects deserialized from identical JSON are the same object, if
+    INTERN_USERS_AND_CHATS is enabled. A batch of updates from a busy group repeats the same chat and users
+    in every message, so this saves most of their allocations.
+
+    Interned objects are shared between updates, so they are read-only: setting an attribute raises
+    AttributeError, a mutable copy can be made with copy.copy(). Only the de_json methods generated by
+    :mod:`telebot.schema` intern, lazily deserialized fields are parsed outside of the context.
+
+    .. code-block:: python3
+
+        types.INTERN_USERS_AND_CHATS = True
+        with types.interning():
+            updates = [types.Update.de_json(update) for update in result]
+    """
+    token = _interning.set({} if INTERN_USERS_AND_CHATS else None)
+    try:
+        yield
+    finally:
+        _interning.reset(token)
+
 
 def log_deprecation_warning(warning_message, logging_level=logging.WARNING):
     """
@@ -39,6 +95,7 @@ class JsonSerializable(object):
     Subclasses of this class are guaranteed to be able to be converted to JSON format.
     All subclasses of this class must override to_json.
     """
+    __slots__ = ()
 
     def to_json(self):
         """
@@ -57,6 +114,7 @@ class Dictionaryable(object):
     Subclasses of this class are guaranteed to be able to be converted to dictionary.
     All subclasses of this class must override to_dict.
     """
+    __slots__ = ()
 
     def to_dict(self):
         """
@@ -75,6 +133,7 @@ class JsonDeserializable(object):
     Subclasses of this class are guaranteed to be able to be created from a json-style dict or json formatted string.
     All subclasses of this class must override de_json.
     """
+    __slots__ = ()
 
     @classmethod
     def de_json(cls, json_string):
@@ -98,10 +157,11 @@ class JsonDeserializable(object):
 
         :param json_type: input json or parsed dict
         :param dict_copy: if dict is passed and it is changed outside - should be True!
+            Ignored inside :func:`fresh_json`.
         :return: Dictionary parsed from json or original dict
         """
         if service_utils.is_dict(json_type):
-            return json_type.copy() if dict_copy else json_type
+            return json_type.copy() if dict_copy and not _fresh_json.get() else json_type
         elif service_utils.is_string(json_type):
             return json.loads(json_type)
         else:
@@ -109,12 +169,80 @@ class JsonDeserializable(object):
 
     def __str__(self):
         d = {
-            x: y.__dict__ if hasattr(y, '__dict__') else y
-            for x, y in self.__dict__.items()
+            x: _attributes(y) if isinstance(y, JsonDeserializable) else y
+            for x, y in _attributes(self).items()
         }
         return str(d)
 
 
+def _attributes(obj) -> Dict[str, Any]:
+    """
+    Returns attributes of an object, including __slots__ ones.
+    """
+    attributes = {}
+    for cls in reversed(type(obj).__mro__):
+        for name in cls.__dict__.get('__slots__', ()):
+            if name not in ('__dict__', '__weakref__') and hasattr(obj, name):
+                attributes[name] = getattr(obj, name)
+    attributes.update(getattr(obj, '__dict__', {}))
+    attributes.pop('_lazy_json', None)
+    return attributes
+
+
+class _LazyField(object):
+    """
+    Class-level default of an attribute of a lazily deserialized object: parses the value from the
+    source dict of the instance on first access and stores it in the instance. Absent fields are None.
+
+    :meta private:
+    """
+    __slots__ = ('name', 'key', 'parser')
+
+    def __init__(self, name, key, parser=None):
+        self.name = name
+        self.key = key
+        self.parser = parser
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        source = instance.__dict__.get('_lazy_json')
+        if source is None:
+            return None
+        value = source.get(self.key)
+        if value is None:
+            return None
+        if isinstance(self.parser, type):
+            value = self.parser.de_json(value)
+        elif self.parser is not None:
+            value = self.parser(value)
+        instance.__dict__[self.name] = value
+        return value
+
+    @staticmethod
+    def install(cls, fields, names=None):
+        """
+        Adds lazy fields to a class.
+
+        :param fields: (JSON key, type or parser function or None) pairs
+        :param names: attribute names of keys which differ from the key
+        """
+        for key, parser in fields:
+            name = names.get(key, key) if names else key
+            setattr(cls, name, _LazyField(name, key, parser))
+
+    @staticmethod
+    def new(cls, source, **attributes):
+        """
+        Creates an instance of cls without calling __init__, with its fields deserialized lazily from source.
+        """
+        instance = cls.__new__(cls)
+        for name, value in attributes.items():
+            setattr(instance, name, value)
+        instance.__dict__['_lazy_json'] = source
+        return instance
+
+
 class Update(JsonDeserializable):
     """
     This object represents an incoming update.At most one of the optional parameters can be present in any given update.
@@ -210,11 +338,25 @@ class Update(JsonDeserializable):
     :rtype: :class:`telebot.types.Update`
 
     """
+    __slots__ = ('update_id', 'message', 'edited_message', 'channel_post', 'edited_channel_post', 'inline_query',
+                 'chosen_inline_result', 'callback_query', 'shipping_query', 'pre_checkout_query', 'poll',
+                 'poll_answer', 'my_chat_member', 'chat_member', 'chat_join_request', 'message_reaction',
+                 'message_reaction_count', 'removed_chat_boost', 'chat_boost', 'business_connection',
+                 'business_message', 'edited_business_message', 'deleted_business_messages', 'purchased_paid_media')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None: return None
         obj = cls.check_json(json_string, dict_copy=False)
         update_id = obj['update_id']
+        if LAZY_DESERIALIZATION:
+            # at most one field is present, so only present ones are deserialized (messages lazily)
+            fields = [None] * len(_UPDATE_FIELDS)
+            for key in obj:
+                field = _UPDATE_FIELD_INDEX.get(key)
+                if field is not None:
+                    fields[field] = _UPDATE_FIELDS[field][1].de_json(obj[key])
+            return cls(update_id, *fields)
         message = Message.de_json(obj.get('message'))
         edited_message = Message.de_json(obj.get('edited_message'))
         channel_post = Message.de_json(obj.get('channel_post'))
@@ -515,6 +657,10 @@ class User(JsonDeserializable, Dictionaryable, JsonSerializable):
     :return: Instance of the class
     :rtype: :class:`telebot.types.User`
     """
+    __slots__ = ('id', 'is_bot', 'first_name', 'username', 'last_name', 'language_code', 'can_join_groups',
+                 'can_read_all_group_messages', 'supports_inline_queries', 'is_premium', 'added_to_attachment_menu',
+                 'can_connect_to_business', 'has_main_web_app')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None: return None
@@ -747,6 +893,18 @@ class ChatFullInfo(JsonDeserializable):
     :return: Instance of the class
     :rtype: :class:`telebot.types.ChatFullInfo`
     """
+    __slots__ = ('id', 'type', 'title', 'username', 'first_name', 'last_name', 'is_forum', 'max_reaction_count',
+                 'photo', 'bio', 'join_to_send_messages', 'join_by_request', 'has_private_forwards',
+                 'has_restricted_voice_and_video_messages', 'description', 'invite_link', 'pinned_message',
+                 'permissions', 'slow_mode_delay', 'message_auto_delete_time', 'has_protected_content',
+                 'sticker_set_name', 'can_set_sticker_set', 'linked_chat_id', 'location', 'active_usernames',
+                 'emoji_status_custom_emoji_id', 'has_hidden_members', 'has_aggressive_anti_spam_enabled',
+                 'emoji_status_expiration_date', 'available_reactions', 'accent_color_id', 'background_custom_emoji_id',
+                 'profile_accent_color_id', 'profile_background_custom_emoji_id', 'has_visible_history',
+                 'unrestrict_boost_count', 'custom_emoji_sticker_set_name', 'business_intro', 'business_location',
+                 'business_opening_hours', 'personal_chat', 'birthdate', 'can_send_paid_media', 'accepted_gift_types',
+                 'is_direct_messages', 'parent_chat')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None: return None
@@ -861,7 +1019,41 @@ class Chat(ChatFullInfo):
 
     Currently Chat is left as full copy of ChatFullInfo for compatibility.
     """
-    pass
+    __slots__ = ()
+
+
+class _Frozen(object):
+    """
+    Base of the read-only variants of the types interned by :func:`interning`.
+
+    :meta private:
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} objects are shared between updates by types.interning() and can\'t be changed, '
+                             'change a copy.copy() of it instead'.format(type(self).__bases__[1].__name__))
+
+    def __delattr__(self, name):
+        self.__setattr__(name, None)
+
+    def __reduce_ex__(self, protocol):
+        # copies and unpickled objects are mutable instances of the interned type
+        return object.__new__, (type(self).__bases__[1],), (None, _attributes(self))
+
+
+class _FrozenUser(_Frozen, User):
+    """
+    :meta private:
+    """
+    __slots__ = ()
+
+
+class _FrozenChat(_Frozen, Chat):
+    """
+    :meta private:
+    """
+    __slots__ = ()
 
 
 class MessageID(JsonDeserializable):
@@ -1266,11 +1458,15 @@ class Message(JsonDeserializable):
     :return: Instance of the class
     :rtype: :class:`telebot.types.Message`
     """
+    __slots__ = ('content_type', 'id', 'message_id', 'date', 'json', '__dict__')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None: return None
         obj = cls.check_json(json_string, dict_copy=False)
         message_id = obj['message_id']
+        if LAZY_DESERIALIZATION:
+            return cls._de_json_lazy(obj, json_string)
         from_user = User.de_json(obj.get('from'))
         date = obj['date']
         chat = Chat.de_json(obj['chat'])
@@ -1550,6 +1746,19 @@ class Message(JsonDeserializable):
 
         return cls(message_id, from_user, date, chat, content_type, opts, json_string)
 
+    @classmethod
+    def _de_json_lazy(cls, obj, json_string):
+        # content_type is needed by every handler, so it is determined right away
+        content_type = None
+        rank = -1
+        for key in obj:
+            content = _MESSAGE_CONTENT_TYPES.get(key)
+            if content is not None and content[0] > rank:
+                rank, content_type = content
+        message_id = obj['message_id']
+        return _LazyField.new(cls, obj, content_type=content_type, id=message_id, message_id=message_id,
+                              date=obj['date'], json=json_string if RETAIN_MESSAGE_JSON else None)
+
     @classmethod
     def parse_chat(cls, chat) -> Union[User, GroupChat]:
         """
@@ -1580,6 +1789,103 @@ class Message(JsonDeserializable):
             ret.append(MessageEntity.de_json(me))
         return ret
 
+    # Optional fields are class attributes defaulting to None (see _LazyField), only present ones are set on instances
+    sender_chat: Optional[Chat]
+    is_automatic_forward: Optional[bool]
+    reply_to_message: Optional[Message]
+    via_bot: Optional[User]
+    edit_date: Optional[int]
+    has_protected_content: Optional[bool]
+    media_group_id: Optional[str]
+    author_signature: Optional[str]
+    text: Optional[str]
+    entities: Optional[List[MessageEntity]]
+    caption_entities: Optional[List[MessageEntity]]
+    audio: Optional[Audio]
+    document: Optional[Document]
+    photo: Optional[List[PhotoSize]]
+    sticker: Optional[Sticker]
+    video: Optional[Video]
+    video_note: Optional[VideoNote]
+    voice: Optional[Voice]
+    caption: Optional[str]
+    contact: Optional[Contact]
+    location: Optional[Location]
+    venue: Optional[Venue]
+    animation: Optional[Animation]
+    dice: Optional[Dice]
+    new_chat_members: Optional[List[User]]
+    left_chat_member: Optional[User]
+    new_chat_title: Optional[str]
+    new_chat_photo: Optional[List[PhotoSize]]
+    delete_chat_photo: Optional[bool]
+    group_chat_created: Optional[bool]
+    supergroup_chat_created: Optional[bool]
+    channel_chat_created: Optional[bool]
+    migrate_to_chat_id: Optional[int]
+    migrate_from_chat_id: Optional[int]
+    pinned_message: Optional[Union[Message, InaccessibleMessage]]
+    invoice: Optional[Invoice]
+    successful_payment: Optional[SuccessfulPayment]
+    connected_website: Optional[str]
+    reply_markup: Optional[InlineKeyboardMarkup]
+    message_thread_id: Optional[int]
+    is_topic_message: Optional[bool]
+    chat_background_set: Optional[ChatBackground]
+    forum_topic_created: Optional[ForumTopicCreated]
+    forum_topic_closed: Optional[ForumTopicClosed]
+    forum_topic_reopened: Optional[ForumTopicReopened]
+    has_media_spoiler: Optional[bool]
+    forum_topic_edited: Optional[ForumTopicEdited]
+    general_forum_topic_hidden: Optional[GeneralForumTopicHidden]
+    general_forum_topic_unhidden: Optional[GeneralForumTopicUnhidden]
+    write_access_allowed: Optional[WriteAccessAllowed]
+    users_shared: Optional[UsersShared]
+    chat_shared: Optional[ChatShared]
+    story: Optional[Story]
+    external_reply: Optional[ExternalReplyInfo]
+    quote: Optional[TextQuote]
+    link_preview_options: Optional[LinkPreviewOptions]
+    giveaway_created: Optional[GiveawayCreated]
+    giveaway: Optional[Giveaway]
+    giveaway_winners: Optional[GiveawayWinners]
+    giveaway_completed: Optional[GiveawayCompleted]
+    forward_origin: Optional[MessageOrigin]
+    boost_added: Optional[ChatBoostAdded]
+    sender_boost_count: Optional[int]
+    reply_to_story: Optional[Story]
+    sender_business_bot: Optional[User]
+    business_connection_id: Optional[str]
+    is_from_offline: Optional[bool]
+    effect_id: Optional[str]
+    show_caption_above_media: Optional[bool]
+    paid_media: Optional[PaidMediaInfo]
+    refunded_payment: Optional[RefundedPayment]
+    proximity_alert_triggered: Optional[ProximityAlertTriggered]
+    video_chat_scheduled: Optional[VideoChatScheduled]
+    video_chat_started: Optional[VideoChatStarted]
+    video_chat_ended: Optional[VideoChatEnded]
+    video_chat_participants_invited: Optional[VideoChatParticipantsInvited]
+    web_app_data: Optional[WebAppData]
+    message_auto_delete_timer_changed: Optional[MessageAutoDeleteTimerChanged]
+    gift: Optional[GiftInfo]
+    unique_gift: Optional[UniqueGiftInfo]
+    paid_message_price_changed: Optional[PaidMessagePriceChanged]
+    paid_star_count: Optional[int]
+    checklist: Optional[Checklist]
+    checklist_tasks_done: Optional[ChecklistTasksDone]
+    checklist_tasks_added: Optional[List[ChecklistTasksAdded]]
+    direct_message_price_changed: Optional[DirectMessagePriceChanged]
+    reply_to_checklist_task_id: Optional[int]
+    direct_messages_topic: Optional[DirectMessagesTopic]
+    is_paid_post: Optional[bool]
+    suggested_post_info: Optional[SuggestedPostInfo]
+    suggested_post_approved: Optional[SuggestedPostApproved]
+    suggested_post_approval_failed: Optional[SuggestedPostApprovalFailed]
+    suggested_post_declined: Optional[SuggestedPostDeclined]
+    suggested_post_paid: Optional[SuggestedPostPaid]
+    suggested_post_refunded: Optional[SuggestedPostRefunded]
+
     def __init__(self, message_id, from_user, date, chat, content_type, options, json_string):
         self.content_type: str = content_type
         self.id: int = message_id           # Lets fix the telegram usability ####up with ID in Message :)
@@ -1587,105 +1893,10 @@ class Message(JsonDeserializable):
         self.from_user: Optional[User] = from_user
         self.date: int = date
         self.chat: Chat = chat
-        self.sender_chat: Optional[Chat] = None
-        self.is_automatic_forward: Optional[bool] = None
-        self.reply_to_message: Optional[Message] = None
-        self.via_bot: Optional[User] = None
-        self.edit_date: Optional[int] = None
-        self.has_protected_content: Optional[bool] = None
-        self.media_group_id: Optional[str] = None
-        self.author_signature: Optional[str] = None
-        self.text: Optional[str] = None
-        self.entities: Optional[List[MessageEntity]] = None
-        self.caption_entities: Optional[List[MessageEntity]] = None
-        self.audio: Optional[Audio] = None
-        self.document: Optional[Document] = None
-        self.photo: Optional[List[PhotoSize]] = None
-        self.sticker: Optional[Sticker] = None
-        self.video: Optional[Video] = None
-        self.video_note: Optional[VideoNote] = None
-        self.voice: Optional[Voice] = None
-        self.caption: Optional[str] = None
-        self.contact: Optional[Contact] = None
-        self.location: Optional[Location] = None
-        self.venue: Optional[Venue] = None
-        self.animation: Optional[Animation] = None
-        self.dice: Optional[Dice] = None
-        self.new_chat_members: Optional[List[User]] = None
-        self.left_chat_member: Optional[User] = None
-        self.new_chat_title: Optional[str] = None
-        self.new_chat_photo: Optional[List[PhotoSize]] = None
-        self.delete_chat_photo: Optional[bool] = None
-        self.group_chat_created: Optional[bool] = None
-        self.supergroup_chat_created: Optional[bool] = None
-        self.channel_chat_created: Optional[bool] = None
-        self.migrate_to_chat_id: Optional[int] = None
-        self.migrate_from_chat_id: Optional[int] = None
-        self.pinned_message: Optional[Union[Message, InaccessibleMessage]] = None
-        self.invoice: Optional[Invoice] = None
-        self.successful_payment: Optional[SuccessfulPayment] = None
-        self.connected_website: Optional[str] = None
-        self.reply_markup: Optional[InlineKeyboardMarkup] = None
-        self.message_thread_id: Optional[int] = None
-        self.is_topic_message: Optional[bool] = None
-        self.chat_background_set: Optional[ChatBackground] = None
-        self.forum_topic_created: Optional[ForumTopicCreated] = None
-        self.forum_topic_closed: Optional[ForumTopicClosed] = None
-        self.forum_topic_reopened: Optional[ForumTopicReopened] = None
-        self.has_media_spoiler: Optional[bool] = None
-        self.forum_topic_edited: Optional[ForumTopicEdited] = None
-        self.general_forum_topic_hidden: Optional[GeneralForumTopicHidden] = None
-        self.general_forum_topic_unhidden: Optional[GeneralForumTopicUnhidden] = None
-        self.write_access_allowed: Optional[WriteAccessAllowed] = None
-        self.users_shared: Optional[UsersShared] = None
-        self.chat_shared: Optional[ChatShared] = None
-        self.story: Optional[Story] = None
-        self.external_reply: Optional[ExternalReplyInfo] = None
-        self.quote: Optional[TextQuote] = None
-        self.link_preview_options: Optional[LinkPreviewOptions] = None
-        self.giveaway_created: Optional[GiveawayCreated] = None
-        self.giveaway: Optional[Giveaway] = None
-        self.giveaway_winners: Optional[GiveawayWinners] = None
-        self.giveaway_completed: Optional[GiveawayCompleted] = None
-        self.forward_origin: Optional[MessageOrigin] = None
-        self.boost_added: Optional[ChatBoostAdded] = None
-        self.sender_boost_count: Optional[int] = None
-        self.reply_to_story: Optional[Story] = None
-        self.sender_business_bot: Optional[User] = None
-        self.business_connection_id: Optional[str] = None
-        self.is_from_offline: Optional[bool] = None
-        self.effect_id: Optional[str] = None
-        self.show_caption_above_media: Optional[bool] = None
-        self.paid_media : Optional[PaidMediaInfo] = None
-        self.refunded_payment : Optional[RefundedPayment] = None
-        self.proximity_alert_triggered: Optional[ProximityAlertTriggered] = None
-        self.video_chat_scheduled: Optional[VideoChatScheduled] = None
-        self.video_chat_started: Optional[VideoChatStarted] = None
-        self.video_chat_ended: Optional[VideoChatEnded] = None
-        self.video_chat_participants_invited: Optional[VideoChatParticipantsInvited] = None
-        self.web_app_data: Optional[WebAppData] = None
-        self.message_auto_delete_timer_changed: Optional[MessageAutoDeleteTimerChanged] = None
-        self.gift : Optional[GiftInfo] = None
-        self.unique_gift : Optional[UniqueGiftInfo] = None
-        self.paid_message_price_changed: Optional[PaidMessagePriceChanged] = None
-        self.paid_star_count: Optional[int] = None
-        self.checklist: Optional[Checklist] = None
-        self.checklist_tasks_done: Optional[ChecklistTasksDone] = None
-        self.checklist_tasks_added: Optional[List[ChecklistTasksAdded]] = None
-        self.direct_message_price_changed: Optional[DirectMessagePriceChanged] = None
-        self.reply_to_checklist_task_id: Optional[int] = None
-        self.direct_messages_topic: Optional[DirectMessagesTopic] = None
-        self.is_paid_post: Optional[bool] = None
-        self.suggested_post_info: Optional[SuggestedPostInfo] = None
-        self.suggested_post_approved: Optional[SuggestedPostApproved] = None
-        self.suggested_post_approval_failed: Optional[SuggestedPostApprovalFailed] = None
-        self.suggested_post_declined: Optional[SuggestedPostDeclined] = None
-        self.suggested_post_paid: Optional[SuggestedPostPaid] = None
-        self.suggested_post_refunded: Optional[SuggestedPostRefunded] = None
 
         for key in options:
             setattr(self, key, options[key])
-        self.json = json_string
+        self.json = json_string if RETAIN_MESSAGE_JSON else None
 
     @property
     def html_text(self) -> Optional[str]:
@@ -1826,6 +2037,8 @@ class MessageEntity(Dictionaryable, JsonSerializable, JsonDeserializable):
     :return: Instance of the class
     :rtype: :class:`telebot.types.MessageEntity`
     """
+    __slots__ = ('type', 'offset', 'length', 'url', 'user', 'language', 'custom_emoji_id')
+
     @staticmethod
     def to_list_of_dicts(entity_list) -> Union[List[Dict], None]:
         """
@@ -1926,6 +2139,8 @@ class PhotoSize(JsonDeserializable):
     :return: Instance of the class
     :rtype: :class:`telebot.types.PhotoSize`
     """
+    __slots__ = ('file_id', 'file_unique_id', 'width', 'height', 'file_size')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None: return None
@@ -2677,6 +2892,15 @@ class ReplyKeyboardMarkup(JsonSerializable):
             json_dict['is_persistent'] = self.is_persistent
         return json.dumps(json_dict)
 
+    def freeze(self) -> 'FrozenMarkup':
+        """
+        Returns an immutable copy of the markup which is serialized once, see :class:`telebot.types.FrozenMarkup`.
+
+        :return: frozen markup
+        :rtype: :class:`telebot.types.FrozenMarkup`
+        """
+        return FrozenMarkup(self)
+
 
 # noinspection PyShadowingBuiltins
 class KeyboardButtonPollType(Dictionaryable):
@@ -3049,6 +3273,69 @@ class InlineKeyboardMarkup(Dictionaryable, JsonSerializable, JsonDeserializable)
         json_dict['inline_keyboard'] = [[button.to_dict() for button in row] for row in self.keyboard]
         return json_dict
 
+    def freeze(self) -> 'FrozenMarkup':
+        """
+        Returns an immutable copy of the markup which is serialized once, see :class:`telebot.types.FrozenMarkup`.
+
+        :return: frozen markup
+        :rtype: :class:`telebot.types.FrozenMarkup`
+        """
+        return FrozenMarkup(self)
+
+
+class FrozenMarkup(Dictionaryable, JsonSerializable):
+    """
+    Immutable reply markup with precomputed JSON, for markups sent many times. Accepted everywhere reply_markup is.
+
+    .. code-block:: python3
+        :caption: Example of a frozen markup
+
+        from telebot.util import quick_markup
+
+        MENU = quick_markup({
+            'Orders': {'callback_data': 'orders'},
+            'Settings': {'callback_data': 'settings'}
+        }).freeze()
+
+        bot.send_message(chat_id, 'Menu', reply_markup=MENU)
+
+    :param markup: markup to freeze: :class:`telebot.types.InlineKeyboardMarkup`, :class:`telebot.types.ReplyKeyboardMarkup`,
+        :class:`telebot.types.ReplyKeyboardRemove` or :class:`telebot.types.ForceReply`. Later changes of it don't
+        affect the frozen markup.
+    :type markup: :class:`telebot.types.JsonSerializable`
+
+    :return: Instance of the class
+    :rtype: :class:`telebot.types.FrozenMarkup`
+    """
+    __slots__ = ('_json',)
+
+    def __init__(self, markup: JsonSerializable):
+        object.__setattr__(self, '_json', markup.to_json())
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FrozenMarkup can\'t be changed')
+
+    def __reduce__(self):
+        return _frozen_markup, (self._json,)
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenMarkup) and other._json == self._json
+
+    def __hash__(self):
+        return hash(self._json)
+
+    def to_json(self):
+        return self._json
+
+    def to_dict(self):
+        return json.loads(self._json)
+
+
+def _frozen_markup(json_string):
+    markup = object.__new__(FrozenMarkup)
+    object.__setattr__(markup, '_json', json_string)
+    return markup
+
 
 class InlineKeyboardButton(Dictionaryable, JsonSerializable, JsonDeserializable):
     """
@@ -3254,6 +3541,8 @@ class CallbackQuery(JsonDeserializable):
     :return: Instance of the class
     :rtype: :class:`telebot.types.CallbackQuery`
     """
+    __slots__ = ('id', 'from_user', 'message', 'inline_message_id', 'chat_instance', 'data', 'game_short_name', 'json')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None: return None
@@ -3282,7 +3571,7 @@ class CallbackQuery(JsonDeserializable):
         self.chat_instance: Optional[str] = chat_instance
         self.data: Optional[str] = data
         self.game_short_name: Optional[str] = game_short_name
-        self.json = json_string
+        self.json = json_string if RETAIN_MESSAGE_JSON else None
 
 
 class ChatPhoto(JsonDeserializable):
@@ -5605,7 +5894,7 @@ class InlineQueryResultGame(InlineQueryResultBase):
         return json_dict
 
 
-class InlineQueryResultCachedBase(ABC, JsonSerializable):
+class InlineQueryResultCachedBase(ABC, Dictionaryable, JsonSerializable):
     """
     Base class of all InlineQueryResultCached* classes.
     """
@@ -5624,7 +5913,10 @@ class InlineQueryResultCachedBase(ABC, JsonSerializable):
         self.show_caption_above_media: Optional[bool] = None
 
     def to_json(self):
-        json_dict = self.payload_dic
+        return json.dumps(self.to_dict())
+
+    def to_dict(self):
+        json_dict = dict(self.payload_dic)
         json_dict['type'] = self.type
         json_dict['id'] = self.id
         if self.title:
@@ -5643,7 +5935,7 @@ class InlineQueryResultCachedBase(ABC, JsonSerializable):
             json_dict['caption_entities'] = MessageEntity.to_list_of_dicts(self.caption_entities)
         if self.show_caption_above_media is not None:
             json_dict['show_caption_above_media'] = self.show_caption_above_media
-        return json.dumps(json_dict)
+        return json_dict
 
 
 # noinspection PyUnresolvedReferences,PyShadowingBuiltins
@@ -6426,7 +6718,7 @@ class OrderInfo(JsonDeserializable):
 
 
 # noinspection PyUnresolvedReferences,PyShadowingBuiltins
-class ShippingOption(JsonSerializable):
+class ShippingOption(Dictionaryable, JsonSerializable):
     """
     This object represents one shipping option.
 
@@ -6463,11 +6755,10 @@ class ShippingOption(JsonSerializable):
         return self
 
     def to_json(self):
-        price_list = []
-        for p in self.prices:
-            price_list.append(p.to_dict())
-        json_dict = json.dumps({'id': self.id, 'title': self.title, 'prices': price_list})
-        return json_dict
+        return json.dumps(self.to_dict())
+
+    def to_dict(self):
+        return {'id': self.id, 'title': self.title, 'prices': [price.to_dict() for price in self.prices]}
 
 
 class SuccessfulPayment(JsonDeserializable):
@@ -13241,6 +13532,158 @@ class SuggestedPostRefunded(JsonDeserializable):
         if 'suggested_post_message' in obj:
             obj['suggested_post_message'] = Message.de_json(obj['suggested_post_message'])
         return cls(**obj)
-    
 
-    
\ No newline at end of file
+
+def _parse_users(users):
+    return [User.de_json(user) for user in users]
+
+
+def _parse_maybe_inaccessible_message(message):
+    if message['date'] == 0:
+        # date.	Always 0. The field can be used to differentiate regular and inaccessible messages.
+        return InaccessibleMessage.de_json(message)
+    return Message.de_json(message)
+
+
+# Fields of lazily deserialized objects, see LAZY_DESERIALIZATION: (JSON key, type or parser function or None,
+# content type or None), in the order of the constructor arguments (Update) or of Message.de_json (the last
+# content type present wins).
+_UPDATE_FIELDS = (
+    ('message', Message),
+    ('edited_message', Message),
+    ('channel_post', Message),
+    ('edited_channel_post', Message),
+    ('inline_query', InlineQuery),
+    ('chosen_inline_result', ChosenInlineResult),
+    ('callback_query', CallbackQuery),
+    ('shipping_query', ShippingQuery),
+    ('pre_checkout_query', PreCheckoutQuery),
+    ('poll', Poll),
+    ('poll_answer', PollAnswer),
+    ('my_chat_member', ChatMemberUpdated),
+    ('chat_member', ChatMemberUpdated),
+    ('chat_join_request', ChatJoinRequest),
+    ('message_reaction', MessageReactionUpdated),
+    ('message_reaction_count', MessageReactionCountUpdated),
+    ('removed_chat_boost', ChatBoostRemoved),
+    ('chat_boost', ChatBoostUpdated),
+    ('business_connection', BusinessConnection),
+    ('business_message', Message),
+    ('edited_business_message', Message),
+    ('deleted_business_messages', BusinessMessagesDeleted),
+    ('purchased_paid_media', PaidMediaPurchased),
+)
+
+_MESSAGE_FIELDS = (
+    ('from', User, None),
+    ('chat', Chat, None),
+    ('sender_chat', Chat, None),
+    ('is_automatic_forward', None, None),
+    ('is_topic_message', None, None),
+    ('message_thread_id', None, None),
+    ('reply_to_message', Message, None),
+    ('via_bot', User, None),
+    ('edit_date', None, None),
+    ('has_protected_content', None, None),
+    ('media_group_id', None, None),
+    ('author_signature', None, None),
+    ('text', None, 'text'),
+    ('entities', Message.parse_entities, None),
+    ('caption_entities', Message.parse_entities, None),
+    ('audio', Audio, 'audio'),
+    ('document', Document, 'document'),
+    ('animation', Animation, 'animation'),
+    ('game', Game, 'game'),
+    ('photo', Message.parse_photo, 'photo'),
+    ('sticker', Sticker, 'sticker'),
+    ('video', Video, 'video'),
+    ('video_note', VideoNote, 'video_note'),
+    ('voice', Audio, 'voice'),
+    ('caption', None, None),
+    ('contact', Contact, 'contact'),
+    ('location', Location, 'location'),
+    ('venue', Venue, 'venue'),
+    ('dice', Dice, 'dice'),
+    ('new_chat_members', _parse_users, 'new_chat_members'),
+    ('left_chat_member', User, 'left_chat_member'),
+    ('new_chat_title', None, 'new_chat_title'),
+    ('new_chat_photo', Message.parse_photo, 'new_chat_photo'),
+    ('delete_chat_photo', None, 'delete_chat_photo'),
+    ('group_chat_created', None, 'group_chat_created'),
+    ('supergroup_chat_created', None, 'supergroup_chat_created'),
+    ('channel_chat_created', None, 'channel_chat_created'),
+    ('migrate_to_chat_id', None, 'migrate_to_chat_id'),
+    ('migrate_from_chat_id', None, 'migrate_from_chat_id'),
+    ('pinned_message', _parse_maybe_inaccessible_message, 'pinned_message'),
+    ('invoice', Invoice, 'invoice'),
+    ('successful_payment', SuccessfulPayment, 'successful_payment'),
+    ('connected_website', None, 'connected_website'),
+    ('poll', Poll, 'poll'),
+    ('passport_data', None, 'passport_data'),
+    ('proximity_alert_triggered', ProximityAlertTriggered, 'proximity_alert_triggered'),
+    ('video_chat_scheduled', VideoChatScheduled, 'video_chat_scheduled'),
+    ('video_chat_started', VideoChatStarted, 'video_chat_started'),
+    ('video_chat_ended', VideoChatEnded, 'video_chat_ended'),
+    ('video_chat_participants_invited', VideoChatParticipantsInvited, 'video_chat_participants_invited'),
+    ('web_app_data', WebAppData, 'web_app_data'),
+    ('message_auto_delete_timer_changed', MessageAutoDeleteTimerChanged, 'message_auto_delete_timer_changed'),
+    ('reply_markup', InlineKeyboardMarkup, None),
+    ('chat_background_set', ChatBackground, 'chat_background_set'),
+    ('forum_topic_created', ForumTopicCreated, 'forum_topic_created'),
+    ('forum_topic_closed', ForumTopicClosed, 'forum_topic_closed'),
+    ('forum_topic_reopened', ForumTopicReopened, 'forum_topic_reopened'),
+    ('has_media_spoiler', None, None),
+    ('forum_topic_edited', ForumTopicEdited, 'forum_topic_edited'),
+    ('general_forum_topic_hidden', GeneralForumTopicHidden, 'general_forum_topic_hidden'),
+    ('general_forum_topic_unhidden', GeneralForumTopicUnhidden, 'general_forum_topic_unhidden'),
+    ('write_access_allowed', WriteAccessAllowed, 'write_access_allowed'),
+    ('users_shared', UsersShared, 'users_shared'),
+    ('chat_shared', ChatShared, 'chat_shared'),
+    ('story', Story, 'story'),
+    ('external_reply', ExternalReplyInfo, None),
+    ('quote', TextQuote, None),
+    ('link_preview_options', LinkPreviewOptions, None),
+    ('giveaway_created', GiveawayCreated, 'giveaway_created'),
+    ('giveaway', Giveaway, 'giveaway'),
+    ('giveaway_winners', GiveawayWinners, 'giveaway_winners'),
+    ('giveaway_completed', GiveawayCompleted, 'giveaway_completed'),
+    ('forward_origin', MessageOrigin, None),
+    ('boost_added', ChatBoostAdded, 'boost_added'),
+    ('sender_boost_count', None, None),
+    ('reply_to_story', Story, None),
+    ('sender_business_bot', User, None),
+    ('business_connection_id', None, None),
+    ('is_from_offline', None, None),
+    ('effect_id', None, None),
+    ('show_caption_above_media', None, None),
+    ('paid_media', PaidMediaInfo, None),
+    ('refunded_payment', RefundedPayment, None),
+    ('gift', GiftInfo, 'gift'),
+    ('unique_gift', UniqueGiftInfo, 'unique_gift'),
+    ('paid_message_price_changed', PaidMessagePriceChanged, 'paid_message_price_changed'),
+    ('paid_star_count', None, None),
+    ('checklist', Checklist, None),
+    ('checklist_tasks_done', ChecklistTasksDone, 'checklist_tasks_done'),
+    ('checklist_tasks_added', ChecklistTasksAdded, 'checklist_tasks_added'),
+    ('direct_message_price_changed', DirectMessagePriceChanged, 'direct_message_price_changed'),
+    ('reply_to_checklist_task_id', None, None),
+    ('direct_messages_topic', DirectMessagesTopic, None),
+    ('is_paid_post', None, None),
+    ('suggested_post_info', SuggestedPostInfo, 'suggested_post_info'),
+    ('suggested_post_approved', SuggestedPostApproved, 'suggested_post_approved'),
+    ('suggested_post_approval_failed', SuggestedPostApprovalFailed, 'suggested_post_approval_failed'),
+    ('suggested_post_declined', SuggestedPostDeclined, 'suggested_post_declined'),
+    ('suggested_post_paid', SuggestedPostPaid, 'suggested_post_paid'),
+    ('suggested_post_refunded', SuggestedPostRefunded, 'suggested_post_refunded'),
+)
+
+_UPDATE_FIELD_INDEX = {key: index for index, (key, _) in enumerate(_UPDATE_FIELDS)}
+
+_MESSAGE_CONTENT_TYPES = {
+    key: (rank, content_type) for rank, (key, _, content_type) in enumerate(_MESSAGE_FIELDS) if content_type}
+
+_LazyField.install(Message, ((key, parser) for key, parser, _ in _MESSAGE_FIELDS), {'from': 'from_user'})
+
+# generated de_json methods of the most frequently deserialized types
+from telebot import schema  # noqa: E402
+schema.install()
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+import inspect
 import re
 import threading
+import time
 import traceback
 from typing import Any, Callable, List, Dict, Optional, Union
 import hmac
@@ -62,7 +64,7 @@ class WorkerThread(threading.Thread):
     """
     count = 0
 
-    def __init__(self, exception_callback=None, queue=None, name=None):
+    def __init__(self, exception_callback=None, queue=None, name=None, idle_callback=None):
         if not name:
             name = "WorkerThread{0}".format(self.__class__.count + 1)
             self.__class__.count += 1
@@ -80,6 +82,9 @@ class WorkerThread(threading.Thread):
 
         self.exception_callback = exception_callback
         self.exception_info = None
+        # called as idle_callback(worker, idle_seconds) when no task arrives, the thread exits if it returns True
+        self.idle_callback = idle_callback
+        self.last_active = time.monotonic()
         self._running = True
         self.start()
 
@@ -98,7 +103,9 @@ class WorkerThread(threading.Thread):
                 logger.debug("Task complete")
                 self.done_event.set()
             except Queue.Empty:
-                pass
+                if self.idle_callback and self.idle_callback(self, time.monotonic() - self.last_active):
+                    self._running = False
+                continue
             except Exception as e:
                 logger.debug(type(e).__name__ + " occurred, args=" + str(e.args) + "\n" + traceback.format_exc())
                 self.exception_info = e
@@ -106,6 +113,7 @@ class WorkerThread(threading.Thread):
                 if self.exception_callback:
                     self.exception_callback(self, self.exception_info)
                 self.continue_event.wait()
+            self.last_active = time.monotonic()
 
     def put(self, task, *args, **kwargs):
         self.queue.put((task, args, kwargs))
@@ -124,20 +132,168 @@ class WorkerThread(threading.Thread):
 
 class ThreadPool:
     """
+    Pool of worker threads sharing one task queue.
+
+    If `max_queue_size` is set, :meth:`wait_for_capacity` blocks while that many tasks are waiting in the queue,
+    which the threaded polling uses to stop requesting updates until the workers catch up. Putting tasks
+    never blocks, so a batch of updates is always queued as a whole.
+
+    If `max_threads` is greater than `num_threads`, the pool is elastic: a thread is added when more tasks are
+    queued than there are idle threads, or when a task waited in the queue longer than `scale_up_wait` seconds,
+    up to `max_threads`. Threads idle for `idle_timeout` seconds are retired down to `num_threads`.
+
+    Statistics: `queue_depth` is the number of queued tasks not yet started, `high_water_mark` the maximum depth
+    reached, `blocked_time` the total seconds spent waiting for capacity, `blocked_count` the number of waits
+    that had to block, `busy_workers` the number of threads running a task, `tasks_started`, `queue_wait_time`
+    (total) and `max_queue_wait` the time tasks spent in the queue, `scaled_up` and `scaled_down` the number
+    of threads added and retired.
+
     :meta private:
     """
 
-    def __init__(self, telebot, num_threads=2):
+    def __init__(self, telebot, num_threads=2, max_queue_size=0, max_threads=None, idle_timeout=60, scale_up_wait=0.1):
         self.telebot = telebot
         self.tasks = Queue.Queue()
-        self.workers = [WorkerThread(self.on_exception, self.tasks) for _ in range(num_threads)]
         self.num_threads = num_threads
+        self.max_threads = max(max_threads or num_threads, num_threads)
+        self.idle_timeout = idle_timeout
+        self.scale_up_wait = scale_up_wait
+        self._init_stats(max_queue_size)
+        self.workers = [self._new_worker() for _ in range(num_threads)]
 
         self.exception_event = threading.Event()
         self.exception_info = None
 
+    def _init_stats(self, max_queue_size):
+        self.max_queue_size = max_queue_size
+        self.queue_depth = 0
+        self.high_water_mark = 0
+        self.blocked_time = 0.0
+        self.blocked_count = 0
+        self.busy_workers = 0
+        self.tasks_started = 0
+        self.queue_wait_time = 0.0
+        self.max_queue_wait = 0.0
+        self.scaled_up = 0
+        self.scaled_down = 0
+        self.capacity = threading.Condition()
+        # telebot.metrics.Metrics, set by TeleBot.enable_metrics
+        self.metrics = None
+
+    @property
+    def elastic(self) -> bool:
+        return self.max_threads > self.num_threads
+
+    def _new_worker(self):
+        return WorkerThread(self.on_exception, self.tasks, idle_callback=self.on_idle if self.elastic else None)
+
+    def _scale_up(self, reason):
+        # must be called with self.capacity held
+        self.workers.append(self._new_worker())
+        self.scaled_up += 1
+        logger.info('Worker pool scaled up to %s threads: %s', len(self.workers), reason)
+
+    def _scale_if_busy(self):
+        # must be called with self.capacity held
+        idle_workers = len(self.workers) - self.busy_workers
+        if self.elastic and self.queue_depth > idle_workers and len(self.workers) < self.max_threads:
+            self._scale_up('{} tasks queued, {} of {} threads busy'.format(
+                self.queue_depth, self.busy_workers, len(self.workers)))
+
+    def on_idle(self, worker_thread, idle_time) -> bool:
+        """
+        Called by an idle worker thread, returns True if the thread should exit.
+        """
+        if idle_time < self.idle_timeout:
+            return False
+        with self.capacity:
+            if len(self.workers) <= self.num_threads or worker_thread not in self.workers:
+                return False
+            self.workers.remove(worker_thread)
+            self.scaled_down += 1
+            logger.info('Worker pool scaled down to %s threads: %s idle for %.1fs',
+                        len(self.workers), worker_thread.name, idle_time)
+        return True
+
+    def _task_queued(self):
+        with self.capacity:
+            self.queue_depth += 1
+            if self.queue_depth > self.high_water_mark:
+                self.high_water_mark = self.queue_depth
+            self._scale_if_busy()
+
+    def _run_task(self, enqueued_at, func, args, kwargs):
+        queue_wait = time.monotonic() - enqueued_at
+        with self.capacity:
+            self.queue_depth -= 1
+            self.busy_workers += 1
+            self.tasks_started += 1
+            self.queue_wait_time += queue_wait
+            if queue_wait > self.max_queue_wait:
+                self.max_queue_wait = queue_wait
+            if self.queue_depth < self.max_queue_size:
+                self.capacity.notify_all()
+            if (self.elastic and queue_wait > self.scale_up_wait and self.queue_depth
+                    and len(self.workers) < self.max_threads):
+                self._scale_up('task waited {:.3f}s in queue'.format(queue_wait))
+            else:
+                self._scale_if_busy()
+        if self.metrics is not None:
+            self.metrics.observe_queue_wait(queue_wait)
+        try:
+            func(*args, **kwargs)
+        finally:
+            with self.capacity:
+                self.busy_workers -= 1
+
+    def has_capacity(self) -> bool:
+        return not self.max_queue_size or self.queue_depth < self.max_queue_size
+
+    def wait_for_capacity(self, timeout=None, interrupt=None) -> bool:
+        """
+        Blocks until fewer than `max_queue_size` tasks are queued, a worker raised an unhandled exception
+        or `interrupt` is set (the waiting thread must be woken up with :meth:`wake_up` after setting it).
+
+        :param timeout: maximum time to wait in seconds, None to wait without a timeout
+        :param interrupt: :class:`threading.Event` which ends the wait
+        :return: True if there is capacity
+        """
+        def done():
+            return (self.has_capacity() or self.exception_event.is_set()
+                    or (interrupt is not None and interrupt.is_set()))
+
+        with self.capacity:
+            if done():
+                return self.has_capacity()
+            self.blocked_count += 1
+            started = time.monotonic()
+            try:
+                self.capacity.wait_for(done, timeout)
+                return self.has_capacity()
+            finally:
+                self.blocked_time += time.monotonic() - started
+
+    def wait_for_result(self, pending_result, timeout=None) -> bool:
+        """
+        Blocks until `pending_result` (a :class:`PendingResult`) is done or a worker raised an unhandled exception.
+
+        :param timeout: maximum time to wait in seconds, None to wait without a timeout
+        :return: True if the result is done
+        """
+        with self.capacity:
+            self.capacity.wait_for(lambda: pending_result.done or self.exception_event.is_set(), timeout)
+            return pending_result.done
+
+    def wake_up(self):
+        """
+        Wakes up threads waiting in :meth:`wait_for_capacity` to check their `interrupt` event.
+        """
+        with self.capacity:
+            self.capacity.notify_all()
+
     def put(self, func, *args, **kwargs):
-        self.tasks.put((func, args, kwargs))
+        self._task_queued()
+        self.tasks.put((self._run_task, (time.monotonic(), func, args, kwargs), {}))
 
     def on_exception(self, worker_thread, exc_info):
         if self.telebot.exception_handler is not None:
@@ -147,6 +303,7 @@ class ThreadPool:
         if not handled:
             self.exception_info = exc_info
             self.exception_event.set()
+            self.wake_up()
         worker_thread.continue_event.set()
 
     def raise_exceptions(self):
@@ -157,13 +314,221 @@ class ThreadPool:
         self.exception_event.clear()
 
     def close(self):
-        for worker in self.workers:
+        with self.capacity:
+            workers = list(self.workers)
+        for worker in workers:
             worker.stop()
-        for worker in self.workers:
+        for worker in workers:
             if worker != threading.current_thread():
                 worker.join()
 
 
+class OrderedThreadPool(ThreadPool):
+    """
+    Thread pool that runs tasks of the same chat in order.
+
+    Every worker has its own queue (lane). Tasks are routed to a lane by the chat (or user, for updates
+    without a chat, e.g. inline queries) of the update passed as their first argument, so updates of one
+    chat are processed one at a time in the order they were received, while different chats are
+    processed in parallel. Tasks without a chat or user are distributed over the lanes in turn.
+
+    :meta private:
+    """
+
+    def __init__(self, telebot, num_threads=2, max_queue_size=0):
+        self.telebot = telebot
+        self.workers = [WorkerThread(self.on_exception) for _ in range(num_threads)]
+        # Lanes are fixed, resizing the pool would move chats to other lanes and break their order
+        self.num_threads = self.max_threads = num_threads
+        self._next_lane = 0
+        self._init_stats(max_queue_size)
+
+        self.exception_event = threading.Event()
+        self.exception_info = None
+
+    @staticmethod
+    def routing_key(update):
+        """
+        Returns the chat id (or user id) the update belongs to, None if there is none.
+        """
+        chat = getattr(update, 'chat', None)
+        if chat is None:
+            # e.g. CallbackQuery
+            chat = getattr(getattr(update, 'message', None), 'chat', None)
+        if chat is not None:
+            return chat.id
+        user = getattr(update, 'from_user', None) or getattr(update, 'user', None)
+        if user is not None:
+            return user.id
+        return None
+
+    def lane_for(self, key):
+        if key is None:
+            lane = self._next_lane
+            self._next_lane = (lane + 1) % self.num_threads
+            return lane
+        return hash(key) % self.num_threads
+
+    def put(self, func, *args, **kwargs):
+        key = self.routing_key(args[0]) if args else None
+        self._task_queued()
+        self.workers[self.lane_for(key)].put(self._run_task, time.monotonic(), func, args, kwargs)
+
+
+class HandlerIndex:
+    """
+    Dispatch index for a list of handler dicts.
+
+    Handlers are bucketed by their ``content_types``, ``commands`` and ``chat_types`` filters, so only
+    handlers that can possibly match a message are tested. Candidates are yielded in registration order
+    together with the filters that still have to be checked.
+
+    :meta private:
+    """
+    indexed_filters = ('content_types', 'commands', 'chat_types')
+    not_a_command = object()
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.size = len(handlers)
+        self.entries = []
+        self.all_handlers = (1 << self.size) - 1
+        # filter name -> ({filter value: handlers bitmask}, bitmask of handlers without that filter)
+        self.buckets = {message_filter: ({}, 0) for message_filter in self.indexed_filters}
+
+        for position, handler in enumerate(handlers):
+            if 'caller' not in handler:
+                # handler dicts which were not created by _build_handler_dict
+                handler['caller'] = compile_handler_call(handler['function'], handler.get('pass_bot', False))
+            indexed, residual = self._split_filters(handler['filters'])
+            filters = tuple((message_filter, filter_value) for message_filter, filter_value in handler['filters'].items()
+                            if filter_value is not None)
+            self.entries.append((handler, tuple(residual.items()), filters))
+            bit = 1 << position
+            for message_filter in self.indexed_filters:
+                by_value, unfiltered = self.buckets[message_filter]
+                if message_filter in indexed:
+                    for value in indexed[message_filter]:
+                        by_value[value] = by_value.get(value, 0) | bit
+                else:
+                    self.buckets[message_filter] = (by_value, unfiltered | bit)
+
+        # Drop dimensions no handler filters on, they can't narrow anything down
+        self.buckets = {
+            message_filter: bucket for message_filter, bucket in self.buckets.items() if bucket[0]
+        }
+
+    def _split_filters(self, filters):
+        """
+        Splits filters into indexed ones and those which have to be tested one by one.
+        Only filters preceding the first non-indexed one are indexed, so custom filters and `func`
+        are never called for a message they wouldn't have been called for before.
+        """
+        indexed = {}
+        residual = {}
+        for message_filter, filter_value in filters.items():
+            if filter_value is None:
+                continue
+            if not residual and message_filter in self.indexed_filters and isinstance(filter_value, (list, tuple, set, frozenset)):
+                try:
+                    indexed[message_filter] = frozenset(filter_value)
+                    continue
+                except TypeError:
+                    # unhashable values, test them the regular way
+                    pass
+            residual[message_filter] = filter_value
+        return indexed, residual
+
+    def is_valid_for(self, handlers) -> bool:
+        return self.handlers is handlers and self.size == len(handlers)
+
+    def candidates(self, message):
+        """
+        Yields (handler, filters) for every handler that may match `message`.
+        """
+        if not self.buckets or not isinstance(message, types.Message):
+            for handler, _, filters in self.entries:
+                yield handler, filters
+            return
+
+        mask = self.all_handlers
+        for message_filter, (by_value, unfiltered) in self.buckets.items():
+            if message_filter == 'content_types':
+                key = message.content_type
+            elif message_filter == 'commands':
+                key = extract_command(message.text) if message.content_type == 'text' else self.not_a_command
+            else:
+                key = message.chat.type
+            mask &= by_value.get(key, 0) | unfiltered
+            if not mask:
+                return
+
+        while mask:
+            lowest = mask & -mask
+            handler, residual, _ = self.entries[lowest.bit_length() - 1]
+            yield handler, residual
+            mask ^= lowest
+
+
+HANDLER_CALL_REJECTED = object()
+
+
+def compile_handler_call(function: Callable, pass_bot: Optional[bool]=False) -> Callable:
+    """
+    Compiles a handler into a call adapter, so its signature is inspected once, when it's registered,
+    instead of on every message.
+
+    The adapter is called as ``adapter(message, data, bot)`` and passes the middleware data the same way
+    class-based middlewares always did: ``handler(message)`` for a single parameter, ``handler(message, data)``
+    or ``handler(message, data=data, bot=bot)`` if the handler accepts `data`, and otherwise only the keys of
+    `data` the handler accepts (plus `bot` if `pass_bot` is set) as keyword arguments.
+    If the handler can't receive what it would be given, the error is logged and
+    :data:`HANDLER_CALL_REJECTED` is returned without calling it.
+
+    Coroutine functions are supported as well: the adapter returns the coroutine to be awaited.
+
+    :meta private:
+
+    :param function: handler function
+    :param pass_bot: pass bot instance to the handler
+    :return: call adapter
+    """
+    try:
+        params = tuple(inspect.signature(function).parameters)
+    except (TypeError, ValueError):
+        # Builtins and some C callables have no signature, call them the way non-class middlewares do
+        if pass_bot:
+            return lambda message, data, bot: function(message, bot=bot)
+        return lambda message, data, bot: function(message)
+
+    if len(params) == 1:
+        return lambda message, data, bot: function(message)
+
+    if 'data' in params:
+        if len(params) == 2:
+            return lambda message, data, bot: function(message, data)
+        elif len(params) == 3:
+            return lambda message, data, bot: function(message, data=data, bot=bot)
+
+        def rejected_call(message, data, bot):
+            logger.error("It is not allowed to pass data and values inside data to the handler. Check your handler: {}".format(function))
+            return HANDLER_CALL_REJECTED
+        return rejected_call
+
+    accepted = frozenset(params)
+    max_kwargs = len(params) - 1 # remove the message parameter
+
+    def call(message, data, bot):
+        kwargs = {key: value for key, value in data.items() if key in accepted} if data else {}
+        if pass_bot:
+            kwargs['bot'] = bot
+        if len(kwargs) > max_kwargs:
+            logger.error("You are passing more parameters than the handler needs. Check your handler: {}".format(function))
+            return HANDLER_CALL_REJECTED
+        return function(message, **kwargs)
+    return call
+
+
 class AsyncTask:
     """
     :meta private:
@@ -194,6 +559,39 @@ class AsyncTask:
             return self.result
 
 
+class PendingResult:
+    """
+    Result of a call put to a :class:`WorkerThread`, :meth:`wait` returns it or raises its exception.
+
+    :meta private:
+    """
+
+    def __init__(self, callback=None):
+        self.result = None
+        # called when the result is set
+        self.callback = callback
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def run(self, target, *args, **kwargs):
+        try:
+            self.result = target(*args, **kwargs)
+        except Exception as e:
+            self.result = e
+        self._done.set()
+        if self.callback:
+            self.callback()
+
+    def wait(self):
+        self._done.wait()
+        if isinstance(self.result, BaseException):
+            raise self.result
+        return self.result
+
+
 class CustomRequestResponse:
     """
     :meta private:
@@ -712,7 +1110,7 @@ def extract_bot_id(token) -> Union[int, None]:
 
 __all__ = (
     "content_type_media", "content_type_service", "update_types",
-    "WorkerThread", "AsyncTask", "CustomRequestResponse",
+    "WorkerThread", "OrderedThreadPool", "HandlerIndex", "compile_handler_call", "AsyncTask", "PendingResult", "CustomRequestResponse",
     "async_dec", "deprecated",
     "is_bytes", "is_string", "is_dict", "is_pil_image",
     "chunks", "generate_random_token", "pil_image_to_file",
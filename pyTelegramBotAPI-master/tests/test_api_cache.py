@@ -0,0 +1,183 @@
+import asyncio
+import sys
+import threading
+import time
+
+sys.path.append('../')
+
+import telebot
+from telebot import apihelper, asyncio_helper, types
+from telebot.api_cache import ApiCache
+from telebot.async_telebot import AsyncTeleBot
+
+
+def test_ttl_and_lru():
+    cache = ApiCache(ttls={'get_chat': 0.05}, maxsize=2)
+    calls = []
+
+    def load(chat_id):
+        calls.append(chat_id)
+        return {'id': chat_id}
+
+    assert cache.get('get_chat', (1,), lambda: load(1)) is cache.get('get_chat', (1,), lambda: load(1))
+    cache.get('get_chat', (2,), lambda: load(2))
+    cache.get('get_chat', (1,), lambda: load(1))
+    cache.get('get_chat', (3,), lambda: load(3)) # drops 2, the least recently used
+    cache.get('get_chat', (1,), lambda: load(1))
+    cache.get('get_chat', (2,), lambda: load(2))
+    assert calls == [1, 2, 3, 2]
+    assert len(cache) == 2
+    time.sleep(0.06)
+    cache.get('get_chat', (1,), lambda: load(1))
+    assert calls == [1, 2, 3, 2, 1]
+
+    # not cached
+    cache.get('leave_chat', (1,), lambda: load(1))
+    cache.get('leave_chat', (1,), lambda: load(1))
+    assert calls[-2:] == [1, 1]
+
+
+def test_coalescing():
+    cache = ApiCache()
+    calls = []
+    started = threading.Event()
+
+    def load():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        if len(calls) == 1:
+            raise apihelper.ApiException('Bad Gateway', 'getChat', None)
+        return 'chat'
+
+    results = []
+
+    def call():
+        try:
+            results.append(cache.get('get_chat', (1,), load))
+        except apihelper.ApiException as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # one request, its error is shared and not cached
+    assert len(calls) == 1 and cache.coalesced == 4
+    assert all(isinstance(result, apihelper.ApiException) for result in results)
+    assert cache.get('get_chat', (1,), load) == 'chat'
+    assert len(calls) == 2
+
+
+def test_invalidation_during_requests():
+    cache = ApiCache()
+
+    def load_invalidating(*args):
+        def load():
+            cache.invalidate(*args)
+            return 'administrators'
+        return load
+
+    # invalidating other keys doesn't drop a result being requested, invalidating its own key does
+    cache.get('get_chat_administrators', (1,), load_invalidating('get_chat_administrators', 2))
+    cache.get('get_chat_administrators', (2,), load_invalidating('get_chat_administrators', 2))
+    cache.get('get_chat_administrators', (3,), lambda: cache.update('get_chat_administrators', (4,), str.upper))
+    assert ('get_chat_administrators', 1) in cache._results and ('get_chat_administrators', 3) in cache._results
+    assert ('get_chat_administrators', 2) not in cache._results
+    # invalidating all results drops the one being requested too
+    cache.get('get_chat', (5,), load_invalidating())
+    assert len(cache) == 0 and not cache._stale
+
+
+def test_invalidation_by_updates(monkeypatch):
+    requests = []
+
+    def get_chat_member(token, chat_id, user_id):
+        requests.append(('get_chat_member', chat_id, user_id))
+        return {'status': 'member', 'user': {'id': user_id, 'is_bot': False, 'first_name': 'A'}}
+
+    def get_chat(token, chat_id):
+        requests.append(('get_chat', chat_id))
+        return {'id': chat_id, 'type': 'supergroup', 'accent_color_id': 0, 'max_reaction_count': 11,
+                'accepted_gift_types': {'unlimited_gifts': True, 'limited_gifts': True, 'unique_gifts': True,
+                                        'premium_subscription': True}}
+
+    monkeypatch.setattr(apihelper, 'get_chat_member', get_chat_member)
+    monkeypatch.setattr(apihelper, 'get_chat', get_chat)
+    bot = telebot.TeleBot('1:token', threaded=False)
+    bot.enable_api_cache()
+    for _ in range(3):
+        assert bot.get_chat_member(-100, 7).status == 'member'
+        bot.get_chat_member(-100, 8)
+        bot.get_chat(-100)
+    assert len(requests) == 3
+
+    def member_update(update_type):
+        user = {'id': 7, 'is_bot': False, 'first_name': 'A'}
+        return types.Update.de_json({'update_id': 1, update_type: {
+            'chat': {'id': -100, 'type': 'supergroup'}, 'from': user, 'date': 0,
+            'old_chat_member': {'status': 'member', 'user': user},
+            'new_chat_member': {'status': 'left', 'user': user}}})
+
+    bot.process_new_updates([member_update('chat_member')])
+    bot.get_chat_member(-100, 7)
+    bot.get_chat_member(-100, 8)
+    bot.get_chat(-100)
+    assert requests[3:] == [('get_chat_member', -100, 7)]
+
+    bot.process_new_updates([member_update('my_chat_member')])
+    bot.get_chat(-100)
+    assert requests[4:] == [('get_chat', -100)]
+
+
+def test_async_coalescing(monkeypatch):
+    requests = []
+
+    async def get_chat_administrators(token, chat_id):
+        requests.append(chat_id)
+        await asyncio.sleep(0.05)
+        return [{'status': 'creator', 'user': {'id': 1, 'is_bot': False, 'first_name': 'A'}, 'is_anonymous': False}]
+
+    monkeypatch.setattr(asyncio_helper, 'get_chat_administrators', get_chat_administrators)
+    bot = AsyncTeleBot('1:token')
+    cache = bot.enable_api_cache()
+
+    async def main():
+        results = await asyncio.gather(*(bot.get_chat_administrators(-100) for _ in range(5)))
+        results.append(await bot.get_chat_administrators(-100))
+        return results
+
+    results = asyncio.run(main())
+    assert requests == [-100]
+    assert all(result[0].status == 'creator' for result in results)
+    assert cache.coalesced == 4 and cache.hits == 1
+
+
+def test_async_leader_cancelled(monkeypatch):
+    requests = []
+
+    async def get_chat(token, chat_id):
+        requests.append(chat_id)
+        await asyncio.sleep(0.05)
+        return {'id': chat_id, 'type': 'private'}
+
+    monkeypatch.setattr(asyncio_helper, 'get_chat', get_chat)
+    bot = AsyncTeleBot('1:token')
+    bot.enable_api_cache()
+
+    async def main():
+        leader = asyncio.ensure_future(bot.get_chat(1))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(bot.get_chat(1))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        # the waiting task requests the chat itself
+        chat = await waiter
+        return leader.cancelled(), chat
+
+    cancelled, chat = asyncio.run(main())
+    assert cancelled and chat.id == 1
+    assert requests == [1, 1]
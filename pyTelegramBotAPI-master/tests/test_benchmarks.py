@@ -0,0 +1,41 @@
+import sys
+
+import pytest
+
+sys.path.append('../')
+
+from benchmarks import corpus, deserialize, dispatch, memory, upload
+
+
+def test_corpus_is_deterministic_and_mixed():
+    updates = corpus.generate(300, seed=1)
+    assert updates == corpus.generate(300, seed=1)
+    assert len(updates) >= 300
+    kinds = {key for update in updates for key in update if key != 'update_id'}
+    assert kinds == {'message', 'callback_query', 'business_message'}
+    assert any('media_group_id' in update.get('message', {}) for update in updates)
+
+
+def test_dispatch_benchmark_smoke():
+    run = dispatch.main(['--updates', '150', '--handlers', '10', '--middleware', '--api-calls', '--output', ''])
+    for result in run['results'].values():
+        assert result['updates'] >= 150
+        assert result['updates_per_sec'] > 0
+
+
+def test_memory_benchmark_smoke():
+    results = memory.main(['--messages', '200'])
+    assert results['eager_without_json'] < results['eager']
+    assert all(size > 0 for size in results.values())
+
+
+def test_deserialize_benchmark_smoke():
+    results = deserialize.main(['--updates', '200', '--repeat', '1'])
+    assert {'Update', 'Message', 'User'} <= set(results)
+    assert all(result['generated_us'] > 0 and result['handwritten_us'] > 0 for result in results.values())
+
+
+def test_upload_benchmark_smoke():
+    pytest.importorskip('resource')
+    results = upload.main(['--size', '50'])
+    assert results['streaming']['increase_mb'] < results['buffered']['increase_mb']
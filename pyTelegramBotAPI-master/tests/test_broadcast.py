@@ -0,0 +1,137 @@
+import asyncio
+import json
+import sys
+import threading
+
+import pytest
+import requests
+
+sys.path.append('../')
+
+from telebot import apihelper, types
+from telebot.broadcast import broadcast, broadcast_async, classify, BLOCKED, CHAT_NOT_FOUND, ERROR, NETWORK_ERROR, OK
+from telebot.rate_limiter import RateLimiter
+
+
+def api_error(error_code, description, **parameters):
+    result_json = {'ok': False, 'error_code': error_code, 'description': description}
+    if parameters:
+        result_json['parameters'] = parameters
+    return apihelper.ApiTelegramException('sendMessage', None, result_json)
+
+
+class FakeBot(object):
+    """
+    Fails with 403 for chat 10, "chat not found" for 11, 429 and 500 once for 12 and 13, a network error for 14.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _send(self, chat_id, text):
+        with self.lock:
+            self.calls.append(chat_id)
+            attempt = self.calls.count(chat_id)
+        if chat_id == 10:
+            raise api_error(403, 'Forbidden: bot was blocked by the user')
+        if chat_id == 11:
+            raise api_error(400, 'Bad Request: chat not found')
+        if chat_id == 12 and attempt == 1:
+            raise api_error(429, 'Too Many Requests: retry after 0.05', retry_after=0.05)
+        if chat_id == 13 and attempt == 1:
+            raise api_error(500, 'Internal Server Error')
+        if chat_id == 14:
+            raise requests.exceptions.ConnectionError('connection reset')
+        return types.Message(chat_id * 100, None, 0, types.Chat(chat_id, 'private'), 'text', {'text': text}, '')
+
+    def send_message(self, chat_id, text):
+        return self._send(chat_id, text)
+
+
+class AsyncFakeBot(FakeBot):
+    async def send_message(self, chat_id, text):
+        await asyncio.sleep(0)
+        return self._send(chat_id, text)
+
+
+def limiter():
+    return RateLimiter(global_rate=1000, global_burst=1000, private_chat_rate=1000, private_chat_burst=1000)
+
+
+def test_broadcast_and_resume(tmp_path):
+    checkpoint = str(tmp_path / 'broadcast.jsonl')
+    chat_ids = list(range(1, 15))
+    reports = []
+    bot = FakeBot()
+    report = broadcast(bot, chat_ids, text='hi', checkpoint=checkpoint, workers=4, max_retries=2, retry_delay=0.01,
+                       rate_limiter=limiter(), progress=reports.append)
+    assert report.results == {OK: 11, BLOCKED: 1, CHAT_NOT_FOUND: 1, NETWORK_ERROR: 1}
+    assert report.retries == 4 # chats 12 and 13 once, 14 twice
+    assert bot.calls.count(14) == 3
+    assert reports[-1] is report and report.finished
+
+    with open(checkpoint) as f:
+        records = {record['chat_id']: record for record in map(json.loads, f)}
+    assert records[5] == {'chat_id': 5, 'result': OK, 'message_id': 500}
+    assert records[10]['result'] == BLOCKED and 'blocked' in records[10]['error']
+
+    # only the chat which failed with a transient error is sent again
+    bot = FakeBot()
+    report = broadcast(bot, chat_ids, text='hi', checkpoint=checkpoint, max_retries=0, rate_limiter=limiter(),
+                       progress=reports.append)
+    assert bot.calls == [14]
+    assert report.skipped == 13
+    assert report.results == {NETWORK_ERROR: 1}
+
+
+def test_broadcast_async(tmp_path):
+    checkpoint = str(tmp_path / 'broadcast.jsonl')
+    bot = AsyncFakeBot()
+    report = asyncio.run(broadcast_async(
+        bot, range(1, 15), text='hi', checkpoint=checkpoint, workers=4, max_retries=2, retry_delay=0.01,
+        rate_limiter=limiter(), progress=lambda report: None))
+    assert report.results == {OK: 11, BLOCKED: 1, CHAT_NOT_FOUND: 1, NETWORK_ERROR: 1}
+    assert sorted(set(bot.calls)) == list(range(1, 15))
+
+
+def test_failures_outside_sending(tmp_path):
+    calls = []
+
+    def progress(report):
+        calls.append(report.done)
+        if len(calls) == 1:
+            raise ValueError('progress callback failure')
+
+    # a raising progress callback is logged, no chat is lost
+    bot = FakeBot()
+    report = broadcast(bot, range(1, 50), text='hi', workers=1, max_retries=0, rate_limiter=limiter(),
+                       progress=progress, progress_interval=0)
+    assert report.done == 49 and sorted(set(bot.calls)) == list(range(1, 50))
+
+    # a failed checkpoint write stops the broadcast and is raised
+    checkpoint = tmp_path / 'missing' / 'broadcast.jsonl'
+    bot = FakeBot()
+    with pytest.raises(FileNotFoundError):
+        broadcast(bot, range(1, 50), text='hi', checkpoint=str(checkpoint), workers=2, rate_limiter=limiter(),
+                  progress=lambda report: None)
+    assert len(bot.calls) <= 2
+
+    bot = AsyncFakeBot()
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(broadcast_async(bot, range(1, 50), text='hi', checkpoint=str(checkpoint), workers=2,
+                                    rate_limiter=limiter(), progress=lambda report: None))
+    assert len(bot.calls) <= 2
+
+
+def test_classify_network_errors():
+    import aiohttp
+    from telebot import asyncio_helper
+    for exception in (requests.exceptions.ConnectionError(), requests.exceptions.ReadTimeout(),
+                      requests.exceptions.ChunkedEncodingError(), asyncio.TimeoutError(),
+                      asyncio_helper.RequestTimeout(), aiohttp.ServerDisconnectedError()):
+        assert classify(exception) == NETWORK_ERROR, exception
+    # permanent errors aren't retried
+    for exception in (requests.exceptions.InvalidURL(), requests.exceptions.MissingSchema(),
+                      FileNotFoundError(), ValueError()):
+        assert classify(exception) == ERROR, exception
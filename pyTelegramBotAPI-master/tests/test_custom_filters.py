@@ -0,0 +1,107 @@
+import asyncio
+import sys
+import threading
+import time
+
+sys.path.append('../')
+
+import telebot
+from telebot import asyncio_filters, custom_filters, types
+from telebot.async_telebot import AsyncTeleBot
+
+
+RIGHTS = ('can_be_edited', 'can_manage_chat', 'can_delete_messages', 'can_manage_video_chats', 'can_restrict_members',
+          'can_promote_members', 'can_change_info', 'can_invite_users', 'can_post_stories', 'can_edit_stories',
+          'can_delete_stories')
+
+
+def member(user_id, status):
+    result = {'status': status, 'user': {'id': user_id, 'is_bot': False, 'first_name': 'A'}, 'is_anonymous': False}
+    if status == 'administrator':
+        result.update(dict.fromkeys(RIGHTS, False))
+    return result
+
+
+ADMINISTRATORS = [member(1, 'creator'), member(2, 'administrator')]
+
+
+def message(chat_id, user_id):
+    return types.Message.de_json({
+        'message_id': 1, 'date': 0, 'text': 'hi', 'chat': {'id': chat_id, 'type': 'supergroup'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'A'}})
+
+
+def chat_member_update(chat_id, user_id, status):
+    return types.Update.de_json({'update_id': 1, 'chat_member': {
+        'chat': {'id': chat_id, 'type': 'supergroup'}, 'from': {'id': 1, 'is_bot': False, 'first_name': 'A'},
+        'date': 0, 'old_chat_member': member(user_id, 'member'), 'new_chat_member': member(user_id, status)}})
+
+
+class FakeBot(telebot.TeleBot):
+    def __init__(self):
+        super().__init__('1:token', threaded=False)
+        self.requests = []
+
+    def get_chat_administrators(self, chat_id):
+        self.requests.append(chat_id)
+        time.sleep(0.02)
+        return [types.ChatMember.de_json(administrator) for administrator in ADMINISTRATORS]
+
+
+def test_is_admin_filter():
+    bot = FakeBot()
+    admin_filter = custom_filters.IsAdminFilter(bot, ttl=0.1)
+    bot.add_custom_filter(admin_filter)
+
+    results = []
+    threads = [threading.Thread(target=lambda user_id=user_id: results.append(
+        admin_filter.check(message(-100, user_id)))) for user_id in (1, 2, 3, 4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False, False, True, True]
+    assert bot.requests == [-100]
+
+    # promoted and demoted members, sets returned before aren't changed
+    administrators = admin_filter.administrators(-100)
+    bot.process_new_updates([chat_member_update(-100, 3, 'administrator'), chat_member_update(-100, 2, 'member')])
+    assert admin_filter.check(message(-100, 3))
+    assert not admin_filter.check(message(-100, 2))
+    assert bot.requests == [-100]
+    assert administrators == {1, 2}
+
+    # the administrators of at most maxsize chats are kept
+    small_filter = custom_filters.IsAdminFilter(bot, maxsize=2)
+    for chat_id in (-1, -2, -3, -1):
+        small_filter.administrators(chat_id)
+    assert len(small_filter._cache) == 2
+    assert bot.requests == [-100, -1, -2, -3, -1]
+    del bot.requests[1:]
+
+    time.sleep(0.1)
+    assert admin_filter.check(message(-100, 2))
+    assert bot.requests == [-100, -100]
+
+
+def test_async_is_admin_filter():
+    class AsyncFakeBot(AsyncTeleBot):
+        requests = []
+
+        async def get_chat_administrators(self, chat_id):
+            self.requests.append(chat_id)
+            await asyncio.sleep(0.02)
+            return [types.ChatMember.de_json(administrator) for administrator in ADMINISTRATORS]
+
+    bot = AsyncFakeBot('1:token')
+    admin_filter = asyncio_filters.IsAdminFilter(bot)
+    bot.add_custom_filter(admin_filter)
+
+    async def main():
+        results = await asyncio.gather(*(admin_filter.check(message(-100, user_id)) for user_id in (1, 2, 3)))
+        await bot.process_new_updates([chat_member_update(-100, 3, 'creator')])
+        results.append(await admin_filter.check(message(-100, 3)))
+        return results
+
+    assert asyncio.run(main()) == [True, True, False, True]
+    assert bot.requests == [-100]
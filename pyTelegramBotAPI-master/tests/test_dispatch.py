@@ -0,0 +1,415 @@
+import sys
+
+sys.path.append('../')
+
+import asyncio
+import json
+import random
+import threading
+import time
+
+import pytest
+
+import telebot
+from telebot import types, util
+from telebot.async_telebot import AsyncTeleBot
+from telebot.handler_backends import ContinueHandling
+from telebot import asyncio_handler_backends
+
+
+def make_message(text=None, content_type='text', chat_type='private', message_id=1, chat_id=11):
+    chat = types.Chat(id=chat_id, type=chat_type)
+    user = types.User(id=10, is_bot=False, first_name='Some User')
+    options = {'text': text} if text is not None else {}
+    return types.Message(
+        message_id=message_id, from_user=user, date=None, chat=chat, content_type=content_type, options=options,
+        json_string="")
+
+
+@pytest.fixture()
+def bot():
+    return telebot.TeleBot('1234:test', threaded=False)
+
+
+def test_dispatch_index_picks_first_matching_handler(bot):
+    calls = []
+
+    @bot.message_handler(commands=['help'])
+    def help_handler(message):
+        calls.append('help')
+
+    @bot.message_handler(content_types=['photo'])
+    def photo_handler(message):
+        calls.append('photo')
+
+    @bot.message_handler(chat_types=['supergroup'])
+    def group_handler(message):
+        calls.append('group')
+
+    @bot.message_handler(func=lambda m: True)
+    def fallback_handler(message):
+        calls.append('fallback')
+
+    bot.process_new_messages([make_message('/help@SomeBot args')])
+    bot.process_new_messages([make_message(content_type='photo')])
+    bot.process_new_messages([make_message('hi', chat_type='supergroup')])
+    bot.process_new_messages([make_message('hi')])
+    bot.process_new_messages([make_message(content_type='sticker')])
+    assert calls == ['help', 'photo', 'group', 'fallback']
+
+
+def test_dispatch_index_keeps_continue_handling_and_order(bot):
+    calls = []
+
+    @bot.message_handler(func=lambda m: True)
+    def first(message):
+        calls.append(1)
+        return ContinueHandling()
+
+    @bot.message_handler(commands=['start'])
+    def second(message):
+        calls.append(2)
+        return ContinueHandling()
+
+    @bot.message_handler(commands=['other'])
+    def skipped(message):
+        calls.append(0)
+
+    @bot.message_handler(content_types=['text'])
+    def third(message):
+        calls.append(3)
+
+    @bot.message_handler(content_types=['text'])
+    def never(message):
+        calls.append(4)
+
+    bot.process_new_messages([make_message('/start')])
+    assert calls == [1, 2, 3]
+
+
+def test_dispatch_index_does_not_call_func_for_filtered_out_handlers(bot):
+    tested = []
+
+    def func(message):
+        tested.append(message.text)
+        return True
+
+    @bot.message_handler(commands=['start'], func=func)
+    def start(message):
+        pass
+
+    bot.process_new_messages([make_message('/help')])
+    bot.process_new_messages([make_message('/start')])
+    assert tested == ['/start']
+
+
+def test_dispatch_index_sees_handlers_added_later(bot):
+    calls = []
+    bot.register_message_handler(lambda m: calls.append('a'), commands=['a'])
+    bot.process_new_messages([make_message('/b')])
+
+    bot.register_message_handler(lambda m: calls.append('b'), commands=['b'])
+    bot.process_new_messages([make_message('/b')])
+    assert calls == ['b']
+
+
+def test_dispatch_index_async():
+    bot = AsyncTeleBot('1234:test')
+    calls = []
+
+    @bot.message_handler(commands=['help'])
+    async def help_handler(message):
+        calls.append('help')
+        return asyncio_handler_backends.ContinueHandling()
+
+    @bot.message_handler(content_types=['photo'])
+    async def photo_handler(message):
+        calls.append('photo')
+
+    @bot.message_handler(func=lambda m: True)
+    async def fallback_handler(message):
+        calls.append('fallback')
+
+    asyncio.run(bot.process_new_messages([make_message('/help')]))
+    asyncio.run(bot.process_new_messages([make_message(content_type='photo')]))
+    assert calls == ['help', 'fallback', 'photo']
+
+
+def test_compiled_handler_calls_pass_middleware_data():
+    from telebot.handler_backends import BaseMiddleware
+
+    class Middleware(BaseMiddleware):
+        update_types = ['message']
+
+        def pre_process(self, message, data):
+            data['language'] = 'en'
+            data['unused'] = True
+
+        def post_process(self, message, data, exception):
+            calls.append(('post', exception))
+
+    bot = telebot.TeleBot('1234:test', threaded=False, use_class_middlewares=True)
+    bot.setup_middleware(Middleware())
+    calls = []
+
+    @bot.message_handler(commands=['one'])
+    def one(message):
+        calls.append('one')
+
+    @bot.message_handler(commands=['data'])
+    def with_data(message, data):
+        calls.append(data['language'])
+
+    @bot.message_handler(commands=['kwargs'], pass_bot=True)
+    def with_kwargs(message, language, bot):
+        calls.append((language, bot.token))
+
+    @bot.message_handler(commands=['rejected'])
+    def rejected(message, data, bot, other):
+        calls.append('rejected')
+
+    for text in ['/one', '/data', '/kwargs', '/rejected']:
+        bot.process_new_messages([make_message(text)])
+    assert calls == ['one', ('post', None), 'en', ('post', None), ('en', '1234:test'), ('post', None)]
+
+
+def test_compiled_handler_calls_async():
+    from telebot.asyncio_handler_backends import BaseMiddleware
+
+    class Middleware(BaseMiddleware):
+        update_types = ['message']
+
+        async def pre_process(self, message, data):
+            data['language'] = 'en'
+
+        async def post_process(self, message, data, exception):
+            pass
+
+    bot = AsyncTeleBot('1234:test')
+    bot.setup_middleware(Middleware())
+    calls = []
+
+    @bot.message_handler(commands=['data'])
+    async def with_data(message, data):
+        calls.append(data['language'])
+        return asyncio_handler_backends.ContinueHandling()
+
+    @bot.message_handler(func=lambda m: True)
+    async def with_kwargs(message, language):
+        calls.append(language)
+
+    asyncio.run(bot.process_new_messages([make_message('/data')]))
+    assert calls == ['en', 'en']
+
+
+def test_ordered_per_chat_pool_keeps_chat_order():
+    bot = telebot.TeleBot('1234:test', num_threads=4, ordered_per_chat=True)
+    calls = []
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        time.sleep(random.random() / 1000)
+        calls.append((message.chat.id, message.message_id))
+
+    messages = [make_message('hi', message_id=i, chat_id=chat_id) for i in range(20) for chat_id in (1, 2, 3)]
+    bot.process_new_messages(messages)
+    deadline = time.monotonic() + 5
+    while len(calls) < len(messages) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    bot.stop_bot()
+
+    assert len(calls) == len(messages)
+    for chat_id in (1, 2, 3):
+        assert [message_id for chat, message_id in calls if chat == chat_id] == list(range(20))
+
+
+def test_ordered_per_chat_routing_key():
+    message = make_message('hi', chat_id=5)
+    user = types.User(id=7, is_bot=False, first_name='Some User')
+    callback = types.CallbackQuery(1, user, 'data', 'chat_instance', json_string="", message=message)
+    inline = types.InlineQuery(1, user, 'query', '')
+    assert util.OrderedThreadPool.routing_key(message) == 5
+    assert util.OrderedThreadPool.routing_key(callback) == 5
+    assert util.OrderedThreadPool.routing_key(inline) == 7
+    assert util.OrderedThreadPool.routing_key([message]) is None
+
+
+def test_thread_pool_queue_limit():
+    bot = telebot.TeleBot('1234:test', num_threads=1, max_queue_size=2)
+    pool = bot.worker_pool
+    release = threading.Event()
+    pool.put(release.wait)
+    deadline = time.monotonic() + 5
+    while pool.queue_depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    for _ in range(3):
+        pool.put(lambda: None)
+    assert pool.queue_depth == 3
+    assert pool.high_water_mark == 3
+    assert not pool.wait_for_capacity(timeout=0.05)
+    assert pool.blocked_count == 1
+    assert pool.blocked_time > 0
+
+    release.set()
+    assert pool.wait_for_capacity(timeout=5)
+    bot.stop_bot()
+
+
+def test_elastic_thread_pool_scales_up_and_down():
+    bot = telebot.TeleBot('1234:test', num_threads=1, max_threads=3)
+    pool = bot.worker_pool
+    pool.idle_timeout = 0.1
+    release = threading.Event()
+    for _ in range(3):
+        pool.put(release.wait)
+    deadline = time.monotonic() + 5
+    while pool.busy_workers < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(pool.workers) == 3
+    assert pool.scaled_up == 2
+
+    release.set()
+    while len(pool.workers) > 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(pool.workers) == 1
+    assert pool.scaled_down == 2
+    bot.stop_bot()
+
+
+@pytest.fixture()
+def stub_sender():
+    from telebot import apihelper
+
+    class Sender:
+        def __init__(self):
+            self.batches = []
+
+        def __call__(self, method, url, params=None, files=None, timeout=None, proxies=None):
+            if url.endswith('getMe'):
+                result = {'id': 1, 'is_bot': True, 'first_name': 'Test', 'username': 'test_bot'}
+            else:
+                result = self.batches.pop(0) if self.batches else []
+            return util.CustomRequestResponse(json.dumps({'ok': True, 'result': result}))
+
+    sender = Sender()
+    apihelper.CUSTOM_REQUEST_SENDER = sender
+    yield sender
+    apihelper.CUSTOM_REQUEST_SENDER = None
+
+
+def make_update(update_id, text):
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': 0, 'text': text, 'chat': {'id': 11, 'type': 'private'},
+        'from': {'id': 10, 'is_bot': False, 'first_name': 'Some User'}}}
+
+
+def test_threaded_polling_dispatches_and_stops(stub_sender):
+    bot = telebot.TeleBot('1234:test', num_threads=2)
+    stub_sender.batches = [[make_update(1, 'a'), make_update(2, 'b')], [make_update(3, 'stop')]]
+    calls = []
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        calls.append(message.text)
+        if message.text == 'stop':
+            bot.stop_polling()
+
+    polling = threading.Thread(target=bot.polling, kwargs={'long_polling_timeout': 0})
+    polling.start()
+    polling.join(5)
+    assert not polling.is_alive()
+    assert sorted(calls) == ['a', 'b', 'stop']
+    assert bot.last_update_id == 3
+    bot.stop_bot()
+
+
+def test_threaded_polling_raises_worker_exception(stub_sender):
+    bot = telebot.TeleBot('1234:test', num_threads=2)
+    stub_sender.batches = [[make_update(1, 'a')]]
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        raise ValueError('handler failed')
+
+    with pytest.raises(ValueError):
+        bot.polling(long_polling_timeout=0)
+    bot.stop_bot()
+
+
+
+def test_threaded_polling_raises_worker_exception_during_long_poll(stub_sender):
+    from telebot import apihelper
+    bot = telebot.TeleBot('1234:test', num_threads=2)
+    get_updates = apihelper.get_updates
+    requests = []
+
+    def slow_get_updates(token, offset=None, *args, **kwargs):
+        requests.append(offset)
+        if len(requests) > 1:
+            # a long poll without updates
+            time.sleep(1)
+            return []
+        return [make_update(1, 'a')]
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        time.sleep(0.05)
+        raise ValueError('handler failed')
+
+    apihelper.get_updates = slow_get_updates
+    try:
+        started = time.monotonic()
+        with pytest.raises(ValueError):
+            bot.polling(long_polling_timeout=1)
+        # raised without waiting for the long poll
+        assert time.monotonic() - started < 0.5
+    finally:
+        apihelper.get_updates = get_updates
+        bot.stop_bot()
+@pytest.mark.parametrize('threaded', [True, False])
+def test_pipelined_polling_keeps_offsets(stub_sender, threaded):
+    from telebot import apihelper
+    offsets = []
+    threads = []
+    get_updates = apihelper.get_updates
+
+    def recording_get_updates(token, offset=None, *args, **kwargs):
+        offsets.append(offset)
+        threads.append(threading.current_thread())
+        return get_updates(token, offset, *args, **kwargs)
+
+    bot = telebot.TeleBot('1234:test', threaded=threaded)
+    stub_sender.batches = [[make_update(1, 'a'), make_update(2, 'b')], [make_update(5, 'c')], [make_update(6, 'stop')]]
+    calls = []
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        calls.append(message.text)
+        if message.text == 'stop':
+            bot.stop_polling()
+
+    apihelper.get_updates = recording_get_updates
+    try:
+        bot.polling(long_polling_timeout=0, pipeline_updates=True)
+        # the polling thread sends its last request and exits
+        for thread in threading.enumerate():
+            if thread.name == 'PollingThread':
+                thread.join(5)
+    finally:
+        apihelper.get_updates = get_updates
+        bot.stop_bot()
+    assert offsets[:4] == [1, 3, 6, 7]
+    # prefetches are sent by the polling thread
+    assert len(set(threads[1:4])) == 1 and threads[1].name == 'PollingThread'
+    assert sorted(calls) == ['a', 'b', 'c', 'stop']
+    assert bot.last_update_id == 6
+
+
+def test_no_prefetch_after_stop_polling(stub_sender):
+    bot = telebot.TeleBot('1234:test', threaded=False)
+    stub_sender.batches = [[make_update(1, 'a')]]
+    bot.stop_polling()
+    bot._TeleBot__retrieve_updates(timeout=0, long_polling_timeout=0, pipeline_updates=True)
+    assert bot._TeleBot__polling_worker is None and bot._TeleBot__prefetched_updates is None
+    assert bot.last_update_id == 1
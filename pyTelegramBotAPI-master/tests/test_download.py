@@ -0,0 +1,117 @@
+import asyncio
+import io
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append('../')
+
+from telebot import apihelper, asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+CONTENT = os.urandom(300000)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+        # "documents/norange" ignores Range headers
+        if match and not self.path.endswith('norange'):
+            start = int(match.group(1))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */{}'.format(len(CONTENT)))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = CONTENT[start:]
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, len(CONTENT) - 1, len(CONTENT)))
+        else:
+            body = CONTENT
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def file_url(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:{}/file/bot{{0}}/{{1}}'.format(server.server_port)
+    monkeypatch.setattr(apihelper, 'FILE_URL', url)
+    monkeypatch.setattr(asyncio_helper, 'FILE_URL', url)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_file_to(file_url, tmp_path):
+    destination = io.BytesIO()
+    progress = []
+    size = apihelper.download_file_to('1:token', 'documents/file', destination, chunk_size=65536,
+                                      progress=lambda downloaded, total: progress.append((downloaded, total)))
+    assert size == len(CONTENT) and destination.getvalue() == CONTENT
+    assert progress[0] == (65536, len(CONTENT)) and progress[-1] == (len(CONTENT), len(CONTENT))
+    assert len(progress) == 5
+
+    # resumed with a Range request
+    path = tmp_path / 'file'
+    path.write_bytes(CONTENT[:100000])
+    progress.clear()
+    assert apihelper.download_file_to('1:token', 'documents/file', str(path), resume=True,
+                                      progress=lambda downloaded, total: progress.append(downloaded)) == len(CONTENT)
+    assert path.read_bytes() == CONTENT
+    assert progress[-1] == len(CONTENT)
+
+    # complete already
+    assert apihelper.download_file_to('1:token', 'documents/file', str(path), resume=True) == len(CONTENT)
+    assert path.read_bytes() == CONTENT
+
+    # the server sends the whole file, its start is skipped
+    path.write_bytes(CONTENT[:100000])
+    assert apihelper.download_file_to('1:token', 'documents/norange', str(path), resume=True,
+                                      chunk_size=30000) == len(CONTENT)
+    assert path.read_bytes() == CONTENT
+
+    # without resume the file is replaced
+    assert apihelper.download_file_to('1:token', 'documents/file', str(path)) == len(CONTENT)
+    assert path.read_bytes() == CONTENT
+
+
+def test_download_file_chunks_async(file_url, tmp_path):
+    bot = AsyncTeleBot('1:token')
+
+    class Destination(io.BytesIO):
+        threads = set()
+
+        def write(self, data):
+            self.threads.add(threading.current_thread())
+            return super().write(data)
+
+    destination = Destination()
+
+    async def main():
+        chunks = [chunk async for chunk in bot.download_file_chunks('documents/file', offset=1000, chunk_size=50000)]
+        size = await bot.download_file_to('documents/norange', str(tmp_path / 'file'))
+        await bot.download_file_to('documents/file', destination)
+        await asyncio_helper.session_manager.session.close()
+        return chunks, size
+
+    chunks, size = asyncio.run(main())
+    # written outside the event loop
+    assert destination.getvalue() == CONTENT and threading.main_thread() not in Destination.threads
+    assert b''.join(chunks) == CONTENT[1000:]
+    assert max(map(len, chunks)) <= 50000
+    assert size == len(CONTENT) and (tmp_path / 'file').read_bytes() == CONTENT
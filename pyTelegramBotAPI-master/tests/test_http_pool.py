@@ -0,0 +1,67 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append('../')
+
+from telebot import apihelper, http_pool
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep connections alive
+
+    def do_GET(self):
+        body = '{{"ok": true, "result": {}}}'.format(self.client_address[1]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}/bot{{0}}/{{1}}'.format(server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+def test_recycling_session(server):
+    url = server.format('1:token', 'getMe')
+    session = http_pool.requests_session(connection_ttl=0.2)
+    first = session.get(url).json()['result']
+    assert session.get(url).json()['result'] == first
+    time.sleep(0.25)
+    assert session.get(url).json()['result'] != first
+
+    session = http_pool.requests_session(keepalive=0.1)
+    first = session.get(url).json()['result']
+    assert session.get(url).json()['result'] == first
+    time.sleep(0.15)
+    assert session.get(url).json()['result'] != first
+
+
+def test_shared_session_pool(server, monkeypatch):
+    monkeypatch.setattr(apihelper, 'API_URL', server)
+    monkeypatch.setattr(apihelper, 'SESSION_POOL', 'requests')
+    monkeypatch.setattr(apihelper, 'POOL_MAXSIZE', 4)
+    monkeypatch.setattr(apihelper, 'POOL_BLOCK', True)
+    with ThreadPoolExecutor(16) as executor:
+        ports = set(executor.map(lambda _: apihelper.get_me('1:token'), range(40)))
+    assert len(ports) <= 4
+    session = apihelper._get_req_session()
+    assert session is apihelper._get_req_session()
+    assert isinstance(session.get_adapter('https://api.telegram.org'), http_pool.RecyclingHTTPAdapter)
+
+    monkeypatch.setattr(apihelper, 'POOL_MAXSIZE', 8)
+    assert apihelper._get_req_session() is not session
@@ -0,0 +1,102 @@
+import sys
+
+sys.path.append('../')
+
+import asyncio
+import json
+import urllib.request
+
+import pytest
+
+import telebot
+from telebot import apihelper, types, util
+from telebot.async_telebot import AsyncTeleBot
+from telebot.metrics import Metrics
+
+
+def make_message(text):
+    chat = types.Chat(id=11, type='private')
+    user = types.User(id=10, is_bot=False, first_name='Some User')
+    return types.Message(
+        message_id=1, from_user=user, date=None, chat=chat, content_type='text', options={'text': text},
+        json_string="")
+
+
+@pytest.fixture()
+def metrics():
+    metrics = Metrics()
+    yield metrics
+    metrics.disable_request_tracing()
+    apihelper.CUSTOM_REQUEST_SENDER = None
+
+
+def test_handler_and_update_metrics(metrics):
+    bot = telebot.TeleBot('1234:test', threaded=False)
+    assert bot.enable_metrics(metrics) is metrics
+
+    @bot.message_handler(commands=['start'])
+    def start_handler(message):
+        pass
+
+    @bot.message_handler(commands=['fail'])
+    def failing_handler(message):
+        raise ValueError('handler failed')
+
+    bot.process_new_messages([make_message('/start'), make_message('/start')])
+    with pytest.raises(ValueError):
+        bot.process_new_messages([make_message('/fail')])
+    text = metrics.render()
+    assert 'telebot_update_duration_seconds_count{update_type="message"} 3' in text
+    assert ('telebot_handler_duration_seconds_count{update_type="message",'
+            'handler="test_handler_and_update_metrics.<locals>.start_handler"} 2') in text
+    assert 'telebot_handler_duration_seconds_bucket{update_type="message",' in text
+    # failing handlers are measured too
+    assert ('telebot_handler_duration_seconds_count{update_type="message",'
+            'handler="test_handler_and_update_metrics.<locals>.failing_handler"} 1') in text
+
+
+def test_api_metrics_count_rate_limits(metrics):
+    def sender(method, url, params=None, files=None, timeout=None, proxies=None):
+        return util.CustomRequestResponse(json.dumps(
+            {'ok': False, 'error_code': 429, 'description': 'Too Many Requests: retry after 1',
+             'parameters': {'retry_after': 1}}), status_code=429)
+    apihelper.CUSTOM_REQUEST_SENDER = sender
+    metrics.enable_request_tracing()
+
+    with pytest.raises(apihelper.ApiTelegramException):
+        apihelper.send_message('1234:test', 1, 'text')
+    text = metrics.render()
+    assert 'telebot_api_rate_limited_total{method="sendMessage"} 1' in text
+    assert 'telebot_api_responses_total{method="sendMessage",status="429"} 1' in text
+    assert 'telebot_api_request_duration_seconds_count{method="sendMessage"} 1' in text
+
+
+def test_metrics_http_endpoint(metrics):
+    bot = telebot.TeleBot('1234:test', num_threads=1)
+    bot.enable_metrics(metrics)
+    server = metrics.start_http_server(0)
+    try:
+        with urllib.request.urlopen('http://127.0.0.1:{}/metrics'.format(server.server_address[1])) as response:
+            text = response.read().decode('utf-8')
+    finally:
+        metrics.stop_http_server()
+        bot.stop_bot()
+    assert '# TYPE telebot_queue_depth gauge' in text
+    with pytest.raises(OSError):
+        urllib.request.urlopen('http://127.0.0.1:{}/metrics'.format(server.server_address[1]), timeout=1)
+    assert 'telebot_worker_threads 1' in text
+
+
+def test_async_handler_metrics(metrics):
+    bot = AsyncTeleBot('1234:test')
+    bot.enable_metrics(metrics)
+
+    @bot.message_handler(commands=['start'])
+    async def start_handler(message):
+        pass
+
+    asyncio.run(bot.process_new_messages([make_message('/start')]))
+    text = metrics.render()
+    assert 'telebot_update_duration_seconds_count{update_type="message"} 1' in text
+    assert ('telebot_handler_duration_seconds_count{update_type="message",'
+            'handler="test_async_handler_metrics.<locals>.start_handler"} 1') in text
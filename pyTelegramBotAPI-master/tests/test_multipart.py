@@ -0,0 +1,110 @@
+import io
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+import urllib3.filepost
+
+sys.path.append('../')
+
+from telebot import apihelper
+from telebot.multipart import MultipartEncoder
+
+CONTENT = os.urandom(200000)
+
+
+def sample_files():
+    named = io.BytesIO(CONTENT)
+    named.name = '/tmp/photo.jpg'
+    return {
+        'document': named,
+        'thumbnail': ('thumb.jpg', io.BytesIO(CONTENT[:1000]), 'image/jpeg'),
+        'audio': ('файл.mp3', CONTENT[:5000]),
+        'sticker': ('sticker.webp', 'text data', 'image/webp', {'X-Extra': '1'}),
+        'skipped': ('none', None),
+    }
+
+
+def test_same_body_as_requests(monkeypatch):
+    monkeypatch.setattr(urllib3.filepost, 'choose_boundary', lambda: 'b0undary')
+    expected, content_type = requests.models.RequestEncodingMixin._encode_files(sample_files(), None)
+
+    encoder = MultipartEncoder(sample_files(), boundary='b0undary', chunk_size=4096)
+    assert encoder.content_type == content_type
+    assert encoder.len == len(expected)
+    assert b''.join(iter(lambda: encoder.read(10000), b'')) == expected
+
+    # rewound for retries
+    encoder.seek(0)
+    assert encoder.read(100) == expected[:100]
+    encoder.seek(0)
+    assert b''.join(encoder) == expected
+
+    # a file which can't tell its size is sent in chunks
+    class Pipe(io.RawIOBase):
+        def __init__(self):
+            self.data = io.BytesIO(CONTENT)
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            return self.data.readinto(buffer)
+
+    expected, _ = requests.models.RequestEncodingMixin._encode_files({'video': ('v.mp4', Pipe())}, None)
+    encoder = MultipartEncoder({'video': ('v.mp4', Pipe())}, boundary='b0undary')
+    assert encoder.len is None
+    assert encoder.read() == expected
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.requests.append((self.path, dict(self.headers), body))
+        response = b'{"ok": true, "result": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(apihelper, 'API_URL', 'http://127.0.0.1:{}/bot{{0}}/{{1}}'.format(server.server_port))
+    Handler.requests.clear()
+    yield Handler.requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_streaming_upload(server, monkeypatch, tmp_path):
+    path = tmp_path / 'document.pdf'
+    path.write_bytes(CONTENT)
+    progress = []
+    with open(path, 'rb') as f, apihelper.upload_progress(lambda sent, total: progress.append((sent, total))):
+        assert apihelper.send_data('1:token', 5, f, 'document', caption='hi') is True
+    monkeypatch.setattr(apihelper, 'STREAMING_UPLOADS', False)
+    with open(path, 'rb') as f:
+        apihelper.send_data('1:token', 5, f, 'document', caption='hi')
+
+    (path, headers, body), (buffered_path, buffered_headers, buffered_body) = server
+    assert path == buffered_path and 'chat_id=5' in path and 'caption=hi' in path
+    assert int(headers['Content-Length']) == len(body) and progress[-1] == (len(body), len(body))
+    # the same body with another boundary
+    boundary = headers['Content-Type'].split('boundary=')[1].encode()
+    buffered_boundary = buffered_headers['Content-Type'].split('boundary=')[1].encode()
+    assert body.replace(boundary, buffered_boundary) == buffered_body
+    assert CONTENT in body
@@ -0,0 +1,61 @@
+import sys
+
+sys.path.append('../')
+
+import asyncio
+import os
+import time
+
+import telebot
+from telebot import types
+from telebot.async_telebot import AsyncTeleBot
+
+
+def make_message(text):
+    chat = types.Chat(id=11, type='private')
+    user = types.User(id=10, is_bot=False, first_name='Some User')
+    return types.Message(
+        message_id=1, from_user=user, date=None, chat=chat, content_type='text', options={'text': text},
+        json_string="")
+
+
+def test_profiler_writes_reports_of_slow_handlers(tmp_path):
+    bot = telebot.TeleBot('1234:test', threaded=False)
+    bot.enable_profiler(str(tmp_path), threshold=0.02, sample_rate=1, max_reports=2)
+
+    @bot.message_handler(commands=['slow'])
+    def slow_handler(message):
+        time.sleep(0.03)
+
+    @bot.message_handler(commands=['fast'])
+    def fast_handler(message):
+        pass
+
+    bot.process_new_messages([make_message('/fast')])
+    assert os.listdir(tmp_path) == []
+
+    for _ in range(3):
+        bot.process_new_messages([make_message('/slow')])
+    reports = sorted(name for name in os.listdir(tmp_path) if name.endswith('.txt'))
+    assert len(reports) == 2
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.prof')]) == 2
+    assert reports[0].endswith('_message_test_profiler_writes_reports_of_slow_handlers._locals_.slow_handler.txt')
+    with open(os.path.join(tmp_path, reports[0])) as report:
+        content = report.read()
+    assert 'update_type: message' in content
+    assert 'slow_handler' in content
+
+
+def test_async_profiler_samples_stacks(tmp_path):
+    bot = AsyncTeleBot('1234:test')
+    profiler = bot.enable_profiler(str(tmp_path), threshold=0.02, sample_rate=1)
+
+    @bot.message_handler(commands=['slow'])
+    async def slow_handler(message):
+        time.sleep(0.05)  # blocks the loop on purpose
+
+    asyncio.run(bot.process_new_messages([make_message('/slow')]))
+    assert profiler.reports_written == 1
+    report, = os.listdir(tmp_path)
+    with open(os.path.join(tmp_path, report)) as report:
+        assert 'slow_handler' in report.read()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append('../')
+
+from telebot import apihelper, util
+from telebot.rate_limiter import RateLimiter
+
+
+def test_chat_buckets():
+    limiter = RateLimiter(global_rate=1000, global_burst=1000, private_chat_rate=20, group_chat_rate=10, group_chat_burst=1)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire('sendMessage', 1)
+    assert time.monotonic() - started >= 0.19
+    assert limiter.throttled == 4
+
+    # chat actions don't take the token of the message sent after them
+    started = time.monotonic()
+    limiter.acquire('sendChatAction', 5)
+    limiter.acquire('sendMessage', 5)
+    assert time.monotonic() - started < 0.04
+    assert limiter.throttled == 4
+
+    # a queue in one chat doesn't hold up others
+    threads = [threading.Thread(target=limiter.acquire, args=('sendMessage', -100)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started = time.monotonic()
+    limiter.acquire('sendMessage', 2)
+    limiter.acquire('getChat', 2)
+    assert time.monotonic() - started < 0.05
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - started >= 0.29
+    assert limiter.chats == 4
+
+
+def test_global_bucket_and_idle_chats():
+    limiter = RateLimiter(global_rate=20, global_burst=2, private_chat_rate=20, idle_timeout=0.05)
+    started = time.monotonic()
+    for chat_id in range(1, 7):
+        limiter.acquire('sendMessage', chat_id)
+    assert time.monotonic() - started >= 0.19
+    time.sleep(0.15)
+    limiter.acquire('sendMessage', 100)
+    assert limiter.chats == 1
+
+
+def test_retry_after_pauses_chat(monkeypatch):
+    limiter = RateLimiter()
+    responses = []
+
+    def sender(method, url, params=None, **kwargs):
+        responses.append(params['chat_id'])
+        if len(responses) == 1:
+            return util.CustomRequestResponse(json.dumps({
+                'ok': False, 'error_code': 429, 'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 0.3}}))
+        return util.CustomRequestResponse(json.dumps({'ok': True, 'result': True}))
+
+    monkeypatch.setattr(apihelper, 'CUSTOM_REQUEST_SENDER', sender)
+    monkeypatch.setattr(apihelper, 'RATE_LIMITER', limiter)
+    with pytest.raises(apihelper.ApiTelegramException):
+        apihelper.send_message('1:token', 5, 'text')
+    started = time.monotonic()
+    apihelper.send_message('1:token', 6, 'text')
+    assert time.monotonic() - started < 0.1
+    apihelper.send_message('1:token', 5, 'text')
+    assert time.monotonic() - started >= 0.25
+
+    async def send(chat_id):
+        await limiter.acquire_async('sendMessage', chat_id)
+        return time.monotonic()
+
+    async def main():
+        return await asyncio.gather(*(send(-100) for _ in range(3)))
+
+    limiter.group_chat_rate = 10
+    limiter.group_chat_burst = 1
+    times = asyncio.run(main())
+    assert times[2] - times[0] >= 0.19
@@ -0,0 +1,51 @@
+import sys
+
+sys.path.append('../')
+
+import json
+
+import pytest
+
+from telebot import apihelper, tracing, util
+
+
+@pytest.fixture()
+def traces():
+    collected = []
+    tracing.add_pre_request_hook(collected.append)
+    tracing.add_post_response_hook(collected.append)
+    yield collected
+    tracing.remove_hook(collected.append)
+    apihelper.CUSTOM_REQUEST_SENDER = None
+
+
+def test_tracing_hooks_receive_request_details(traces):
+    def sender(method, url, params=None, files=None, timeout=None, proxies=None):
+        return util.CustomRequestResponse(json.dumps({'ok': True, 'result': True}))
+    apihelper.CUSTOM_REQUEST_SENDER = sender
+
+    apihelper._make_request('1234:test', 'sendChatAction', params={'chat_id': 1, 'action': 'typing'})
+    assert len(traces) == 2
+    assert traces[0] is traces[1]
+    trace = traces[0]
+    assert trace.method_name == 'sendChatAction'
+    assert trace.payload_size == len('chat_id1actiontyping')
+    assert trace.status == 200
+    assert trace.retries == 0
+    assert trace.latency >= 0
+    assert trace.exception is None
+
+
+def test_tracing_hooks_receive_errors(traces):
+    def sender(method, url, params=None, files=None, timeout=None, proxies=None):
+        raise ConnectionError('no network')
+    apihelper.CUSTOM_REQUEST_SENDER = sender
+
+    with pytest.raises(ConnectionError):
+        apihelper._make_request('1234:test', 'getMe')
+    assert traces[-1].status is None
+    assert isinstance(traces[-1].exception, ConnectionError)
+
+
+def test_tracing_disabled_without_hooks():
+    assert tracing.start_request('getMe', 'get') is None
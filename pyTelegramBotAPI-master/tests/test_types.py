@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import sys
 
+import pytest
+
 sys.path.append('../')
 from telebot import types
 
@@ -309,3 +311,188 @@ def test_message_entity():
     sample_string_7 = r'{"update_id":934522167,"message":{"message_id":1374526,"from":{"id":927266710,"is_bot":false,"first_name":">_run","username":"coder2020","language_code":"en","is_premium":true},"chat":{"id":927266710,"first_name":">_run","username":"coder2020","type":"private"},"date":1682179716,"reply_to_message":{"message_id":1374510,"from":{"id":927266710,"is_bot":false,"first_name":">_run","username":"coder2020","language_code":"en"},"chat":{"id":927266710,"first_name":">_run","username":"coder2020","type":"private"},"date":1712765863,"text":"text @UserName b i s u c p #hashtag https://example.com","entities":[{"offset":5,"length":9,"type":"mention"},{"offset":15,"length":1,"type":"bold"},{"offset":17,"length":1,"type":"italic"},{"offset":19,"length":1,"type":"strikethrough"},{"offset":21,"length":1,"type":"underline"},{"offset":23,"length":1,"type":"code"},{"offset":25,"length":1,"type":"spoiler"},{"offset":27,"length":8,"type":"hashtag"},{"offset":36,"length":19,"type":"url"}],"link_preview_options":{"is_disabled":true}},"quote":{"text":"text @UserName b i s u c p #hashtag https://example.com","entities":[{"offset":15,"length":1,"type":"bold"},{"offset":17,"length":1,"type":"italic"},{"offset":19,"length":1,"type":"strikethrough"},{"offset":21,"length":1,"type":"underline"},{"offset":25,"length":1,"type":"spoiler"}],"position":0,"is_manual":true},"text":"quote reply"}}'
     message_7 = types.Update.de_json(sample_string_7).message
     assert message_7.quote.html_text == 'text @UserName <b>b</b> <i>i</i> <s>s</s> <u>u</u> c <span class="tg-spoiler">p</span> #hashtag https://example.com'
+
+
+def _fields(value, message_fields):
+    # lazy messages have their fields as class attributes until they are accessed
+    if isinstance(value, types.Message):
+        return {name: _fields(getattr(value, name), message_fields) for name in message_fields}
+    if isinstance(value, list):
+        return [_fields(item, message_fields) for item in value]
+    if isinstance(value, types.JsonDeserializable):
+        return {name: _fields(item, message_fields) for name, item in types._attributes(value).items()}
+    return value
+
+
+def test_lazy_deserialization(monkeypatch):
+    user = r'{"id":927266710,"is_bot":false,"first_name":">_run","username":"coder2020"}'
+    chat = r'{"id":-100123,"title":"Group","type":"supergroup"}'
+    photo = r'[{"file_id":"a","file_unique_id":"b","width":90,"height":60},{"file_id":"c","file_unique_id":"d","width":800,"height":600}]'
+    samples = [
+        r'{"update_id":1,"message":{"message_id":1,"from":%s,"chat":%s,"date":1682179716,"text":"/start b","entities":[{"offset":0,"length":6,"type":"bot_command"}],"reply_to_message":{"message_id":2,"from":%s,"chat":%s,"date":1682179700,"photo":%s,"caption":"c"}}}' % (user, chat, user, chat, photo),
+        r'{"update_id":2,"edited_message":{"message_id":3,"from":%s,"chat":%s,"date":1682179716,"edit_date":1682179800,"document":{"file_id":"e","file_unique_id":"f"},"animation":{"file_id":"e","file_unique_id":"f","width":1,"height":1,"duration":1}}}' % (user, chat),
+        r'{"update_id":3,"message":{"message_id":4,"from":%s,"chat":%s,"date":1682179716,"new_chat_members":[%s,%s]}}' % (user, chat, user, user),
+        r'{"update_id":4,"message":{"message_id":5,"chat":%s,"date":1682179716,"pinned_message":{"message_id":1,"chat":%s,"date":0}}}' % (chat, chat),
+        r'{"update_id":5,"callback_query":{"id":"1","from":%s,"chat_instance":"1","data":"x","message":{"message_id":6,"from":%s,"chat":%s,"date":1682179716,"text":"t","reply_markup":{"inline_keyboard":[[{"text":"b","callback_data":"x"}]]}}}}' % (user, user, chat),
+    ]
+    eager = [types.Update.de_json(sample) for sample in samples]
+    message_fields = ['content_type', 'id', 'message_id', 'date', 'from_user'] + [key for key, _, _ in types._MESSAGE_FIELDS[1:]]
+    monkeypatch.setattr(types, 'LAZY_DESERIALIZATION', True)
+    lazy = [types.Update.de_json(sample) for sample in samples]
+
+    assert 'chat' not in vars(lazy[0].message)
+    assert lazy[0].message.chat.id == -100123
+    assert 'reply_to_message' not in vars(lazy[0].message)
+    assert lazy[1].edited_message.content_type == 'animation'
+    assert lazy[3].message.content_type == 'pinned_message'
+    assert isinstance(lazy[3].message.pinned_message, types.InaccessibleMessage)
+    for eager_update, lazy_update in zip(eager, lazy):
+        assert _fields(lazy_update, message_fields) == _fields(eager_update, message_fields)
+
+
+def test_slots_and_message_json(monkeypatch):
+    import pickle
+    jsonstring = r'{"message_id":1,"from":{"id":108929734,"first_name":"Frank","is_bot":true},"chat":{"id":1734,"first_name":"F","type":"private"},"date":1435296025,"photo":[{"file_id":"a","file_unique_id":"b","width":90,"height":60}]}'
+    msg = types.Message.de_json(jsonstring)
+    assert not hasattr(msg.from_user, '__dict__')
+    assert not hasattr(msg.chat, '__dict__')
+    assert not hasattr(msg.photo[0], '__dict__')
+    assert 'text' not in vars(msg) and msg.text is None and msg.game is None
+    assert msg.json == jsonstring
+    assert "'first_name': 'Frank'" in str(msg)
+    copy = pickle.loads(pickle.dumps(msg))
+    assert copy.chat.id == 1734 and copy.photo[0].width == 90 and copy.text is None
+
+    monkeypatch.setattr(types, 'RETAIN_MESSAGE_JSON', False)
+    assert types.Message.de_json(jsonstring).json is None
+
+
+def test_fresh_json(monkeypatch):
+    def inline_query():
+        return {'id': '1', 'from': {'id': 1, 'is_bot': False, 'first_name': 'A'}, 'query': 'q', 'offset': ''}
+
+    source = inline_query()
+    with types.fresh_json():
+        assert types.InlineQuery.de_json(source).from_user.id == 1
+    assert source == inline_query()
+
+    monkeypatch.setattr(types, 'RETAIN_MESSAGE_JSON', False)
+    source = inline_query()
+    with types.fresh_json():
+        assert types.InlineQuery.de_json(source).from_user.id == 1
+    assert 'from' not in source
+    source = inline_query()
+    types.InlineQuery.de_json(source)
+    assert source == inline_query()
+
+
+def test_decode_json():
+    import requests
+    from telebot import apihelper, service_utils
+
+    assert service_utils.decode_json(b'{"a": [1, "\\u00e9"]}') == {'a': [1, 'é']}
+    assert service_utils.decode_json('{"text": "\\ud83d"}') == {'text': '\ud83d'}
+    response = requests.Response()
+    response.status_code = 200
+    response._content = '{"ok": true, "result": [{"update_id": 1, "message": {"text": "ü"}}]}'.encode('utf-8')
+    assert apihelper._check_result('getUpdates', response)['result'][0]['message']['text'] == 'ü'
+
+
+def test_generated_de_json():
+    import copy
+    import json
+    import os
+    from telebot import schema
+
+    with open(os.path.join(os.path.dirname(__file__), 'test_data', 'updates.json'), encoding='utf-8') as f:
+        corpus = json.load(f)
+    message_fields = ['content_type', 'id', 'message_id', 'date', 'from_user'] + [key for key, _, _ in types._MESSAGE_FIELDS[1:]]
+    assert types.Update in schema.handwritten
+    generated = [_fields(types.Update.de_json(copy.deepcopy(update)), message_fields) for update in corpus]
+    schema.uninstall()
+    try:
+        assert 'de_json' not in vars(types.Chat)
+        handwritten = [_fields(types.Update.de_json(copy.deepcopy(update)), message_fields) for update in corpus]
+    finally:
+        schema.install()
+    for update, generated_update, handwritten_update in zip(corpus, generated, handwritten):
+        assert generated_update == handwritten_update, update['update_id']
+
+    class CustomUser(types.User):
+        pass
+
+    user = CustomUser.de_json(corpus[0]['message']['from'])
+    assert type(user) is CustomUser and user.username == 'coder2020'
+    assert type(types.Chat.de_json(corpus[0]['message']['chat'])) is types.Chat
+
+
+def test_interning(monkeypatch):
+    import copy
+    import pickle
+
+    def update(update_id):
+        chat = {'id': -100123, 'title': 'Group', 'type': 'supergroup'}
+        user = {'id': 1, 'is_bot': False, 'first_name': 'A'}
+        return {'update_id': update_id, 'message': {
+            'message_id': update_id, 'from': user, 'chat': chat, 'date': 1682179716, 'text': 't',
+            'reply_to_message': {'message_id': 1, 'from': user, 'chat': chat, 'date': 1682179700}}}
+
+    with types.interning():
+        first, second = types.Update.de_json(update(1)), types.Update.de_json(update(2))
+    assert first.message.chat is not second.message.chat
+    first.message.chat.title = 'changed'
+
+    monkeypatch.setattr(types, 'INTERN_USERS_AND_CHATS', True)
+    with types.interning():
+        first, second = types.Update.de_json(update(1)), types.Update.de_json(update(2))
+    assert first.message.chat is second.message.chat is second.message.reply_to_message.chat
+    user = first.message.from_user
+    assert user is second.message.from_user and isinstance(user, types.User)
+    with pytest.raises(AttributeError):
+        user.first_name = 'B'
+    assert user.first_name == 'A'
+    for mutable in (copy.copy(user), pickle.loads(pickle.dumps(user))):
+        assert type(mutable) is types.User and mutable.first_name == 'A'
+        mutable.first_name = 'B'
+    with types.interning():
+        assert types.Update.de_json(update(3)).message.chat is not first.message.chat
+    assert types.Update.de_json(update(4)).message.from_user is not user
+
+
+def test_frozen_markup():
+    import asyncio
+    import pickle
+    from telebot import apihelper, asyncio_helper, util
+
+    markup = util.quick_markup({'A': {'callback_data': 'a'}, 'B': {'url': 'https://example.com'}})
+    frozen = markup.freeze()
+    markup.add(types.InlineKeyboardButton('C', callback_data='c'))
+    assert frozen.to_dict() == {'inline_keyboard': [[
+        {'text': 'A', 'callback_data': 'a'}, {'text': 'B', 'url': 'https://example.com'}]]}
+    assert apihelper._convert_markup(frozen) == frozen.to_json()
+    assert asyncio.run(asyncio_helper._convert_markup(frozen)) == frozen.to_json()
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+    with pytest.raises(AttributeError):
+        frozen._json = '{}'
+
+    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True).add('Yes', 'No').freeze()
+    assert keyboard.to_json() == types.ReplyKeyboardMarkup(resize_keyboard=True).add('Yes', 'No').to_json()
+    assert types.FrozenMarkup(types.ReplyKeyboardRemove()).to_dict() == {'remove_keyboard': True}
+
+
+def test_encode_json_list():
+    import json
+    from telebot import apihelper, service_utils
+
+    content = types.InputTextMessageContent('Text ü')
+    results = [
+        types.InlineQueryResultArticle('1', 'Title', content, reply_markup=types.InlineKeyboardMarkup().add(
+            types.InlineKeyboardButton('A', callback_data='a'))),
+        types.InlineQueryResultCachedPhoto('2', 'file_id', caption='cached'),
+        'not serializable',
+    ]
+    expected = [json.loads(result.to_json()) for result in results[:2]]
+    assert json.loads(apihelper._convert_list_json_serializable(results)) == expected
+    assert json.loads(service_utils.encode_json_list(results + [types.BotCommandScopeDefault()])) == expected + [{'type': 'default'}]
+    assert service_utils.encode_json_list([]) == '[]'
+    assert json.loads(service_utils.encode_json([{'id': 2 ** 70, 'text': '\ud83d'}])) == [{'id': 2 ** 70, 'text': '\ud83d'}]